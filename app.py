@@ -1,45 +1,278 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import io
 from datetime import datetime, timedelta
-import numpy as np
-import json
-import os
+
+# pandas, plotly.express y los módulos de análisis se importan al mostrar los
+# análisis, para que la primera ejecución muestre la barra lateral cuanto antes
+from fgr import metricas, tareas
+from fgr.almacenamiento import ConflictoEscritura
+from fgr.calculos import calcular_area_periodo, calcular_fgr, crear_registro
+from fgr.cache import CacheProyectos
 
 st.set_page_config(page_title="Seguimiento FGR - Proyectos de Construcción", layout="wide")
 
-# Función para cargar datos desde archivos
-def cargar_datos():
-    if os.path.exists('proyectos.json'):
-        with open('proyectos.json', 'r') as f:
-            return json.load(f)
-    return {}
+# Orden del selector de proyectos: campo del resumen y si es descendente
+ORDEN_PROYECTOS = {
+    "Creación": None,
+    "Nombre": ('nombre', False),
+    "Mayor avance": ('avance', True),
+    "Mayor FGR total": ('fgr_total', True),
+    "Registro más reciente": ('ultima_fecha', True),
+}
+
+def ordenar_proyectos(indice, orden):
+    """Nombres de los proyectos en el orden elegido, usando solo sus resúmenes"""
+    if ORDEN_PROYECTOS[orden] is None:
+        return list(indice)
+    campo, descendente = ORDEN_PROYECTOS[orden]
+    if campo == 'nombre':
+        return sorted(indice, key=str.lower, reverse=descendente)
+    # ultima_fecha es None en los proyectos sin registros
+    return sorted(
+        indice, key=lambda nombre: indice[nombre][campo] if indice[nombre][campo] is not None else '',
+        reverse=descendente
+    )
+
+@st.cache_resource
+def obtener_cache():
+    """Datos de proyectos compartidos por todas las sesiones del servidor"""
+    return CacheProyectos()
+
+@st.cache_resource
+def obtener_tareas():
+    """Tareas en segundo plano compartidas por todas las sesiones del servidor"""
+    return tareas.GestorTareas()
+
+@st.fragment(run_every=1.0)
+def seguir_tarea(gestor, id_tarea, texto):
+    """Muestra el progreso de una tarea y vuelve a ejecutar la página cuando termina"""
+    tarea = gestor.tarea(id_tarea)
+    if tarea is None or tarea.terminada:
+        st.rerun()
+    st.progress(tarea.progreso, text=f"{texto}... {tarea.mensaje}")
+    if st.button("Cancelar", key=f"cancelar_tarea_{id_tarea}"):
+        gestor.cancelar(id_tarea)
+
+def calcular_portafolio(control, cache):
+    """Tarea: portafolio, pronóstico y acumulados por período, guardados en la caché compartida
+
+    Se calcula en el hilo de la tarea, sin el grupo de procesos: el portafolio
+    agrupa todos los proyectos de una vez.
+    """
+    from fgr import periodos
+    control.avanzar(0.0, "Registros de todos los proyectos")
+    cache.portafolio()
+    control.avanzar(0.4, "Pronóstico")
+    cache.pronostico()
+    for i, frecuencia in enumerate(periodos.FRECUENCIAS.values()):
+        control.avanzar(0.7 + 0.15 * i, "Acumulados por período")
+        cache.periodos(frecuencia)
+
+def importar_archivo(control, cache, contenido, nombre_archivo, proyectos, versiones, proyecto):
+    """Tarea: valida el archivo por bloques, en el hilo de la tarea, y guarda los registros aceptados"""
+    from fgr import importacion
+    fuente = io.BytesIO(contenido)
+    fuente.name = nombre_archivo
+
+    def progreso(filas):
+        # La posición en el archivo aproxima la fracción leída
+        control.avanzar(0.9 * fuente.tell() / max(len(contenido), 1), f"{filas:,} filas validadas")
+
+    resultado = importacion.importar(fuente, proyectos, proyecto=proyecto, progreso=progreso)
+    control.avanzar(0.9, "Guardando registros")
+    if resultado.registros:
+        # Los registros se validaron contra esta versión de los proyectos
+        cache.agregar_registros(resultado.registros, {
+            nombre: versiones[nombre] for nombre in resultado.registros
+        })
+    return resultado
+
+def exportar_portafolio(control, cache, formato):
+    """Tarea: lee los registros de todos los proyectos y genera el archivo"""
+    from fgr import exportacion
+    control.avanzar(0.0, "Leyendo registros")
+    return exportacion.exportar_en_tarea(control, list(cache.proyectos.items()), formato)
+
+def mostrar_portafolio(cache, gestor, indice):
+    """Muestra indicadores FGR comparativos de todos los proyectos"""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from fgr import periodos
+    st.subheader("Portafolio de Proyectos")
+
+    # Indicadores y lista de proyectos desde los resúmenes guardados, sin esperar al cálculo
+    resumen = pd.DataFrame.from_dict(indice, orient='index').rename_axis('proyecto').reset_index()
+    if resumen['registros'].sum() == 0:
+        st.info("Aún no hay registros en ningún proyecto.")
+        return
+    con_registros = resumen[resumen['area_construida'] > 0]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Proyectos", f"{len(resumen):,}")
+    with col2:
+        st.metric("Registros", f"{resumen['registros'].sum():,}")
+    with col3:
+        st.metric("FGR Promedio", f"{con_registros['fgr_total'].mean():.3f} m³/m²")
+    with col4:
+        st.metric("FGR Mediano", f"{con_registros['fgr_total'].median():.3f} m³/m²")
+
+    st.subheader("Proyectos")
+    st.dataframe(
+        resumen[[
+            'proyecto', 'registros', 'avance', 'area_construida', 'residuos',
+            'fgr_promedio', 'fgr_total', 'ultima_fecha'
+        ]].rename(columns={
+            'proyecto': 'Proyecto',
+            'registros': 'Registros',
+            'avance': 'Avance (%)',
+            'area_construida': 'Área Construida (m²)',
+            'residuos': 'Residuos (m³)',
+            'fgr_promedio': 'FGR Promedio (m³/m²)',
+            'fgr_total': 'FGR Total (m³/m²)',
+            'ultima_fecha': 'Último Registro'
+        }).round(3),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    if not cache.portafolio_listo():
+        # El cálculo corre en segundo plano; las demás sesiones recogen el mismo resultado
+        id_tarea = gestor.enviar(
+            "Portafolio", calcular_portafolio, cache, clave=('portafolio', cache.version)
+        )
+        if not gestor.tarea(id_tarea).terminada:
+            seguir_tarea(gestor, id_tarea, "Calculando indicadores del portafolio")
+            return
+    portafolio = cache.portafolio()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_distribucion = px.histogram(
+            con_registros,
+            x='fgr_total',
+            nbins=50,
+            title='Distribución del FGR Total por Proyecto',
+            labels={'fgr_total': 'FGR (m³/m²)'}
+        )
+        st.plotly_chart(fig_distribucion, use_container_width=True)
+    with col2:
+        fig_tipos = px.box(
+            portafolio.fgr_por_tipo(),
+            x='tipo',
+            y='fgr',
+            title='FGR por Tipo de Residuo',
+            labels={'tipo': 'Tipo de Residuo', 'fgr': 'FGR (m³/m²)'}
+        )
+        st.plotly_chart(fig_tipos, use_container_width=True)
 
-def guardar_datos(datos):
-    with open('proyectos.json', 'w') as f:
-        json.dump(datos, f)
+    # FGR mensual: mediana y rango intercuartil entre proyectos
+    por_mes = portafolio.fgr_por_mes()
+    fig_mes = go.Figure()
+    fig_mes.add_trace(go.Scatter(
+        x=por_mes.index, y=por_mes['75%'], mode='lines', line=dict(width=0),
+        showlegend=False, hoverinfo='skip'
+    ))
+    fig_mes.add_trace(go.Scatter(
+        x=por_mes.index, y=por_mes['25%'], mode='lines', line=dict(width=0),
+        fill='tonexty', name='Percentiles 25-75'
+    ))
+    fig_mes.add_trace(go.Scatter(x=por_mes.index, y=por_mes['50%'], mode='lines', name='Mediana'))
+    fig_mes.add_trace(go.Scatter(x=por_mes.index, y=por_mes['fgr_global'], mode='lines', name='FGR Global'))
+    fig_mes.update_layout(title='FGR Mensual del Portafolio', xaxis_title='Mes', yaxis_title='FGR (m³/m²)')
+    st.plotly_chart(fig_mes, use_container_width=True)
 
-# Inicializar el estado de la sesión
-if 'proyectos' not in st.session_state:
-    st.session_state.proyectos = cargar_datos()
+    st.subheader("Estadísticas por Tipo de Residuo")
+    st.dataframe(portafolio.estadisticas_por_tipo().round(4), use_container_width=True)
 
-def obtener_ultimo_avance(registros):
-    """Obtiene el último porcentaje de avance registrado"""
-    if not registros:
-        return 0.0
-    return max(registro["porcentaje_avance"] for registro in registros)
+    # Pronóstico al 100 % de avance, reajustado solo para los proyectos que cambiaron
+    ajuste = cache.pronostico()
+    anomalias = ajuste.anomalias().groupby('proyecto').size()
+    st.subheader("Pronóstico al 100% de Avance")
+    st.dataframe(
+        ajuste.proyectos.assign(
+            anomalias=ajuste.proyectos['proyecto'].map(anomalias).fillna(0).astype(int)
+        ).sort_values('fgr_final', ascending=False)[
+            ['proyecto', 'avance', 'residuos', 'volumen_final', 'fgr_final', 'anomalias']
+        ].rename(columns={
+            'proyecto': 'Proyecto',
+            'avance': 'Avance (%)',
+            'residuos': 'Residuos (m³)',
+            'volumen_final': 'Residuos Finales Estimados (m³)',
+            'fgr_final': 'FGR Final Estimado (m³/m²)',
+            'anomalias': 'Períodos Atípicos'
+        }).round(3),
+        use_container_width=True,
+        hide_index=True
+    )
 
-def calcular_area_periodo(area_total, porcentaje_actual, porcentaje_anterior):
-    """Calcula el área construida en el período actual"""
-    incremento = porcentaje_actual - porcentaje_anterior
-    return area_total * (incremento / 100)
+    # Reporte de un mes o trimestre, desde los acumulados por período
+    st.subheader("Reporte por Período")
+    col1, col2 = st.columns(2)
+    with col1:
+        frecuencia = periodos.FRECUENCIAS[
+            st.radio("Frecuencia", list(periodos.FRECUENCIAS), horizontal=True, key="frecuencia_reporte")
+        ]
+    claves = cache.claves_periodo(frecuencia)
+    with col2:
+        clave = st.selectbox("Período", claves[::-1], key=f"periodo_reporte_{frecuencia}")
+    por_proyecto, por_tipo = cache.reporte_periodo(frecuencia, clave)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Proyectos con Registros", f"{len(por_proyecto):,}")
+    with col2:
+        st.metric("Residuos del Período", f"{por_proyecto['residuos'].sum():,.1f} m³")
+    with col3:
+        area = por_proyecto['area'].sum()
+        st.metric("FGR del Período", f"{por_proyecto['residuos'].sum() / area if area > 0 else 0:.3f} m³/m²")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.dataframe(
+            por_proyecto.sort_values('fgr', ascending=False).rename(columns={
+                'proyecto': 'Proyecto',
+                'registros': 'Registros',
+                'area': 'Área Construida (m²)',
+                'residuos': 'Residuos (m³)',
+                'fgr': 'FGR (m³/m²)'
+            }).round(3),
+            use_container_width=True,
+            hide_index=True
+        )
+    with col2:
+        st.dataframe(
+            por_tipo.rename(columns={
+                'tipo': 'Tipo de Residuo', 'volumen': 'Residuos (m³)', 'fgr': 'FGR (m³/m²)'
+            }).round(3),
+            use_container_width=True,
+            hide_index=True
+        )
 
-def calcular_fgr(volumen_residuos, area_construida):
-    """Calcula el FGR (m³/m²)"""
-    if area_construida > 0:
-        return volumen_residuos / area_construida
-    return 0
+def mostrar_metricas():
+    """Panel de depuración con los tiempos de las últimas ejecuciones"""
+    import pandas as pd
+    with st.sidebar.expander("Métricas de rendimiento"):
+        ejecuciones = metricas.ejecuciones()
+        if not ejecuciones:
+            st.caption("Aún no hay ejecuciones medidas.")
+            return
+        ultima = ejecuciones[-1]
+        st.metric("Última ejecución", f"{ultima['total'] * 1000:,.1f} ms")
+        st.dataframe(
+            pd.DataFrame({
+                'Etapa': list(ultima['etapas']),
+                'ms': [segundos * 1000 for segundos in ultima['etapas'].values()],
+            }).round(1),
+            use_container_width=True,
+            hide_index=True
+        )
+        resumen = pd.DataFrame(metricas.resumen_etapas()).T
+        st.dataframe(
+            (resumen[['promedio', 'maximo']] * 1000).round(1)
+            .rename(columns={'promedio': 'Promedio (ms)', 'maximo': 'Máximo (ms)'})
+            .assign(Veces=resumen['cantidad'].astype(int)),
+            use_container_width=True
+        )
+        st.code(metricas.texto_prometheus(), language=None)
 
 def main():
     st.title("Seguimiento de Factor de Generación de Residuos (FGR)")
@@ -51,8 +284,20 @@ def main():
     - Los residuos se registran por período de avance
     """)
 
+    cache = obtener_cache()
+    gestor = obtener_tareas()
+    # Índice de proyectos, sin sus registros: alcanza para la barra lateral y el encabezado
+    indice, versiones = cache.indice()
+    if metricas.activas():
+        metricas.valor('proyectos', len(indice))
+        metricas.valor('registros', sum(p["registros"] for p in indice.values()))
+        metricas.valor('tipos_residuos', len({t for p in indice.values() for t in p["tipos_residuos"]}))
+
     # Sidebar para selección de proyecto
     st.sidebar.title("Gestión de Proyectos")
+    vista = st.sidebar.radio("Vista", ["Proyecto", "Portafolio"], horizontal=True)
+    if metricas.activas():
+        mostrar_metricas()
     
     # Formulario para nuevo proyecto
     st.sidebar.subheader("Crear Nuevo Proyecto")
@@ -96,57 +341,79 @@ def main():
     # Botón para crear proyecto
     if st.sidebar.button("Crear Proyecto", key="btn_crear_proyecto"):
         if nombre_proyecto and area_total > 0 and st.session_state.tipos_residuos_temp:
-            if nombre_proyecto not in st.session_state.proyectos:
-                st.session_state.proyectos[nombre_proyecto] = {
-                    "area_total": area_total,
-                    "tipos_residuos": st.session_state.tipos_residuos_temp.copy(),
-                    "registros": []
-                }
-                # Limpiar la lista temporal después de crear el proyecto
-                st.session_state.tipos_residuos_temp = []
-                guardar_datos(st.session_state.proyectos)
-                st.sidebar.success(f"¡Proyecto '{nombre_proyecto}' creado exitosamente!")
-                st.rerun()
+            if nombre_proyecto not in indice:
+                try:
+                    cache.crear_proyecto(
+                        nombre_proyecto, area_total, st.session_state.tipos_residuos_temp.copy()
+                    )
+                except ConflictoEscritura:
+                    # Otra sesión lo creó después de cargar esta página
+                    st.sidebar.error("Ya existe un proyecto con ese nombre")
+                else:
+                    # Limpiar la lista temporal después de crear el proyecto
+                    st.session_state.tipos_residuos_temp = []
+                    st.sidebar.success(f"¡Proyecto '{nombre_proyecto}' creado exitosamente!")
+                    st.rerun()
             else:
                 st.sidebar.error("Ya existe un proyecto con ese nombre")
         else:
             st.sidebar.error("Por favor, completa todos los campos y agrega al menos un tipo de residuo")
 
     # Selector de proyecto y opciones de gestión
-    if st.session_state.proyectos:
+    if indice:
         st.sidebar.subheader("Gestión de Proyectos")
         
+        orden = st.sidebar.selectbox("Ordenar proyectos por", list(ORDEN_PROYECTOS), key="orden_proyectos")
+        opciones = ordenar_proyectos(indice, orden)
+        # Al cambiar el orden se conserva el proyecto elegido
+        anterior = st.session_state.get('proyecto_seleccionado')
+        
         # Crear dos columnas en el sidebar para el selector y el botón de eliminar
         col1, col2 = st.sidebar.columns([3, 1])
         
         with col1:
             proyecto_actual = st.selectbox(
                 "Seleccionar Proyecto",
-                options=list(st.session_state.proyectos.keys())
+                options=opciones,
+                index=opciones.index(anterior) if anterior in opciones else 0
             )
+            st.session_state.proyecto_seleccionado = proyecto_actual
         
         with col2:
             if st.button("🗑️", key="btn_eliminar_proyecto", help="Eliminar proyecto"):
                 st.session_state.confirmar_eliminar_proyecto = True
         
+        # Versión del proyecto que el usuario vio en la ejecución anterior: las
+        # escrituras se rechazan si otro usuario lo modificó desde entonces
+        versiones_vistas = st.session_state.setdefault('versiones_vistas', {})
+        version_vista = versiones_vistas.get(proyecto_actual, versiones[proyecto_actual])
+        versiones_vistas[proyecto_actual] = versiones[proyecto_actual]
+        
         # Confirmación para eliminar proyecto
         if st.session_state.get('confirmar_eliminar_proyecto', False):
             st.sidebar.warning("⚠️ ¿Estás seguro de eliminar este proyecto? Esta acción no se puede deshacer.")
             col1, col2 = st.sidebar.columns(2)
             with col1:
                 if st.button("Sí, eliminar", key="confirmar_eliminar"):
-                    del st.session_state.proyectos[proyecto_actual]
-                    guardar_datos(st.session_state.proyectos)
                     st.session_state.confirmar_eliminar_proyecto = False
-                    st.rerun()
+                    try:
+                        cache.eliminar_proyecto(proyecto_actual, version_vista)
+                    except ConflictoEscritura as error:
+                        st.sidebar.error(f"{error}. Revisa el proyecto antes de eliminarlo.")
+                    else:
+                        st.rerun()
             with col2:
                 if st.button("Cancelar", key="cancelar_eliminar"):
                     st.session_state.confirmar_eliminar_proyecto = False
                     st.rerun()
         
+        if vista == "Portafolio":
+            mostrar_portafolio(cache, gestor, indice)
+            return
+        
         # Obtener último avance registrado
-        ultimo_avance = obtener_ultimo_avance(st.session_state.proyectos[proyecto_actual]["registros"])
-        area_total = st.session_state.proyectos[proyecto_actual]["area_total"]
+        ultimo_avance = indice[proyecto_actual]["avance"]
+        area_total = indice[proyecto_actual]["area_total"]
         
         # Mostrar información del proyecto
         st.subheader(f"Proyecto: {proyecto_actual}")
@@ -180,7 +447,7 @@ def main():
         
         # Registro de residuos
         st.subheader("Registro de Residuos")
-        tipos_residuos = st.session_state.proyectos[proyecto_actual]["tipos_residuos"]
+        tipos_residuos = indice[proyecto_actual]["tipos_residuos"]
         
         if "residuos_temp" not in st.session_state:
             st.session_state.residuos_temp = {}
@@ -237,188 +504,267 @@ def main():
             elif not st.session_state.residuos_temp:
                 st.error("Debe registrar al menos un tipo de residuo")
             else:
-                area_periodo = calcular_area_periodo(area_total, nuevo_porcentaje, ultimo_avance)
-                fgr_periodo = calcular_fgr(total_desglosado, area_periodo)
-                
-                nuevo_registro = {
-                    "fecha": fecha_registro.isoformat(),
-                    "porcentaje_avance": nuevo_porcentaje,
-                    "incremento_porcentaje": nuevo_porcentaje - ultimo_avance,
-                    "area_periodo": area_periodo,
-                    "residuos_periodo": total_desglosado,
-                    "tipos_residuos": dict(st.session_state.residuos_temp),
-                    "fgr_periodo": fgr_periodo
-                }
+                nuevo_registro = crear_registro(
+                    fecha_registro.isoformat(),
+                    nuevo_porcentaje,
+                    ultimo_avance,
+                    area_total,
+                    st.session_state.residuos_temp
+                )
                 
-                st.session_state.proyectos[proyecto_actual]["registros"].append(nuevo_registro)
-                st.session_state.proyectos[proyecto_actual]["registros"].sort(key=lambda x: x["fecha"])
-                st.session_state.residuos_temp = {}  # Limpiar residuos temporales
-                guardar_datos(st.session_state.proyectos)
-                st.success("¡Registro agregado exitosamente!")
+                try:
+                    cache.agregar_registro(proyecto_actual, nuevo_registro, version_vista)
+                except ConflictoEscritura as error:
+                    st.error(f"No se guardó el registro: {error}. Revisa el avance actual y vuelve a registrarlo.")
+                else:
+                    st.session_state.residuos_temp = {}  # Limpiar residuos temporales
+                    st.success("¡Registro agregado exitosamente!")
+                    st.rerun()
+
+        # Importación masiva de registros
+        with st.expander("Importar Registros desde CSV/Excel"):
+            st.write(
+                "El archivo debe tener las columnas `fecha` y `porcentaje_avance`, y una columna "
+                "por tipo de residuo con el volumen en m³. Si incluye la columna `proyecto`, "
+                "se pueden importar registros de varios proyectos a la vez."
+            )
+            if "tarea_importacion" in st.session_state:
+                tarea = gestor.tarea(st.session_state.tarea_importacion)
+                if tarea is not None and not tarea.terminada:
+                    seguir_tarea(gestor, tarea.id, "Importando registros")
+                else:
+                    del st.session_state.tarea_importacion
+                    if tarea is None or tarea.estado == tareas.CANCELADA:
+                        st.info("La importación se canceló; no se guardó ningún registro.")
+                    elif isinstance(tarea.error, ConflictoEscritura):
+                        st.error(f"No se importó ningún registro: {tarea.error}. Vuelve a importar el archivo.")
+                    elif isinstance(tarea.error, (ValueError, ImportError)):
+                        st.error(f"No se pudo leer el archivo: {tarea.error}")
+                    elif tarea.error is not None:
+                        st.error(f"La importación falló: {tarea.error}")
+                    else:
+                        st.session_state.resultado_importacion = tarea.resultado
+            if "resultado_importacion" in st.session_state:
+                resultado = st.session_state.pop("resultado_importacion")
+                st.success(
+                    f"{resultado.importadas:,} de {resultado.filas:,} filas importadas "
+                    f"({resultado.filas_por_segundo:,.0f} filas/s)"
+                )
+                if not resultado.errores.empty:
+                    st.error(f"{len(resultado.errores):,} filas con errores no se importaron:")
+                    st.dataframe(resultado.errores, use_container_width=True, hide_index=True)
+            archivo = st.file_uploader("Archivo de registros", type=["csv", "xlsx", "xls"])
+            if (archivo is not None and "tarea_importacion" not in st.session_state
+                    and st.button("Importar", key="btn_importar")):
+                st.session_state.tarea_importacion = gestor.enviar(
+                    "Importación", importar_archivo, cache, archivo.getvalue(), archivo.name,
+                    indice, versiones, proyecto_actual
+                )
                 st.rerun()
 
         # Visualización de datos
-        if st.session_state.proyectos[proyecto_actual]["registros"]:
-            st.subheader("Análisis de Datos")
-            
-            # Convertir registros a DataFrame asegurando que todas las columnas existan
-            registros = st.session_state.proyectos[proyecto_actual]["registros"]
-            
-            # Asegurar que todos los registros tengan los campos necesarios
-            for registro in registros:
-                if "area_periodo" not in registro:
-                    registro["area_periodo"] = calcular_area_periodo(
-                        area_total,
-                        registro["porcentaje_avance"],
-                        registro.get("porcentaje_avance", 0) - registro.get("incremento_porcentaje", 0)
-                    )
-            
-            # Crear DataFrame con columnas explícitas
-            df = pd.DataFrame(registros)
-            required_columns = [
-                'fecha', 'porcentaje_avance', 'incremento_porcentaje',
-                'area_periodo', 'residuos_periodo', 'fgr_periodo'
-            ]
-            
-            # Inicializar columnas faltantes con 0
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = 0.0
-            
-            df['fecha'] = pd.to_datetime(df['fecha'])
-            
-            # Calcular acumulados solo si hay datos
-            if not df.empty:
-                df['area_acumulada'] = df['area_periodo'].cumsum()
-                df['residuos_acumulados'] = df['residuos_periodo'].cumsum()
-                df['fgr_acumulado'] = df['residuos_acumulados'] / df['area_acumulada'].replace(0, np.inf)
-            
-            # Gráficos
-            col1, col2 = st.columns(2)
+        resumen = indice[proyecto_actual]
+        if resumen["registros"]:
+            # Estadísticas desde el resumen guardado del proyecto, sin leer sus registros
+            st.subheader("Estadísticas del Proyecto")
+            col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                # Gráfico de FGR por período y acumulado
-                fig_fgr = go.Figure()
-                fig_fgr.add_trace(go.Scatter(
-                    x=df['fecha'],
-                    y=df['fgr_periodo'],
-                    mode='lines+markers',
-                    name='FGR por Período'
-                ))
-                fig_fgr.add_trace(go.Scatter(
-                    x=df['fecha'],
-                    y=df['fgr_acumulado'],
-                    mode='lines+markers',
-                    name='FGR Acumulado'
-                ))
-                fig_fgr.update_layout(
-                    title='FGR por Período y Acumulado',
-                    xaxis_title='Fecha',
-                    yaxis_title='FGR (m³/m²)'
-                )
-                st.plotly_chart(fig_fgr, use_container_width=True)
-            
+                st.metric("Avance Total", f"{resumen['avance']:.1f}%")
             with col2:
-                # Gráfico de avance y área construida
-                fig_avance = go.Figure()
+                st.metric("Área Total Construida", f"{resumen['area_construida']:,.1f} m²")
+            with col3:
+                st.metric("FGR Promedio", f"{resumen['fgr_promedio']:.3f} m³/m²")
+            with col4:
+                st.metric("FGR Total", f"{resumen['fgr_total']:.3f} m³/m²")
+            st.caption(f"{resumen['registros']:,} registros; último el {resumen['ultima_fecha']}")
+            
+            # El DataFrame y los gráficos se construyen solo al abrir el análisis detallado
+            if st.toggle("Ver análisis detallado", key="analisis_detallado",
+                         help="Gráficos, resumen por período, pronóstico y tabla de registros"):
+                import pandas as pd
+                from fgr import exportacion, graficos, periodos, pronostico
+                st.subheader("Análisis de Datos")
+                
+                # DataFrame con acumulados, memorizado por versión del proyecto
+                df = cache.analisis(proyecto_actual).dataframe()
                 
-                # Barra para área construida (eje izquierdo)
-                fig_avance.add_trace(go.Bar(
-                    x=df['fecha'],
-                    y=df['area_periodo'],
-                    name='Área Construida por Período (m²)',
-                    yaxis='y'
-                ))
+                # Gráficos: solo se construye el seleccionado, memorizado por versión del proyecto
+                analisis = cache.analisis(proyecto_actual)
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    grafico = st.radio("Gráfico", graficos.GRAFICOS, horizontal=True, key="grafico_proyecto")
+                with col2:
+                    resolucion = st.selectbox(
+                        "Resolución", list(graficos.RESOLUCIONES), key="resolucion_grafico",
+                        help="Automática reduce las series de más de "
+                             f"{graficos.MAX_PUNTOS:,} registros; amplía un período para ver todos los puntos"
+                    )
                 
-                # Línea para porcentaje de avance (eje derecho)
-                fig_avance.add_trace(go.Scatter(
-                    x=df['fecha'],
-                    y=df['porcentaje_avance'],
-                    mode='lines+markers',
-                    name='Avance (%)',
-                    yaxis='y2'
-                ))
+                rango = None
+                inicio, fin = df['fecha'].iloc[0].date(), df['fecha'].iloc[-1].date()
+                if len(df) > graficos.MAX_PUNTOS and inicio < fin:
+                    rango = st.slider(
+                        "Ampliar período", min_value=inicio, max_value=fin, value=(inicio, fin),
+                        key=f"rango_grafico_{proyecto_actual}_{versiones[proyecto_actual]}"
+                    )
+                    if rango == (inicio, fin):
+                        rango = None
                 
-                # Configuración del layout con dos ejes Y
-                fig_avance.update_layout(
-                    title='Avance y Área Construida',
-                    xaxis_title='Fecha',
-                    yaxis=dict(
-                        title='Área Construida por Período (m²)',
-                        side='left'
-                    ),
-                    yaxis2=dict(
-                        title='Avance (%)',
-                        side='right',
-                        overlaying='y',
-                        range=[0, 100]  # Fija el rango del eje derecho de 0 a 100%
+                with metricas.etapa(f'grafico:{grafico}'):
+                    figura = analisis.memorizar(
+                        ('grafico', grafico, resolucion, rango),
+                        lambda: graficos.construir(grafico, analisis, resolucion, rango)
                     )
+                    if figura is not None:
+                        st.plotly_chart(figura, use_container_width=True)
+                
+                # Filtro por fechas, resuelto con los acumulados por período; la clave
+                # lleva la versión para que el rango se amplíe con los registros nuevos
+                st.subheader("Resumen por Período")
+                col1, col2 = st.columns([1, 2])
+                with col1:
+                    frecuencia = periodos.FRECUENCIAS[
+                        st.radio("Frecuencia", list(periodos.FRECUENCIAS), horizontal=True, key="frecuencia_proyecto")
+                    ]
+                with col2:
+                    fechas = st.date_input(
+                        "Rango de fechas", value=(inicio, fin), min_value=inicio, max_value=fin,
+                        key=f"rango_resumen_{proyecto_actual}_{versiones[proyecto_actual]}"
+                    )
+                if len(fechas) == 2:
+                    desde, hasta = fechas
+                elif fechas:
+                    # Con una sola fecha elegida, el rango llega hasta el final
+                    desde, hasta = fechas[0], fin
+                else:
+                    # Con el rango borrado se muestra todo el proyecto
+                    desde, hasta = inicio, fin
+                desde, hasta = desde.isoformat(), hasta.isoformat()
+                rango_datos = analisis.resumen_rango(desde, hasta)
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Registros en el Rango", f"{rango_datos['registros']:,}")
+                with col2:
+                    st.metric("Área Construida en el Rango", f"{rango_datos['area']:,.1f} m²")
+                with col3:
+                    st.metric("Residuos en el Rango", f"{rango_datos['residuos']:,.1f} m³")
+                with col4:
+                    st.metric("FGR del Rango", f"{rango_datos['fgr']:.3f} m³/m²")
+                por_periodo = analisis.acumulados(frecuencia).dataframe(
+                    periodos.clave(desde, frecuencia), periodos.clave(hasta, frecuencia)
                 )
-                st.plotly_chart(fig_avance, use_container_width=True)
-            
-            # Gráfico de residuos por tipo
-            residuos_por_tipo = pd.DataFrame()
-            for registro in st.session_state.proyectos[proyecto_actual]["registros"]:
-                for tipo, volumen in registro['tipos_residuos'].items():
-                    if tipo not in residuos_por_tipo.columns:
-                        residuos_por_tipo[tipo] = 0
-                    residuos_por_tipo.loc[registro['fecha'], tipo] = volumen
-            
-            if not residuos_por_tipo.empty:
-                fig_residuos = px.bar(
-                    residuos_por_tipo,
-                    title='Residuos por Tipo',
-                    labels={'value': 'Volumen (m³)', 'index': 'Fecha'}
+                st.dataframe(
+                    por_periodo.rename(columns={
+                        'periodo': 'Período',
+                        'registros': 'Registros',
+                        'area': 'Área Construida (m²)',
+                        'residuos': 'Residuos (m³)',
+                        'fgr': 'FGR (m³/m²)'
+                    }).round(3),
+                    use_container_width=True,
+                    hide_index=True
                 )
-                st.plotly_chart(fig_residuos, use_container_width=True)
-            
-            # Estadísticas
-            st.subheader("Estadísticas del Proyecto")
-            col1, col2, col3, col4 = st.columns(4)
+                
+                # Pronóstico al 100 % de avance, memorizado por versión del proyecto
+                st.subheader("Pronóstico al 100% de Avance")
+                ajuste = analisis.memorizar(
+                    ('pronostico',), lambda: pronostico.ajustar_proyecto(proyecto_actual, analisis)
+                )
+                estimado = ajuste.proyectos.iloc[0]
+                anomalias = ajuste.anomalias()
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Residuos Finales Estimados", f"{estimado['volumen_final']:,.1f} m³")
+                with col2:
+                    st.metric("FGR Final Estimado", f"{estimado['fgr_final']:.3f} m³/m²")
+                with col3:
+                    st.metric("Períodos Atípicos", f"{len(anomalias):,}")
+                if not anomalias.empty:
+                    st.warning(
+                        "Estos períodos tienen un FGR muy distinto del esperado según la tendencia "
+                        f"del proyecto ({estimado['fgr_tendencia']:.3f} m³/m²):"
+                    )
+                    st.dataframe(
+                        pd.DataFrame({
+                            'Fecha': pd.to_datetime(anomalias['fecha']).dt.strftime('%Y-%m-%d'),
+                            'FGR del Período (m³/m²)': anomalias['fgr_periodo'].round(3),
+                            'Desviación (z)': anomalias['z'].round(1),
+                        }),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                with st.expander("Pronóstico por tipo de residuo"):
+                    st.dataframe(
+                        ajuste.tipos[['tipo', 'volumen', 'volumen_final', 'fgr_final']].rename(columns={
+                            'tipo': 'Tipo de Residuo',
+                            'volumen': 'Residuos (m³)',
+                            'volumen_final': 'Residuos Finales Estimados (m³)',
+                            'fgr_final': 'FGR Final Estimado (m³/m²)'
+                        }).round(3),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                
+                # Tabla de registros
+                st.subheader("Registros del Proyecto")
+                
+                # Preparar DataFrame para visualización
+                with metricas.etapa('tabla'):
+                    df_display = exportacion.tabla_registros(df)
+                    st.dataframe(df_display, use_container_width=True)
             
+            # Exportación de datos; fgr.exportacion (y pandas) se importa al generar el archivo
+            from fgr import formatos
+            st.subheader("Exportar Datos")
+            col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric(
-                    "Avance Total",
-                    f"{df['porcentaje_avance'].iloc[-1]:.1f}%"
-                )
+                alcance = st.radio("Proyectos", ["Proyecto actual", "Todos los proyectos"], key="alcance_exportacion")
             with col2:
-                st.metric(
-                    "Área Total Construida",
-                    f"{df['area_acumulada'].iloc[-1]:,.1f} m²"
+                formato = st.selectbox(
+                    "Formato",
+                    options=formatos.formatos_disponibles(),
+                    format_func=lambda f: {'csv': 'CSV', 'parquet': 'Parquet', 'excel': 'Excel'}[f],
+                    key="formato_exportacion"
                 )
             with col3:
-                st.metric(
-                    "FGR Promedio",
-                    f"{df['fgr_periodo'].mean():.3f} m³/m²"
-                )
-            with col4:
-                st.metric(
-                    "FGR Total",
-                    f"{df['fgr_acumulado'].iloc[-1]:.3f} m³/m²"
-                )
-            
-            # Tabla de registros
-            st.subheader("Registros del Proyecto")
-            
-            # Preparar DataFrame para visualización
-            df_display = pd.DataFrame({
-                'Fecha': df['fecha'].dt.strftime('%Y-%m-%d'),
-                'Avance (%)': df['porcentaje_avance'],
-                'Incremento (%)': df['incremento_porcentaje'],
-                'Área del Período (m²)': df['area_periodo'].round(2),
-                'Área Acumulada (m²)': df['area_acumulada'].round(2),
-                'Residuos del Período (m³)': df['residuos_periodo'].round(2),
-                'Residuos Acumulados (m³)': df['residuos_acumulados'].round(2),
-                'FGR del Período (m³/m²)': df['fgr_periodo'].round(3),
-                'FGR Acumulado (m³/m²)': df['fgr_acumulado'].round(3)
-            })
-            
-            st.dataframe(df_display, use_container_width=True)
-            
-            # Botón para exportar datos
-            if st.button("Exportar Datos a CSV"):
-                df_display.to_csv(f"{proyecto_actual}_registros.csv", index=False)
-                st.success("Datos exportados exitosamente!")
+                if st.button("Generar Archivo", key="btn_exportar"):
+                    from fgr import exportacion
+                    extension, mime, _ = formatos.FORMATOS[formato]
+                    # Otra sesión que pida la misma exportación recoge el mismo archivo
+                    if alcance == "Proyecto actual":
+                        nombre_archivo = f"{proyecto_actual}_registros"
+                        id_tarea = gestor.enviar(
+                            "Exportación", exportacion.exportar_en_tarea,
+                            [(proyecto_actual, cache.proyecto(proyecto_actual))], formato,
+                            con_proyecto=False,
+                            clave=('exportar', proyecto_actual, versiones[proyecto_actual], formato)
+                        )
+                    else:
+                        # Los registros de los demás proyectos se leen dentro de la tarea
+                        nombre_archivo = "portafolio_registros"
+                        id_tarea = gestor.enviar(
+                            "Exportación", exportar_portafolio, cache, formato,
+                            clave=('exportar', None, cache.version, formato)
+                        )
+                    st.session_state.exportacion = (f"{nombre_archivo}.{extension}", id_tarea, mime)
+                if "exportacion" in st.session_state:
+                    nombre_archivo, id_tarea, mime = st.session_state.exportacion
+                    tarea = gestor.tarea(id_tarea)
+                    if tarea is None or tarea.estado == tareas.CANCELADA:
+                        del st.session_state.exportacion
+                    elif not tarea.terminada:
+                        seguir_tarea(gestor, id_tarea, "Generando archivo")
+                    elif tarea.error is not None:
+                        st.error(f"No se pudo generar el archivo: {tarea.error}")
+                    else:
+                        st.download_button(
+                            f"Descargar {nombre_archivo}",
+                            data=tarea.resultado,
+                            file_name=nombre_archivo,
+                            mime=mime,
+                            key="btn_descargar"
+                        )
             
             # Botón para limpiar registros
             st.subheader("Limpiar Registros")
@@ -427,7 +773,7 @@ def main():
             col1, col2 = st.columns([1, 3])
             with col1:
                 if st.button("Limpiar Registros", key="btn_limpiar"):
-                    if st.session_state.proyectos[proyecto_actual]["registros"]:
+                    if indice[proyecto_actual]["registros"]:
                         st.session_state.confirmar_limpieza = True
                     else:
                         st.info("No hay registros para limpiar.")
@@ -436,11 +782,14 @@ def main():
                 with col2:
                     st.error("¿Estás seguro? Esta acción no se puede deshacer.")
                     if st.button("Sí, eliminar todos los registros", key="btn_confirmar"):
-                        st.session_state.proyectos[proyecto_actual]["registros"] = []
-                        guardar_datos(st.session_state.proyectos)
                         st.session_state.confirmar_limpieza = False
-                        st.success("¡Todos los registros han sido eliminados!")
-                        st.rerun()
+                        try:
+                            cache.limpiar_registros(proyecto_actual, version_vista)
+                        except ConflictoEscritura as error:
+                            st.error(f"{error}. Revisa los registros nuevos antes de limpiarlos.")
+                        else:
+                            st.success("¡Todos los registros han sido eliminados!")
+                            st.rerun()
                     if st.button("Cancelar", key="btn_cancelar"):
                         st.session_state.confirmar_limpieza = False
                         st.rerun()
@@ -448,4 +797,6 @@ def main():
         st.info("Crea un nuevo proyecto usando el formulario en la barra lateral.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    metricas.iniciar()
+    with metricas.ejecucion():
+        main() 
\ No newline at end of file
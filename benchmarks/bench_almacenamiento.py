@@ -0,0 +1,86 @@
+"""Compara la latencia de escritura de un registro: JSON completo vs SQLite.
+
+Uso:
+    python -m benchmarks.bench_almacenamiento --registros 10000 1000000
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from fgr import almacenamiento
+from fgr.sintetico import generar_proyectos
+
+REGISTROS_POR_PROYECTO = 100
+
+
+def generar_datos(n_registros):
+    """Genera proyectos con el formato de proyectos.json"""
+    return generar_proyectos(max(1, n_registros // REGISTROS_POR_PROYECTO), REGISTROS_POR_PROYECTO)
+
+
+def nuevo_registro(i):
+    return {
+        "fecha": "2030-01-01",
+        "porcentaje_avance": 101.0 + i,
+        "incremento_porcentaje": 1.0,
+        "area_periodo": 100.0,
+        "residuos_periodo": 5.0,
+        "tipos_residuos": {"Escombro": 5.0},
+        "fgr_periodo": 0.05
+    }
+
+
+def medir_json(datos, directorio, repeticiones):
+    """Escritura original: agregar el registro y reescribir todo el archivo"""
+    ruta = os.path.join(directorio, 'proyectos.json')
+    proyecto = next(iter(datos))
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        datos[proyecto]["registros"].append(nuevo_registro(i))
+        with open(ruta, 'w') as f:
+            json.dump(datos, f)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def medir_sqlite(datos, directorio, repeticiones):
+    """Escritura nueva: insertar solo el registro en una transacción"""
+    ruta = os.path.join(directorio, 'proyectos.db')
+    almacenamiento.guardar_datos(datos, ruta)
+    proyecto = next(iter(datos))
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        almacenamiento.agregar_registro(proyecto, nuevo_registro(i), ruta)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def resumir(tiempos):
+    return f"mediana {statistics.median(tiempos) * 1000:9.2f} ms  máx {max(tiempos) * 1000:9.2f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for n in args.registros:
+        datos = generar_datos(n)
+        with tempfile.TemporaryDirectory() as directorio:
+            t_json = medir_json(datos, directorio, args.repeticiones)
+        datos = generar_datos(n)
+        with tempfile.TemporaryDirectory() as directorio:
+            t_sqlite = medir_sqlite(datos, directorio, args.repeticiones)
+        print(f"{n:>9,} registros")
+        print(f"  JSON completo: {resumir(t_json)}")
+        print(f"  SQLite:        {resumir(t_sqlite)}")
+
+
+if __name__ == "__main__":
+    main()
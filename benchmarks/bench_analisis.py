@@ -0,0 +1,58 @@
+"""Mide el análisis incremental frente al cálculo original con cumsum.
+
+La equivalencia exacta con el cálculo original se comprueba en
+tests/test_analisis.py.
+
+Uso:
+    python -m benchmarks.bench_analisis --registros 1000 10000
+"""
+import argparse
+import time
+
+from fgr.analisis import AnalisisProyecto
+from fgr.sintetico import dataframe_original, generar_registros, residuos_por_tipo_original
+
+def medir(n, area_total=10000.0):
+    registros = sorted(generar_registros(n, area_total), key=lambda x: x["fecha"])
+    inicio = time.perf_counter()
+    dataframe_original(registros, area_total)
+    t_original = time.perf_counter() - inicio
+
+    analisis = AnalisisProyecto(area_total, registros)
+    analisis.dataframe()
+    inicio = time.perf_counter()
+    analisis.dataframe()
+    t_memorizado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    residuos_por_tipo_original(registros)
+    t_tipos_original = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    analisis.residuos_por_tipo()
+    t_tipos = time.perf_counter() - inicio
+
+    nuevo = dict(registros[-1], fecha="2100-01-01")
+    inicio = time.perf_counter()
+    analisis.agregar(nuevo)
+    t_agregar = time.perf_counter() - inicio
+    return t_original, t_memorizado, t_agregar, t_tipos_original, t_tipos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, nargs='+', default=[1_000, 10_000])
+    args = parser.parse_args(argv)
+
+    for n in args.registros:
+        t_original, t_memorizado, t_agregar, t_tipos_original, t_tipos = medir(n)
+        print(f"{n:>9,} registros")
+        print(f"  DataFrame + cumsum por rerun: {t_original * 1000:9.3f} ms")
+        print(f"  Rerun sin cambios:            {t_memorizado * 1000:9.3f} ms")
+        print(f"  Agregar registro:             {t_agregar * 1000:9.3f} ms")
+        print(f"  Residuos por tipo (bucle):    {t_tipos_original * 1000:9.3f} ms")
+        print(f"  Residuos por tipo (vector):   {t_tipos * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
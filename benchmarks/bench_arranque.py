@@ -0,0 +1,99 @@
+"""Mide el tiempo hasta la primera pintura de una sesión nueva.
+
+Cada medición ejecuta la aplicación una vez en un proceso nuevo, como la
+primera sesión de un servidor recién iniciado: Streamlit ya está importado,
+pero la aplicación, sus módulos y la caché de proyectos no. La primera pintura
+es el momento en que se envía al navegador el selector de proyecto de la barra
+lateral; también se mide la página completa y se informa qué módulos pesados
+ya estaban importados en la primera pintura.
+
+Con --raiz se mide otra copia del repositorio, por ejemplo una versión
+anterior extraída con ``git worktree add /tmp/base <commit>``.
+
+Uso:
+    python -m benchmarks.bench_arranque --proyectos 2000 --registros 100
+    python -m benchmarks.bench_arranque --raiz /tmp/base
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS = ['pandas', 'plotly.express', 'fgr.analisis', 'fgr.exportacion']
+
+
+def sesion(raiz):
+    """Primera ejecución de la aplicación en este proceso; imprime los tiempos en JSON"""
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, raiz)
+    medidas = {}
+    encolar = ForwardMsgQueue.enqueue
+
+    def registrar(cola, mensaje):
+        if ('primera_pintura' not in medidas and mensaje.WhichOneof('type') == 'delta'
+                and mensaje.delta.new_element.selectbox.label == "Seleccionar Proyecto"):
+            medidas['primera_pintura'] = time.perf_counter() - inicio
+            medidas['modulos'] = [m for m in MODULOS if m in sys.modules]
+        encolar(cola, mensaje)
+
+    ForwardMsgQueue.enqueue = registrar
+    app = AppTest.from_file(os.path.join(raiz, 'app.py'), default_timeout=600)
+    inicio = time.perf_counter()
+    app.run()
+    medidas['pagina_completa'] = time.perf_counter() - inicio
+    if app.exception:
+        raise SystemExit(f"La aplicación falló: {app.exception[0].message}")
+    print(json.dumps(medidas))
+
+
+def medir(raiz, directorio):
+    """Tiempos de una sesión en un proceso nuevo, con la base de ``directorio``"""
+    salida = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_arranque', '--sesion', raiz],
+        cwd=directorio, env=dict(os.environ, PYTHONPATH=RAIZ),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=2_000)
+    parser.add_argument('--registros', type=int, default=100, help="registros por proyecto")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--raiz', default=RAIZ, help="copia del repositorio a medir")
+    parser.add_argument('--sesion', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.sesion:
+        sesion(args.sesion)
+        return
+
+    # Se importan aquí para que el proceso de cada sesión cargue los módulos de --raiz
+    from fgr import almacenamiento
+    from fgr.sintetico import generar_proyectos
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacenamiento.guardar_datos(
+            generar_proyectos(args.proyectos, args.registros),
+            os.path.join(directorio, almacenamiento.RUTA_BD)
+        )
+        medidas = [medir(os.path.abspath(args.raiz), directorio) for _ in range(args.repeticiones)]
+
+    print(f"{args.proyectos:,} proyectos, {args.proyectos * args.registros:,} registros "
+          f"({os.path.abspath(args.raiz)})")
+    for clave, texto in [('primera_pintura', "Primera pintura"), ('pagina_completa', "Página completa")]:
+        tiempos = [m[clave] for m in medidas]
+        print(f"  {texto + ':':<17} {statistics.median(tiempos) * 1000:8.0f} ms  "
+              f"(mín. {min(tiempos) * 1000:.0f} ms)")
+    print(f"  Importados en la primera pintura: {', '.join(medidas[0]['modulos']) or 'ninguno'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Mide el costo por rerun de los gráficos de un proyecto con registros diarios.
+
+Compara la versión original (las tres figuras completas en cada rerun) con la
+actual (solo el gráfico seleccionado, reducido y memorizado por versión). El
+tamaño es el del JSON de las figuras que se envía al navegador.
+
+Uso:
+    python -m benchmarks.bench_graficos --registros 1825 7300
+"""
+import argparse
+import time
+
+from fgr import graficos
+from fgr.analisis import AnalisisProyecto
+from fgr.sintetico import proyecto_diario
+
+
+def rerun_original(analisis):
+    """Las tres figuras con todos los puntos, como en cada rerun original"""
+    return [
+        graficos.construir(grafico, analisis, 'Completa').to_json()
+        for grafico in graficos.GRAFICOS
+    ]
+
+
+def rerun_actual(analisis, grafico='FGR', resolucion='Automática'):
+    figura = analisis.memorizar(
+        ('grafico', grafico, resolucion, None),
+        lambda: graficos.construir(grafico, analisis, resolucion)
+    )
+    return [figura.to_json()]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), sum(len(json) for json in resultado)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, nargs='+', default=[1825, 7300])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for n in args.registros:
+        proyecto = proyecto_diario(n)
+        analisis = AnalisisProyecto(proyecto["area_total"], proyecto["registros"])
+        print(f"{n:>9,} registros diarios")
+        t, tamano = medir(lambda: rerun_original(analisis), args.repeticiones)
+        print(f"  Original (3 figuras completas):   {t * 1000:8.1f} ms  {tamano / 1e3:9.1f} kB")
+        inicio = time.perf_counter()
+        rerun_actual(analisis)
+        print(f"  Actual, primera vez:              {(time.perf_counter() - inicio) * 1000:8.1f} ms")
+        t, tamano = medir(lambda: rerun_actual(analisis), args.repeticiones)
+        print(f"  Actual, rerun (memorizado):       {t * 1000:8.1f} ms  {tamano / 1e3:9.1f} kB")
+        for resolucion in ['Semanal', 'Mensual']:
+            t, tamano = medir(lambda: rerun_actual(analisis, resolucion=resolucion), args.repeticiones)
+            etiqueta = f"Actual, {resolucion.lower()} (memorizado):"
+            print(f"  {etiqueta:<33} {t * 1000:8.1f} ms  {tamano / 1e3:9.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
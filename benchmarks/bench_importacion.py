@@ -0,0 +1,43 @@
+"""Mide la velocidad de la importación masiva en filas por segundo.
+
+Uso:
+    python -m benchmarks.bench_importacion --proyectos 1000 --registros 100
+"""
+import argparse
+import io
+
+import pandas as pd
+
+from fgr.importacion import importar
+from fgr.sintetico import generar_proyectos
+
+
+def archivo_csv(proyectos):
+    """Convierte los registros de los proyectos en un CSV con una columna por tipo"""
+    filas = [
+        dict(proyecto=nombre, fecha=r["fecha"], porcentaje_avance=r["porcentaje_avance"],
+             **r["tipos_residuos"])
+        for nombre, proyecto in proyectos.items() for r in proyecto["registros"]
+    ]
+    return pd.DataFrame(filas).to_csv(index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=1_000)
+    parser.add_argument('--registros', type=int, default=100, help="registros por proyecto")
+    parser.add_argument('--bloque', type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    completos = generar_proyectos(args.proyectos, args.registros)
+    contenido = archivo_csv(completos)
+    # Se importa sobre los mismos proyectos sin registros
+    vacios = {nombre: dict(p, registros=[]) for nombre, p in completos.items()}
+    resultado = importar(io.StringIO(contenido), vacios, tamano_bloque=args.bloque)
+    print(f"{resultado.filas:,} filas en {resultado.segundos:.2f} s: "
+          f"{resultado.filas_por_segundo:,.0f} filas/s "
+          f"({resultado.importadas:,} válidas, {len(resultado.errores):,} con errores)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Mide el costo de las métricas de rendimiento desactivadas y activadas.
+
+Compara una etapa vacía y un rerun típico de la vista de proyecto (análisis,
+DataFrame, residuos por tipo, gráfico y tabla) con y sin métricas.
+
+Uso:
+    python -m benchmarks.bench_metricas --registros 1000
+"""
+import argparse
+import time
+
+from fgr import exportacion, graficos, metricas
+from fgr.analisis import AnalisisProyecto
+from fgr.sintetico import generar_proyectos
+
+
+def por_llamada(funcion, repeticiones):
+    """Segundos promedio por llamada"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def comparar(funcion, repeticiones, rondas=5):
+    """Mejor promedio sin y con métricas, alternando ambos modos en cada ronda"""
+    mejor = {False: float('inf'), True: float('inf')}
+    for _ in range(rondas):
+        for activas in mejor:
+            metricas.activar(activas)
+            mejor[activas] = min(mejor[activas], por_llamada(funcion, repeticiones))
+    metricas.activar(False)
+    return mejor[False], mejor[True]
+
+
+def etapa_vacia():
+    with metricas.etapa('vacia'):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, default=1_000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    proyecto = next(iter(generar_proyectos(1, args.registros).values()))
+
+    def rerun():
+        with metricas.ejecucion():
+            with metricas.etapa('relleno'):
+                analisis = AnalisisProyecto(proyecto["area_total"], proyecto["registros"])
+            df = analisis.dataframe()
+            analisis.residuos_por_tipo()
+            with metricas.etapa('grafico:FGR'):
+                graficos.construir('FGR', analisis, 'Automática')
+            with metricas.etapa('tabla'):
+                exportacion.tabla_registros(df)
+
+    # La primera figura importa los módulos de plotly
+    rerun()
+    etapa_off, etapa_on = comparar(etapa_vacia, 100_000)
+    rerun_off, rerun_on = comparar(rerun, args.repeticiones)
+
+    print(f"Etapa vacía:  desactivadas {etapa_off * 1e9:7.0f} ns   activadas {etapa_on * 1e9:7.0f} ns")
+    print(f"Rerun ({args.registros:,} registros): desactivadas {rerun_off * 1000:7.2f} ms   "
+          f"activadas {rerun_on * 1000:7.2f} ms ({rerun_on / rerun_off - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
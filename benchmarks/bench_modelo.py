@@ -0,0 +1,65 @@
+"""Compara la memoria de los registros: diccionarios y columnas.
+
+Cada representación se construye a partir del mismo proyectos.json y se mide
+la memoria que queda asignada con tracemalloc, una vez descartados los datos
+intermedios. Que las columnas vuelven al JSON original se comprueba en
+tests/test_modelo.py.
+
+Uso:
+    python -m benchmarks.bench_modelo --registros 1000000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from fgr.modelo import ColumnasProyecto
+from fgr.sintetico import generar_proyectos
+
+REGISTROS_POR_PROYECTO = 100
+
+
+def como_diccionarios(texto):
+    return json.loads(texto)
+
+
+def como_columnas(texto):
+    return {
+        nombre: ColumnasProyecto.desde_proyecto(proyecto)
+        for nombre, proyecto in json.loads(texto).items()
+    }
+
+
+def medir(construir, texto):
+    """Memoria retenida por el resultado (MB) y segundos de construcción"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = construir(texto)
+    segundos = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, memoria / 1e6, segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, nargs='+', default=[1_000_000])
+    args = parser.parse_args(argv)
+
+    for n in args.registros:
+        datos = generar_proyectos(max(1, n // REGISTROS_POR_PROYECTO), REGISTROS_POR_PROYECTO)
+        texto = json.dumps(datos)
+        print(f"{n:>9,} registros")
+        base = None
+        for etiqueta, construir in [
+            ("Diccionarios", como_diccionarios),
+            ("Columnas", como_columnas),
+        ]:
+            resultado, memoria, segundos = medir(construir, texto)
+            base = base or memoria
+            print(f"  {etiqueta:<13} {memoria:9.1f} MB  ({memoria / base:5.1%})  {segundos:6.2f} s")
+            del resultado
+
+
+if __name__ == "__main__":
+    main()
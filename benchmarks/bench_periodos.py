@@ -0,0 +1,81 @@
+"""Mide consultas por rango de fechas y reportes de un período.
+
+Compara los acumulados por período con recorrer los registros: el resumen de
+un rango de fechas de un proyecto con registros diarios y el FGR de un
+trimestre en todos los proyectos. Que ambos coinciden se comprueba en
+tests/test_periodos.py.
+
+Uso:
+    python -m benchmarks.bench_periodos --registros 7300 --proyectos 5000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from fgr import periodos
+from fgr.analisis import AnalisisProyecto
+from fgr.modelo import columnas_de
+from fgr.portafolio import Portafolio
+from fgr.sintetico import generar_proyectos, proyecto_diario
+
+
+def tiempo(funcion, repeticiones=20):
+    """Segundos promedio por llamada"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, default=7_300, help="registros diarios del proyecto")
+    parser.add_argument('--proyectos', type=int, default=5_000)
+    parser.add_argument('--registros-portafolio', type=int, default=100, help="registros por proyecto")
+    args = parser.parse_args(argv)
+
+    proyecto = proyecto_diario(args.registros)
+    analisis = AnalisisProyecto(proyecto["area_total"], proyecto["registros"])
+    df = analisis.dataframe()
+    fechas = analisis._columnas['fecha']
+    desde, hasta = fechas[len(fechas) // 4][:8] + '15', fechas[3 * len(fechas) // 4][:8] + '10'
+
+    def recorrido():
+        filas = df[(df['fecha'] >= desde) & (df['fecha'] <= hasta)]
+        tipos = {}
+        for volumenes in filas['tipos_residuos']:
+            for tipo, volumen in volumenes.items():
+                tipos[tipo] = tipos.get(tipo, 0.0) + volumen
+        return filas['area_periodo'].sum(), filas['residuos_periodo'].sum(), tipos
+
+    t_recorrido, _ = tiempo(recorrido)
+    t_rango, _ = tiempo(lambda: analisis.resumen_rango(desde, hasta), 1_000)
+
+    datos = generar_proyectos(args.proyectos, args.registros_portafolio)
+    portafolio = Portafolio(columnas_de(datos))
+    inicio = time.perf_counter()
+    acumulados = periodos.desde_portafolio(portafolio, 'Q')
+    t_construir = time.perf_counter() - inicio
+    clave = max(c for a in acumulados.values() for c in a.claves)
+
+    def agrupado():
+        registros = portafolio.registros
+        fechas = registros['fecha'].to_numpy().astype('datetime64[M]').astype(str)
+        trimestre = np.array([periodos.clave(f, 'Q') for f in fechas], dtype=object)
+        filas = registros[trimestre == clave]
+        return filas.groupby('proyecto', observed=True)[['area_periodo', 'residuos_periodo']].sum()
+
+    t_agrupado, _ = tiempo(agrupado, 3)
+    t_reporte, _ = tiempo(lambda: periodos.reporte(acumulados, clave), 3)
+
+    print(f"Rango de fechas ({args.registros:,} registros diarios)")
+    print(f"  Recorriendo registros: {t_recorrido * 1000:9.3f} ms")
+    print(f"  Acumulados:            {t_rango * 1000:9.3f} ms")
+    print(f"Trimestre {clave} ({args.proyectos:,} proyectos, {len(portafolio.registros):,} registros)")
+    print(f"  Recorriendo registros: {t_agrupado * 1000:9.1f} ms")
+    print(f"  Acumulados:            {t_reporte * 1000:9.1f} ms  (construidos una vez en {t_construir:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Mide la construcción y los indicadores de la vista de portafolio.
+
+La tabla de proyectos de la vista sale de los resúmenes guardados (ver
+almacenamiento.leer_indice); resumen_proyectos la recalcula desde los
+registros, como antes de guardarlos, para comparar.
+
+Uso:
+    python -m benchmarks.bench_portafolio --proyectos 5000 --registros 100
+"""
+import argparse
+import time
+
+from fgr.calculos import fgr_vectorizado
+from fgr.modelo import columnas_de
+from fgr.portafolio import Portafolio
+from fgr.sintetico import generar_proyectos
+
+INDICADORES = ['fgr_por_tipo', 'estadisticas_por_tipo', 'fgr_por_mes']
+
+
+def resumen_proyectos(portafolio):
+    """Área, residuos y FGR acumulados por proyecto, recalculados desde los registros"""
+    sumas = portafolio.registros.groupby('proyecto', observed=False).agg(
+        area_construida=('area_periodo', 'sum'),
+        residuos=('residuos_periodo', 'sum'),
+        fgr_promedio=('fgr_periodo', 'mean'),
+        avance=('porcentaje_avance', 'max'),
+    )
+    sumas['fgr_total'] = fgr_vectorizado(sumas['residuos'], sumas['area_construida'])
+    return sumas.reset_index()
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=5_000)
+    parser.add_argument('--registros', type=int, default=100, help="registros por proyecto")
+    args = parser.parse_args(argv)
+
+    proyectos = columnas_de(generar_proyectos(args.proyectos, args.registros))
+    print(f"{args.proyectos:,} proyectos, {args.proyectos * args.registros:,} registros")
+
+    portafolio = None
+
+    def construir():
+        nonlocal portafolio
+        portafolio = Portafolio(proyectos)
+
+    t_construir = medir(construir)
+    print(f"  Tabla columnar:        {t_construir * 1000:9.1f} ms")
+    t_total = 0.0
+    for nombre in INDICADORES:
+        t = medir(getattr(portafolio, nombre))
+        t_total += t
+        print(f"  {nombre + ':':22} {t * 1000:9.1f} ms")
+    print(f"  Indicadores (total):   {t_total * 1000:9.1f} ms")
+    t_memorizado = sum(medir(getattr(portafolio, nombre)) for nombre in INDICADORES)
+    print(f"  Rerun sin cambios:     {t_memorizado * 1000:9.3f} ms")
+    t_resumen = medir(lambda: resumen_proyectos(portafolio))
+    print(f"  Resumen recalculado:   {t_resumen * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
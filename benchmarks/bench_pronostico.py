@@ -0,0 +1,60 @@
+"""Mide el pronóstico de todo el portafolio y el reajuste tras un registro nuevo.
+
+También comprueba que el ajuste de un proyecto suelto coincide con su fila en
+el ajuste del portafolio.
+
+Uso:
+    python -m benchmarks.bench_pronostico --proyectos 5000 --registros 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from fgr import pronostico
+from fgr.analisis import AnalisisProyecto
+from fgr.modelo import columnas_de
+from fgr.portafolio import Portafolio
+from fgr.sintetico import generar_proyectos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=5_000)
+    parser.add_argument('--registros', type=int, default=100, help="registros por proyecto")
+    args = parser.parse_args(argv)
+
+    datos = generar_proyectos(args.proyectos, args.registros)
+    portafolio = Portafolio(columnas_de(datos))
+    versiones = dict.fromkeys(datos, 0)
+    modelo = pronostico.PronosticoPortafolio()
+
+    inicio = time.perf_counter()
+    modelo.actualizar(portafolio, versiones)
+    completo = time.perf_counter() - inicio
+
+    nombre = next(iter(datos))
+    versiones[nombre] += 1
+    inicio = time.perf_counter()
+    reajustados = modelo.actualizar(portafolio, versiones)
+    incremental = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    modelo.actualizar(portafolio, versiones)
+    sin_cambios = time.perf_counter() - inicio
+
+    analisis = AnalisisProyecto(datos[nombre]["area_total"], datos[nombre]["registros"])
+    uno = pronostico.ajustar_proyecto(nombre, analisis).proyectos.iloc[0]
+    fila = modelo.ajuste.proyectos.set_index('proyecto').loc[nombre]
+    assert np.allclose(uno[fila.index].astype(float), fila.astype(float)), "El ajuste individual no coincide"
+
+    registros = len(portafolio.registros)
+    print(f"{args.proyectos:,} proyectos, {registros:,} registros")
+    print(f"  Ajuste completo:         {completo:8.3f} s")
+    print(f"  Reajuste ({reajustados} proyecto):   {incremental:8.3f} s")
+    print(f"  Sin cambios:             {sin_cambios:8.3f} s")
+    print(f"  Períodos atípicos:       {len(modelo.ajuste.anomalias()):,}")
+
+
+if __name__ == "__main__":
+    main()
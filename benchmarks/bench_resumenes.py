@@ -0,0 +1,98 @@
+"""Mide el cambio de proyecto con los resúmenes guardados.
+
+Compara lo que cuesta mostrar el encabezado y las estadísticas de un proyecto
+recién elegido en el selector: leyendo sus registros y construyendo el
+DataFrame, o tomando el resumen del índice. También mide la lectura del índice
+al iniciar (resúmenes guardados o agregando los registros) y la latencia de
+una escritura, que ahora actualiza el resumen en la misma transacción.
+
+Uso:
+    python -m benchmarks.bench_resumenes --proyectos 500 --registros 365
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.suite import registro_nuevo
+from fgr import almacenamiento
+from fgr.analisis import AnalisisProyecto
+from fgr.cache import CacheProyectos
+from fgr.sintetico import generar_proyectos
+
+CONSULTA_AGREGADA = (
+    "SELECT p.nombre, p.area_total, p.tipos_residuos, p.version,"
+    " COUNT(r.id), MAX(r.porcentaje_avance)"
+    " FROM proyectos p LEFT JOIN registros r ON r.proyecto = p.nombre"
+    " GROUP BY p.nombre ORDER BY p.rowid"
+)
+
+
+def estadisticas_dataframe(conexion, nombre):
+    """Encabezado y estadísticas como antes: registros del proyecto y DataFrame"""
+    proyecto, _ = almacenamiento.leer_proyecto(conexion, nombre)
+    df = AnalisisProyecto(proyecto["area_total"], proyecto["registros"]).dataframe()
+    return (
+        df['porcentaje_avance'].max(), df['area_acumulada'].iloc[-1],
+        df['fgr_periodo'].mean(), df['fgr_acumulado'].iloc[-1]
+    )
+
+
+def estadisticas_resumen(cache, nombre):
+    """Encabezado y estadísticas desde el resumen del índice"""
+    resumen = cache.indice()[0][nombre]
+    return resumen['avance'], resumen['area_construida'], resumen['fgr_promedio'], resumen['fgr_total']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=500)
+    parser.add_argument('--registros', type=int, default=365, help="registros por proyecto")
+    parser.add_argument('--escrituras', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'proyectos.db')
+        almacenamiento.guardar_datos(generar_proyectos(args.proyectos, args.registros), ruta)
+        conexion = almacenamiento.conectar(ruta)
+        cache = CacheProyectos(ruta)
+        nombres = list(cache.indice()[0])
+
+        inicio = time.perf_counter()
+        antes = [estadisticas_dataframe(conexion, nombre) for nombre in nombres]
+        t_dataframe = (time.perf_counter() - inicio) / len(nombres)
+        inicio = time.perf_counter()
+        despues = [estadisticas_resumen(cache, nombre) for nombre in nombres]
+        t_resumen = (time.perf_counter() - inicio) / len(nombres)
+        assert all(abs(a - b) < 1e-9 * max(1.0, abs(a)) for fila in zip(antes, despues) for a, b in zip(*fila))
+
+        inicio = time.perf_counter()
+        conexion.execute(CONSULTA_AGREGADA).fetchall()
+        t_agregado = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        almacenamiento.leer_indice(conexion)
+        t_indice = time.perf_counter() - inicio
+
+        tiempos = []
+        for i in range(args.escrituras):
+            nombre = nombres[i % len(nombres)]
+            registro = registro_nuevo(ruta, nombre)
+            inicio = time.perf_counter()
+            almacenamiento.agregar_registro(nombre, registro, ruta)
+            tiempos.append(time.perf_counter() - inicio)
+        conexion.close()
+
+    tiempos.sort()
+    print(f"{args.proyectos:,} proyectos, {args.proyectos * args.registros:,} registros")
+    print("Cambio de proyecto (encabezado y estadísticas)")
+    print(f"  Registros y DataFrame: {t_dataframe * 1000:9.3f} ms")
+    print(f"  Resumen guardado:      {t_resumen * 1000:9.3f} ms")
+    print("Índice de proyectos al iniciar")
+    print(f"  Agregando registros:   {t_agregado * 1000:9.1f} ms")
+    print(f"  Resúmenes guardados:   {t_indice * 1000:9.1f} ms")
+    print(f"Escritura con resumen: mediana {tiempos[len(tiempos) // 2] * 1000:.2f} ms, "
+          f"p95 {tiempos[int(len(tiempos) * 0.95)] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
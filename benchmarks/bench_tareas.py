@@ -0,0 +1,54 @@
+"""Mide la exportación de todo el portafolio en una tarea en segundo plano.
+
+Compara la exportación en el hilo de la página con la misma exportación como
+tarea repartida entre procesos, informa cuánto tarda en volver el envío (lo que
+la página queda bloqueada) y comprueba que el CSV generado es idéntico.
+
+Uso:
+    python -m benchmarks.bench_tareas --proyectos 2000 --registros 100 --procesos 4
+"""
+import argparse
+import os
+import time
+
+from fgr import exportacion, tareas
+from fgr.modelo import columnas_de
+from fgr.sintetico import generar_proyectos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=2_000)
+    parser.add_argument('--registros', type=int, default=100, help="registros por proyecto")
+    parser.add_argument('--procesos', type=int, help="procesos del grupo (por defecto, uno por núcleo)")
+    args = parser.parse_args(argv)
+
+    seleccion = list(columnas_de(generar_proyectos(args.proyectos, args.registros)).items())
+    inicio = time.perf_counter()
+    esperado = exportacion.exportar_a_bytes(seleccion, 'csv')
+    en_linea = time.perf_counter() - inicio
+
+    gestor = tareas.GestorTareas(procesos=args.procesos)
+    try:
+        inicio = time.perf_counter()
+        id_tarea = gestor.enviar("Exportación", exportacion.exportar_en_tarea, seleccion, 'csv')
+        envio = time.perf_counter() - inicio
+        tarea = gestor.tarea(id_tarea)
+        while not tarea.terminada:
+            time.sleep(0.01)
+        en_tarea = time.perf_counter() - inicio
+    finally:
+        gestor.cerrar()
+    assert tarea.estado == tareas.TERMINADA, tarea.error
+    assert tarea.resultado == esperado, "El CSV de la tarea no coincide"
+
+    procesos = args.procesos or os.cpu_count()
+    print(f"{args.proyectos:,} proyectos, {args.proyectos * args.registros:,} registros, "
+          f"{len(esperado) / 1e6:.1f} MB de CSV")
+    print(f"  En el hilo de la página:   {en_linea:8.2f} s bloqueada")
+    print(f"  En segundo plano ({procesos} proc.): {en_tarea:8.2f} s total, "
+          f"{envio * 1000:.1f} ms bloqueada")
+
+
+if __name__ == "__main__":
+    main()
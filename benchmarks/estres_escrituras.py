@@ -0,0 +1,80 @@
+"""Prueba de estrés de escrituras concurrentes desde varios procesos.
+
+Cada proceso simula un worker de Streamlit con su propia CacheProyectos y
+registra avances como el formulario (ver sintetico.registrar_avances). Si otro
+proceso escribió entretanto, recibe ConflictoEscritura y vuelve a intentarlo
+con datos frescos. Al final comprueba que no se perdió ningún registro y que
+todos los valores derivados son consistentes; tests/test_escrituras.py hace
+la misma prueba con menos escrituras.
+
+Uso:
+    python -m benchmarks.estres_escrituras --procesos 8 --escrituras 200 --proyectos 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from fgr import almacenamiento
+from fgr.cli import problemas_proyecto
+from fgr.sintetico import registrar_avances
+
+
+def ejecutar(ruta, procesos, escrituras, proyectos):
+    """Crea los proyectos en ``ruta`` y escribe desde varios procesos a la vez
+
+    Devuelve (registros confirmados por proyecto, conflictos reintentados, datos guardados).
+    """
+    for i in range(proyectos):
+        almacenamiento.crear_proyecto(f"Proyecto {i + 1}", 10_000.0, ["Escombro"], ruta)
+    with multiprocessing.Pool(procesos) as pool:
+        resultados = pool.starmap(
+            registrar_avances, [(ruta, escrituras, semilla) for semilla in range(procesos)]
+        )
+    esperados = {}
+    for guardados, _ in resultados:
+        for nombre, cantidad in guardados.items():
+            esperados[nombre] = esperados.get(nombre, 0) + cantidad
+    return esperados, sum(c for _, c in resultados), almacenamiento.cargar_datos(ruta)
+
+
+def errores_escrituras(datos, esperados, total):
+    """Registros perdidos o inconsistentes respecto de las escrituras confirmadas"""
+    errores = []
+    for nombre, proyecto in datos.items():
+        if len(proyecto["registros"]) != esperados.get(nombre, 0):
+            errores.append(f"{nombre}: {len(proyecto['registros'])} registros guardados, "
+                           f"se esperaban {esperados.get(nombre, 0)}")
+        errores.extend(f"{nombre} {fecha}: {problema}" for fecha, problema in problemas_proyecto(nombre, proyecto))
+    if sum(len(p["registros"]) for p in datos.values()) != total:
+        errores.append("El total de registros no coincide con las escrituras confirmadas")
+    return errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--procesos', type=int, default=8)
+    parser.add_argument('--escrituras', type=int, default=200, help="escrituras por proceso")
+    parser.add_argument('--proyectos', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        esperados, conflictos, datos = ejecutar(
+            os.path.join(directorio, 'proyectos.db'), args.procesos, args.escrituras, args.proyectos
+        )
+        segundos = time.perf_counter() - inicio
+
+    total = args.procesos * args.escrituras
+    print(f"{total:,} escrituras de {args.procesos} procesos en {segundos:.2f} s "
+          f"({total / segundos:,.0f}/s), {conflictos:,} conflictos reintentados")
+    errores = errores_escrituras(datos, esperados, total)
+    for error in errores:
+        print(f"  ERROR {error}")
+    print("Sin registros perdidos ni inconsistentes" if not errores else f"{len(errores)} errores")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+"""Suite de benchmarks de los caminos de datos de la aplicación.
+
+Genera un portafolio sintético y mide cada caso: tiempo (mínimo y mediana de
+varias repeticiones), pico de memoria con tracemalloc y bloques de memoria que
+quedan asignados. Los resultados se guardan en JSON y se pueden comparar con
+una ejecución anterior para detectar regresiones. Con --perfil se guarda un
+perfil de cProfile (.prof) por caso, que se puede ver con snakeviz o convertir
+en flame graph con flameprof.
+
+El caso primera_pintura ejecuta la aplicación en un proceso nuevo (ver
+bench_arranque); informa solo el tiempo hasta la primera pintura, sin memoria
+ni perfil.
+
+Uso:
+    python -m benchmarks.suite --salida resultados.json
+    python -m benchmarks.suite --comparar base.json --umbral 0.2
+    python -m benchmarks.suite --casos cargar_datos dataframe --perfil perfiles/
+"""
+import argparse
+import cProfile
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import bench_arranque
+from fgr import almacenamiento, exportacion, graficos, periodos, pronostico
+from fgr.analisis import AnalisisProyecto
+from fgr.modelo import columnas_de
+from fgr.portafolio import Portafolio
+from fgr.sintetico import generar_proyectos
+
+
+def preparar_casos(args, directorio):
+    """Casos a medir: nombre -> función sin argumentos"""
+    datos = generar_proyectos(args.proyectos, args.registros)
+    ruta = os.path.join(directorio, 'proyectos.db')
+    almacenamiento.guardar_datos(datos, ruta)
+    proyecto = next(iter(generar_proyectos(1, args.registros_proyecto, semilla=1).values()))
+    registros = proyecto["registros"]
+    analisis = AnalisisProyecto(proyecto["area_total"], registros)
+    analisis.dataframe()
+    analisis.residuos_por_tipo()
+    columnas = columnas_de(datos)
+    portafolio = Portafolio(columnas)
+
+    def agregar_registro():
+        nombre = next(iter(datos))
+        almacenamiento.agregar_registro(nombre, registro_nuevo(ruta, nombre), ruta)
+
+    def figuras():
+        for grafico in graficos.GRAFICOS:
+            graficos.construir(grafico, analisis, 'Automática').to_json()
+
+    return {
+        'guardar_datos': lambda: almacenamiento.guardar_datos(datos, ruta),
+        'cargar_datos': lambda: almacenamiento.cargar_datos(ruta),
+        'cargar_indice': lambda: almacenamiento.cargar_indice(ruta),
+        'cargar_columnas': lambda: almacenamiento.cargar_columnas(ruta),
+        'agregar_registro': agregar_registro,
+        'dataframe': lambda: AnalisisProyecto(proyecto["area_total"], registros).dataframe(),
+        'residuos_por_tipo': lambda: AnalisisProyecto(proyecto["area_total"], registros).residuos_por_tipo(),
+        'figuras': figuras,
+        'exportar_csv': lambda: exportacion.exportar(columnas.items(), io.BytesIO(), 'csv'),
+        'portafolio': lambda: Portafolio(columnas),
+        'periodos': lambda: periodos.desde_portafolio(portafolio, 'Q'),
+        'pronostico': lambda: pronostico.PronosticoPortafolio().actualizar(portafolio, dict.fromkeys(datos, 0)),
+        # Sesión nueva en otro proceso sobre la misma base (ver bench_arranque)
+        'primera_pintura': lambda: bench_arranque.medir(bench_arranque.RAIZ, directorio)['primera_pintura'],
+    }
+
+
+# Casos que se ejecutan en otro proceso y devuelven su propio tiempo en segundos
+CASOS_EN_PROCESO = {'primera_pintura'}
+
+
+def registro_nuevo(ruta, nombre):
+    """Registro con un avance mayor al último guardado del proyecto"""
+    conexion = almacenamiento.conectar(ruta)
+    try:
+        maximo = conexion.execute(
+            "SELECT MAX(porcentaje_avance) FROM registros WHERE proyecto = ?", (nombre,)
+        ).fetchone()[0] or 0.0
+    finally:
+        conexion.close()
+    return {
+        "fecha": "2099-01-01",
+        "porcentaje_avance": maximo + 0.001,
+        "incremento_porcentaje": 0.001,
+        "area_periodo": 1.0,
+        "residuos_periodo": 0.1,
+        "tipos_residuos": {"Escombro": 0.1},
+        "fgr_periodo": 0.1
+    }
+
+
+def medir(funcion, repeticiones, perfil=None):
+    """Tiempos sin tracemalloc y una ejecución adicional para la memoria"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    bloques = sys.getallocatedblocks()
+    tracemalloc.start()
+    resultado = funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bloques = sys.getallocatedblocks() - bloques
+    del resultado
+
+    if perfil is not None:
+        perfilador = cProfile.Profile()
+        perfilador.runcall(funcion)
+        perfilador.dump_stats(perfil)
+    return {
+        'segundos': min(tiempos),
+        'mediana': statistics.median(tiempos),
+        'pico_mb': pico / 1e6,
+        'bloques': bloques,
+    }
+
+
+def medir_en_proceso(funcion, repeticiones):
+    """Tiempos informados por el caso; la memoria de otro proceso no se mide"""
+    tiempos = [funcion() for _ in range(repeticiones)]
+    return {
+        'segundos': min(tiempos),
+        'mediana': statistics.median(tiempos),
+        'pico_mb': None,
+        'bloques': None,
+    }
+
+
+def _memoria(medida):
+    if medida['pico_mb'] is None:
+        return "pico        - MB  bloques -"
+    return f"pico {medida['pico_mb']:8.1f} MB  bloques {medida['bloques']:+,}"
+
+
+def comparar(actual, base, umbral):
+    """Imprime la comparación y devuelve los casos más lentos que base × (1 + umbral)"""
+    regresiones = []
+    print(f"\n{'Caso':<20} {'Base':>10} {'Actual':>10} {'Cambio':>8} {'Pico MB':>16}")
+    for caso, medida in actual['casos'].items():
+        anterior = base['casos'].get(caso)
+        if anterior is None:
+            print(f"{caso:<20} {'-':>10} {medida['segundos'] * 1000:8.1f}ms {'nuevo':>8}")
+            continue
+        cambio = medida['segundos'] / anterior['segundos'] - 1 if anterior['segundos'] else 0.0
+        marca = "  <- regresión" if cambio > umbral else ""
+        if marca:
+            regresiones.append(caso)
+        picos = "" if None in (anterior['pico_mb'], medida['pico_mb']) else (
+            f"{anterior['pico_mb']:7.1f} → {medida['pico_mb']:6.1f}"
+        )
+        print(f"{caso:<20} {anterior['segundos'] * 1000:8.1f}ms {medida['segundos'] * 1000:8.1f}ms "
+              f"{cambio:+8.0%} {picos:>16}{marca}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proyectos', type=int, default=1_000)
+    parser.add_argument('--registros', type=int, default=100, help="registros por proyecto")
+    parser.add_argument('--registros-proyecto', type=int, default=5_000,
+                        help="registros del proyecto usado en los casos de un solo proyecto")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--casos', nargs='+', help="mide solo estos casos")
+    parser.add_argument('--salida', help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior")
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help="aumento relativo de tiempo que se considera regresión")
+    parser.add_argument('--perfil', help="directorio donde guardar un perfil .prof por caso")
+    args = parser.parse_args(argv)
+
+    if args.perfil:
+        os.makedirs(args.perfil, exist_ok=True)
+    resultados = {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parametros': {
+            'proyectos': args.proyectos,
+            'registros': args.registros,
+            'registros_proyecto': args.registros_proyecto,
+            'repeticiones': args.repeticiones,
+        },
+        'casos': {},
+    }
+    with tempfile.TemporaryDirectory() as directorio:
+        casos = preparar_casos(args, directorio)
+        for caso in args.casos or list(casos):
+            if caso not in casos:
+                parser.error(f"Caso desconocido: {caso} (disponibles: {', '.join(casos)})")
+            if caso in CASOS_EN_PROCESO:
+                medida = medir_en_proceso(casos[caso], args.repeticiones)
+            else:
+                perfil = os.path.join(args.perfil, f"{caso}.prof") if args.perfil else None
+                medida = medir(casos[caso], args.repeticiones, perfil)
+            resultados['casos'][caso] = medida
+            print(f"{caso:<20} {medida['segundos'] * 1000:9.1f} ms  (mediana {medida['mediana'] * 1000:9.1f} ms)"
+                  f"  {_memoria(medida)}")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+    if args.comparar:
+        with open(args.comparar) as f:
+            regresiones = comparar(resultados, json.load(f), args.umbral)
+        if regresiones:
+            print(f"\nRegresiones: {', '.join(regresiones)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
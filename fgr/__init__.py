@@ -0,0 +1 @@
+"""Núcleo de cálculo y almacenamiento del seguimiento FGR."""
@@ -0,0 +1,5 @@
+import sys
+
+from fgr.cli import main
+
+sys.exit(main())
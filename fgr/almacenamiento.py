@@ -0,0 +1,579 @@
+"""Almacenamiento de proyectos en SQLite.
+
+Cada cambio escribe solo las filas afectadas dentro de una transacción, en
+lugar de reescribir todo el archivo. La primera vez que se abre la base se
+migran los datos existentes de proyectos.json; la tabla meta guarda la marca
+'migrado' en la misma transacción, de modo que una migración fallida se
+reintenta al abrir la base otra vez.
+
+Las transacciones de escritura toman el bloqueo de escritura de SQLite al
+comenzar, por lo que quedan serializadas entre sesiones y procesos. Cada
+proyecto tiene un número de versión que aumenta con cada cambio de sus
+registros: una escritura que indica la versión que leyó falla con
+ConflictoEscritura si otro usuario modificó el proyecto entretanto.
+
+La tabla resumenes guarda los indicadores acumulados de cada proyecto (ver
+calculos.resumir_proyecto); cada escritura la actualiza en la misma
+transacción, sumando solo los registros nuevos.
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from fgr import metricas
+from fgr.calculos import CAMPOS_REGISTRO, CAMPOS_RESUMEN, acumular_resumen, area_faltante
+
+RUTA_BD = 'proyectos.db'
+RUTA_JSON = 'proyectos.json'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS proyectos (
+    nombre TEXT PRIMARY KEY,
+    area_total REAL NOT NULL,
+    tipos_residuos TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    proyecto TEXT NOT NULL REFERENCES proyectos(nombre) ON DELETE CASCADE,
+    fecha TEXT NOT NULL,
+    porcentaje_avance REAL NOT NULL,
+    incremento_porcentaje REAL,
+    area_periodo REAL,
+    residuos_periodo REAL,
+    tipos_residuos TEXT NOT NULL,
+    fgr_periodo REAL
+);
+CREATE INDEX IF NOT EXISTS idx_registros_proyecto_fecha
+    ON registros (proyecto, fecha, id);
+CREATE TABLE IF NOT EXISTS resumenes (
+    proyecto TEXT PRIMARY KEY REFERENCES proyectos(nombre) ON DELETE CASCADE,
+    registros INTEGER NOT NULL DEFAULT 0,
+    avance REAL NOT NULL DEFAULT 0,
+    area_construida REAL NOT NULL DEFAULT 0,
+    residuos REAL NOT NULL DEFAULT 0,
+    suma_fgr REAL NOT NULL DEFAULT 0,
+    ultima_fecha TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (clave, valor) VALUES ('version', 0);
+"""
+
+
+def conectar(ruta=RUTA_BD, ruta_json=None):
+    """Abre la base de datos, creando el esquema y migrando el JSON si aún no se migró"""
+    if ruta_json is None:
+        # Por defecto se migra el proyectos.json ubicado junto a la base
+        ruta_json = os.path.join(os.path.dirname(ruta), RUTA_JSON)
+    conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.execute("PRAGMA foreign_keys=ON")
+    conexion.executescript(ESQUEMA)
+    if not _tiene_columna(conexion, 'proyectos', 'version'):
+        with _transaccion(conexion):
+            # Bases creadas antes de las versiones por proyecto
+            if not _tiene_columna(conexion, 'proyectos', 'version'):
+                conexion.execute("ALTER TABLE proyectos ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if _faltan_resumenes(conexion):
+        with _transaccion(conexion):
+            # Bases creadas antes de los resúmenes: se calculan una vez desde los registros
+            _completar_resumenes(conexion)
+    if not _migrada(conexion):
+        _migrar_json(conexion, ruta_json)
+    return conexion
+
+
+class ConflictoEscritura(Exception):
+    """Otra escritura modificó el proyecto desde que se leyó"""
+
+
+def _tiene_columna(conexion, tabla, columna):
+    return any(fila[1] == columna for fila in conexion.execute(f"PRAGMA table_info({tabla})"))
+
+
+def _migrada(conexion):
+    return conexion.execute("SELECT valor FROM meta WHERE clave = 'migrado'").fetchone() is not None
+
+
+def _migrar_json(conexion, ruta_json):
+    # Las bases anteriores a la marca que ya tienen proyectos se dan por migradas
+    datos = None
+    vacia = conexion.execute("SELECT COUNT(*) FROM proyectos").fetchone()[0] == 0
+    if vacia and os.path.exists(ruta_json):
+        # Si el JSON no se puede leer, la base queda sin marcar y se reintenta al abrirla de nuevo
+        with open(ruta_json, 'r') as f:
+            datos = json.load(f)
+    with _transaccion(conexion):
+        # Otro proceso pudo haber migrado primero
+        if not _migrada(conexion):
+            if datos is not None and conexion.execute("SELECT COUNT(*) FROM proyectos").fetchone()[0] == 0:
+                _insertar_todo(conexion, datos)
+            conexion.execute("INSERT INTO meta (clave, valor) VALUES ('migrado', 1)")
+
+
+def _faltan_resumenes(conexion):
+    return conexion.execute(
+        "SELECT EXISTS (SELECT 1 FROM proyectos WHERE nombre NOT IN (SELECT proyecto FROM resumenes))"
+    ).fetchone()[0]
+
+
+def _completar_resumenes(conexion):
+    # Igual que resumir_proyecto: el área que falta la calcula calculos.area_faltante
+    conexion.create_function('area_faltante', 3, area_faltante, deterministic=True)
+    conexion.execute(
+        "INSERT INTO resumenes (proyecto, " + ", ".join(CAMPOS_RESUMEN) + ")"
+        " SELECT p.nombre, COUNT(r.id), COALESCE(MAX(r.porcentaje_avance), 0.0),"
+        " TOTAL(COALESCE(r.area_periodo, area_faltante("
+        "p.area_total, r.porcentaje_avance, COALESCE(r.incremento_porcentaje, 0)))),"
+        " TOTAL(r.residuos_periodo), TOTAL(r.fgr_periodo), MAX(r.fecha)"
+        " FROM proyectos p LEFT JOIN registros r ON r.proyecto = p.nombre"
+        " WHERE p.nombre NOT IN (SELECT proyecto FROM resumenes)"
+        " GROUP BY p.nombre"
+    )
+
+
+@contextmanager
+def transaccion(ruta=RUTA_BD):
+    """Abre una conexión y ejecuta el bloque en una única transacción atómica
+
+    Cada transacción incrementa el contador de versión de los datos.
+    """
+    conexion = conectar(ruta)
+    try:
+        with metricas.escritura(ruta), _transaccion(conexion):
+            conexion.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version'")
+            yield conexion
+    finally:
+        conexion.close()
+
+
+def version_datos(conexion):
+    """Devuelve el contador de versión, que cambia con cada escritura"""
+    return conexion.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+
+
+@contextmanager
+def _transaccion(conexion):
+    # BEGIN IMMEDIATE toma el bloqueo de escritura desde el inicio
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        yield conexion
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    conexion.execute("COMMIT")
+
+
+def _fila_registro(nombre, registro):
+    return (
+        nombre,
+        registro['fecha'],
+        registro['porcentaje_avance'],
+        registro.get('incremento_porcentaje'),
+        registro.get('area_periodo'),
+        registro.get('residuos_periodo'),
+        json.dumps(registro.get('tipos_residuos', {})),
+        registro.get('fgr_periodo'),
+    )
+
+
+def _insertar_registros(conexion, nombre, registros):
+    conexion.executemany(
+        "INSERT INTO registros (proyecto, fecha, porcentaje_avance, incremento_porcentaje,"
+        " area_periodo, residuos_periodo, tipos_residuos, fgr_periodo)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (_fila_registro(nombre, registro) for registro in registros)
+    )
+
+
+def _insertar_proyecto(conexion, nombre, area_total, tipos_residuos):
+    try:
+        conexion.execute(
+            "INSERT INTO proyectos (nombre, area_total, tipos_residuos) VALUES (?, ?, ?)",
+            (nombre, area_total, json.dumps(tipos_residuos))
+        )
+    except sqlite3.IntegrityError as error:
+        # Otra sesión o proceso creó el mismo nombre después de que se comprobó
+        if conexion.execute("SELECT 1 FROM proyectos WHERE nombre = ?", (nombre,)).fetchone():
+            raise ConflictoEscritura(f"Ya existe un proyecto llamado '{nombre}'") from error
+        raise
+    _reiniciar_resumen(conexion, nombre)
+
+
+def _insertar_todo(conexion, datos):
+    for nombre, proyecto in datos.items():
+        _insertar_proyecto(conexion, nombre, proyecto['area_total'], proyecto['tipos_residuos'])
+        _insertar_registros(conexion, nombre, proyecto.get('registros', []))
+        _sumar_resumen(conexion, nombre, proyecto.get('registros', []))
+
+
+def _reiniciar_resumen(conexion, nombre):
+    conexion.execute("INSERT OR REPLACE INTO resumenes (proyecto) VALUES (?)", (nombre,))
+
+
+def _sumar_resumen(conexion, nombre, registros):
+    # Solo se recorren los registros nuevos; el resto ya está en las sumas guardadas
+    fila = conexion.execute(
+        "SELECT p.area_total, " + ", ".join(f"s.{campo}" for campo in CAMPOS_RESUMEN) +
+        " FROM proyectos p JOIN resumenes s ON s.proyecto = p.nombre WHERE p.nombre = ?", (nombre,)
+    ).fetchone()
+    resumen = acumular_resumen(dict(zip(CAMPOS_RESUMEN, fila[1:])), registros, fila[0])
+    conexion.execute(
+        "UPDATE resumenes SET " + ", ".join(f"{campo} = ?" for campo in CAMPOS_RESUMEN) +
+        " WHERE proyecto = ?", [resumen[campo] for campo in CAMPOS_RESUMEN] + [nombre]
+    )
+
+
+def _verificar_version(conexion, nombre, version):
+    # Dentro de la transacción: nadie más puede escribir hasta el COMMIT
+    fila = conexion.execute("SELECT version FROM proyectos WHERE nombre = ?", (nombre,)).fetchone()
+    if fila is None:
+        raise ConflictoEscritura(f"El proyecto '{nombre}' ya no existe")
+    if version is not None and fila[0] != version:
+        raise ConflictoEscritura(
+            f"El proyecto '{nombre}' fue modificado por otro usuario (versión {fila[0]}, se esperaba {version})"
+        )
+
+
+def _verificar_avance(conexion, nombre, registros):
+    # Los registros nuevos deben superar el mayor avance guardado, igual que en el
+    # formulario; el resumen lo tiene al día en la misma transacción
+    cantidad, maximo = conexion.execute(
+        "SELECT registros, avance FROM resumenes WHERE proyecto = ?", (nombre,)
+    ).fetchone()
+    if cantidad and registros and min(r['porcentaje_avance'] for r in registros) <= maximo:
+        raise ConflictoEscritura(
+            f"El avance del proyecto '{nombre}' ya llegó a {maximo:.1f}%; vuelva a registrar el avance"
+        )
+
+
+def _incrementar_version(conexion, nombre):
+    conexion.execute("UPDATE proyectos SET version = version + 1 WHERE nombre = ?", (nombre,))
+
+
+def _registro_desde_fila(fila):
+    registro = {}
+    for campo, valor in zip(CAMPOS_REGISTRO, fila):
+        if valor is None:
+            # Los registros antiguos pueden no tener todos los campos
+            continue
+        registro[campo] = json.loads(valor) if campo == 'tipos_residuos' else valor
+    return registro
+
+
+def leer_datos(conexion):
+    """Lee todos los proyectos en una misma transacción de lectura
+
+    Devuelve (proyectos, versión de los datos, versión de cada proyecto).
+    """
+    conexion.execute("BEGIN")
+    try:
+        version = version_datos(conexion)
+        datos, versiones = {}, {}
+        for nombre, area_total, tipos, version_proyecto in conexion.execute(
+                "SELECT nombre, area_total, tipos_residuos, version FROM proyectos ORDER BY rowid"):
+            versiones[nombre] = version_proyecto
+            datos[nombre] = {
+                "area_total": area_total,
+                "tipos_residuos": json.loads(tipos),
+                "registros": []
+            }
+        for fila in conexion.execute(
+                "SELECT proyecto, " + ", ".join(CAMPOS_REGISTRO) +
+                " FROM registros ORDER BY proyecto, fecha, id"):
+            datos[fila[0]]["registros"].append(_registro_desde_fila(fila[1:]))
+    finally:
+        conexion.execute("COMMIT")
+    return datos, version, versiones
+
+
+def leer_indice(conexion):
+    """Lee el índice de proyectos desde los resúmenes guardados, sin leer los registros
+
+    Cada entrada tiene area_total, tipos_residuos y los indicadores de
+    calculos.resumir_proyecto. Devuelve (índice, versión de los datos,
+    versión de cada proyecto), leídos en una misma transacción.
+    """
+    conexion.execute("BEGIN")
+    try:
+        version = version_datos(conexion)
+        indice, versiones = {}, {}
+        for fila in conexion.execute(
+                "SELECT p.nombre, p.area_total, p.tipos_residuos, p.version, " +
+                ", ".join(f"s.{campo}" for campo in CAMPOS_RESUMEN) +
+                " FROM proyectos p JOIN resumenes s ON s.proyecto = p.nombre ORDER BY p.rowid"):
+            nombre, area_total, tipos, versiones[nombre] = fila[:4]
+            indice[nombre] = acumular_resumen(
+                dict(zip(CAMPOS_RESUMEN, fila[4:]), tipos_residuos=json.loads(tipos)), (), area_total
+            )
+    finally:
+        conexion.execute("COMMIT")
+    return indice, version, versiones
+
+
+def leer_proyecto(conexion, nombre):
+    """Lee un proyecto con sus registros en una transacción de lectura
+
+    Devuelve (proyecto, versión de los datos); el proyecto es None si no existe.
+    """
+    conexion.execute("BEGIN")
+    try:
+        version = version_datos(conexion)
+        fila = conexion.execute(
+            "SELECT area_total, tipos_residuos FROM proyectos WHERE nombre = ?", (nombre,)
+        ).fetchone()
+        proyecto = None
+        if fila is not None:
+            proyecto = {
+                "area_total": fila[0],
+                "tipos_residuos": json.loads(fila[1]),
+                "registros": [
+                    _registro_desde_fila(registro) for registro in conexion.execute(
+                        "SELECT " + ", ".join(CAMPOS_REGISTRO) +
+                        " FROM registros WHERE proyecto = ? ORDER BY fecha, id", (nombre,))
+                ]
+            }
+    finally:
+        conexion.execute("COMMIT")
+    return proyecto, version
+
+
+def _leer_columnas_proyecto(conexion, nombre, area_total, tipos):
+    # NumPy se importa solo aquí: el resto del módulo no lo necesita al iniciar
+    from fgr.modelo import ColumnasProyecto
+    return ColumnasProyecto.desde_filas(
+        area_total, json.loads(tipos),
+        (
+            fila[:5] + (json.loads(fila[5]),) + fila[6:]
+            for fila in conexion.execute(
+                "SELECT " + ", ".join(CAMPOS_REGISTRO) +
+                " FROM registros WHERE proyecto = ? ORDER BY fecha, id", (nombre,))
+        )
+    )
+
+
+def leer_columnas(conexion, nombres=None):
+    """Lee proyectos como modelo.ColumnasProyecto en una misma transacción de lectura
+
+    Sin ``nombres`` se leen todos. Devuelve (columnas de cada proyecto,
+    versión de los datos, versión de cada proyecto leído).
+    """
+    conexion.execute("BEGIN")
+    try:
+        version = version_datos(conexion)
+        seleccion = None if nombres is None else set(nombres)
+        columnas, versiones = {}, {}
+        filas = conexion.execute(
+            "SELECT nombre, area_total, tipos_residuos, version FROM proyectos ORDER BY rowid"
+        ).fetchall()
+        for nombre, area_total, tipos, version_proyecto in filas:
+            if seleccion is not None and nombre not in seleccion:
+                continue
+            versiones[nombre] = version_proyecto
+            columnas[nombre] = _leer_columnas_proyecto(conexion, nombre, area_total, tipos)
+    finally:
+        conexion.execute("COMMIT")
+    return columnas, version, versiones
+
+
+def cargar_indice(ruta=RUTA_BD):
+    """Carga el índice de proyectos (ver leer_indice), sin sus registros"""
+    conexion = conectar(ruta)
+    try:
+        return leer_indice(conexion)[0]
+    finally:
+        conexion.close()
+
+
+def listar_proyectos(ruta=RUTA_BD):
+    """Devuelve los proyectos con su área y tipos de residuos, sin registros"""
+    conexion = conectar(ruta)
+    try:
+        return {
+            nombre: {"area_total": area_total, "tipos_residuos": json.loads(tipos)}
+            for nombre, area_total, tipos in conexion.execute(
+                "SELECT nombre, area_total, tipos_residuos FROM proyectos ORDER BY rowid")
+        }
+    finally:
+        conexion.close()
+
+
+def listar_tipos(ruta=RUTA_BD, nombres=None):
+    """Unión ordenada de los tipos de residuos configurados y registrados en los proyectos
+
+    Sigue el mismo orden que modelo.ColumnasProyecto.tipos: los configurados de
+    cada proyecto y luego los de sus registros, por fecha. Los registros se
+    recorren en SQLite sin convertirlos en diccionarios.
+    """
+    conexion = conectar(ruta)
+    try:
+        seleccion = None if nombres is None else set(nombres)
+        tipos = {}
+        for nombre, configurados in conexion.execute(
+                "SELECT nombre, tipos_residuos FROM proyectos ORDER BY rowid").fetchall():
+            if seleccion is not None and nombre not in seleccion:
+                continue
+            tipos.update(dict.fromkeys(json.loads(configurados)))
+            tipos.update(dict.fromkeys(fila[0] for fila in conexion.execute(
+                "SELECT t.key FROM registros r, json_each(r.tipos_residuos) t"
+                " WHERE r.proyecto = ? ORDER BY r.fecha, r.id, t.id", (nombre,))))
+        return list(tipos)
+    finally:
+        conexion.close()
+
+
+def iterar_proyectos(ruta=RUTA_BD, nombres=None, versiones=None):
+    """Genera (nombre, proyecto) leyendo los registros de un proyecto a la vez
+
+    Si se pasa el diccionario ``versiones``, se completa con la versión de cada
+    proyecto generado, leída en la misma transacción que sus registros.
+    """
+    conexion = conectar(ruta)
+    try:
+        todos = [fila[0] for fila in conexion.execute("SELECT nombre FROM proyectos ORDER BY rowid")]
+        seleccion = None if nombres is None else set(nombres)
+        for nombre in todos:
+            if seleccion is not None and nombre not in seleccion:
+                continue
+            conexion.execute("BEGIN")
+            try:
+                fila = conexion.execute(
+                    "SELECT area_total, tipos_residuos, version FROM proyectos WHERE nombre = ?", (nombre,)
+                ).fetchone()
+                if fila is None:
+                    # Eliminado después de leer la lista
+                    continue
+                registros = [
+                    _registro_desde_fila(registro) for registro in conexion.execute(
+                        "SELECT " + ", ".join(CAMPOS_REGISTRO) +
+                        " FROM registros WHERE proyecto = ? ORDER BY fecha, id", (nombre,))
+                ]
+            finally:
+                conexion.execute("COMMIT")
+            if versiones is not None:
+                versiones[nombre] = fila[2]
+            yield nombre, {
+                "area_total": fila[0],
+                "tipos_residuos": json.loads(fila[1]),
+                "registros": registros
+            }
+    finally:
+        conexion.close()
+
+
+def iterar_columnas(ruta=RUTA_BD, nombres=None):
+    """Como iterar_proyectos, pero genera (nombre, modelo.ColumnasProyecto)"""
+    conexion = conectar(ruta)
+    try:
+        filas = conexion.execute(
+            "SELECT nombre, area_total, tipos_residuos FROM proyectos ORDER BY rowid"
+        ).fetchall()
+        seleccion = None if nombres is None else set(nombres)
+        for nombre, area_total, tipos in filas:
+            if seleccion is None or nombre in seleccion:
+                yield nombre, _leer_columnas_proyecto(conexion, nombre, area_total, tipos)
+    finally:
+        conexion.close()
+
+
+def cargar_columnas(ruta=RUTA_BD, nombres=None):
+    """Carga los registros de cada proyecto en columnas, sin crear un diccionario por registro"""
+    conexion = conectar(ruta)
+    try:
+        return leer_columnas(conexion, nombres)[0]
+    finally:
+        conexion.close()
+
+
+def cargar_datos(ruta=RUTA_BD):
+    """Carga todos los proyectos con el mismo formato que proyectos.json"""
+    conexion = conectar(ruta)
+    try:
+        return leer_datos(conexion)[0]
+    finally:
+        conexion.close()
+
+
+def guardar_datos(datos, ruta=RUTA_BD):
+    """Reemplaza todos los proyectos de forma atómica y devuelve la nueva versión"""
+    with transaccion(ruta) as conexion:
+        conexion.execute("DELETE FROM registros")
+        conexion.execute("DELETE FROM proyectos")
+        _insertar_todo(conexion, datos)
+        return version_datos(conexion)
+
+
+def crear_proyecto(nombre, area_total, tipos_residuos, ruta=RUTA_BD):
+    """Guarda un proyecto nuevo sin registros y devuelve la nueva versión
+
+    Falla con ConflictoEscritura si ya existe un proyecto con ese nombre.
+    """
+    with transaccion(ruta) as conexion:
+        _insertar_proyecto(conexion, nombre, area_total, tipos_residuos)
+        return version_datos(conexion)
+
+
+def eliminar_proyecto(nombre, ruta=RUTA_BD, version=None):
+    """Elimina un proyecto junto con todos sus registros y devuelve la nueva versión
+
+    Si se indica ``version``, falla con ConflictoEscritura cuando el proyecto cambió.
+    """
+    with transaccion(ruta) as conexion:
+        if version is not None:
+            _verificar_version(conexion, nombre, version)
+        conexion.execute("DELETE FROM proyectos WHERE nombre = ?", (nombre,))
+        return version_datos(conexion)
+
+
+def agregar_registro(nombre, registro, ruta=RUTA_BD, version=None):
+    """Agrega un único registro al proyecto y devuelve la nueva versión"""
+    return agregar_registros({nombre: [registro]}, ruta, None if version is None else {nombre: version})
+
+
+def agregar_registros(registros_por_proyecto, ruta=RUTA_BD, versiones=None):
+    """Agrega registros de varios proyectos en una sola transacción y devuelve la nueva versión
+
+    ``versiones`` indica, por proyecto, la versión sobre la que se calcularon
+    los registros. Falla con ConflictoEscritura si alguna no coincide, si el
+    proyecto no existe o si otro registro ya alcanzó el avance de los nuevos;
+    en ese caso no se guarda nada.
+    """
+    versiones = versiones or {}
+    with transaccion(ruta) as conexion:
+        for nombre, registros in registros_por_proyecto.items():
+            _verificar_version(conexion, nombre, versiones.get(nombre))
+            _verificar_avance(conexion, nombre, registros)
+            _insertar_registros(conexion, nombre, registros)
+            _sumar_resumen(conexion, nombre, registros)
+            _incrementar_version(conexion, nombre)
+        return version_datos(conexion)
+
+
+def reemplazar_registros(registros_por_proyecto, ruta=RUTA_BD, versiones=None):
+    """Reemplaza los registros de los proyectos indicados y devuelve la nueva versión"""
+    versiones = versiones or {}
+    with transaccion(ruta) as conexion:
+        for nombre, registros in registros_por_proyecto.items():
+            _verificar_version(conexion, nombre, versiones.get(nombre))
+            conexion.execute("DELETE FROM registros WHERE proyecto = ?", (nombre,))
+            _insertar_registros(conexion, nombre, registros)
+            _reiniciar_resumen(conexion, nombre)
+            _sumar_resumen(conexion, nombre, registros)
+            _incrementar_version(conexion, nombre)
+        return version_datos(conexion)
+
+
+def limpiar_registros(nombre, ruta=RUTA_BD, version=None):
+    """Elimina todos los registros del proyecto y devuelve la nueva versión"""
+    with transaccion(ruta) as conexion:
+        if version is not None:
+            _verificar_version(conexion, nombre, version)
+        conexion.execute("DELETE FROM registros WHERE proyecto = ?", (nombre,))
+        _reiniciar_resumen(conexion, nombre)
+        _incrementar_version(conexion, nombre)
+        return version_datos(conexion)
@@ -0,0 +1,177 @@
+"""Análisis incremental de los registros de un proyecto.
+
+Los acumulados se mantienen a medida que se agregan registros, de modo que
+registrar un avance al final de la serie cuesta O(1) y el DataFrame derivado
+solo se reconstruye cuando cambia la versión del proyecto. También se mantienen
+los acumulados mensuales y trimestrales (ver periodos.py) para consultar rangos
+de fechas sin recorrer los registros.
+"""
+import bisect
+import threading
+
+import pandas as pd
+
+from fgr import metricas
+from fgr.calculos import CAMPOS_REGISTRO, completar_registro, fgr_vectorizado
+from fgr.periodos import FRECUENCIAS, Acumulados
+
+COLUMNAS_ACUMULADAS = ['area_acumulada', 'residuos_acumulados', 'fgr_acumulado']
+# Resultados derivados (por ejemplo, figuras) que se conservan por proyecto
+MAX_MEMORIZADOS = 16
+
+
+def _cociente(residuos, area):
+    # Equivale a residuos / area.replace(0, np.inf)
+    return residuos / area if area != 0 else residuos / float('inf')
+
+
+class AnalisisProyecto:
+    """Registros de un proyecto con sus acumulados de área, residuos y FGR"""
+
+    def __init__(self, area_total, registros=()):
+        self.area_total = area_total
+        self.version = 0
+        self._lock = threading.RLock()
+        self._columnas = {columna: [] for columna in CAMPOS_REGISTRO + COLUMNAS_ACUMULADAS}
+        self._df = None
+        self._version_df = None
+        self._tipos = None
+        self._version_tipos = None
+        self._memo = {}
+        self._version_memo = None
+        self._periodos = {frecuencia: Acumulados(frecuencia) for frecuencia in FRECUENCIAS.values()}
+        for registro in registros:
+            self.agregar(registro)
+
+    def __len__(self):
+        return len(self._columnas['fecha'])
+
+    def copia(self):
+        """Copia independiente con la misma versión, sin los resultados memorizados"""
+        with self._lock:
+            nueva = AnalisisProyecto(self.area_total)
+            nueva.version = self.version
+            nueva._columnas = {columna: list(valores) for columna, valores in self._columnas.items()}
+            nueva._periodos = {frecuencia: a.copia() for frecuencia, a in self._periodos.items()}
+            return nueva
+
+    def agregar(self, registro):
+        """Agrega un registro; en O(1) si su fecha no es anterior a la última"""
+        registro = completar_registro(registro, self.area_total)
+        with self._lock:
+            fechas = self._columnas['fecha']
+            # Igual que sort() estable: tras los registros de la misma fecha
+            posicion = bisect.bisect_right(fechas, registro['fecha'])
+            for columna in CAMPOS_REGISTRO:
+                # Los registros sin tipos de residuo guardan un diccionario vacío
+                ausente = {} if columna == 'tipos_residuos' else 0.0
+                self._columnas[columna].insert(posicion, registro.get(columna, ausente))
+            for columna in COLUMNAS_ACUMULADAS:
+                del self._columnas[columna][posicion:]
+            self._acumular_desde(posicion)
+            for acumulados in self._periodos.values():
+                acumulados.agregar(registro)
+            self.version += 1
+
+    def _acumular_desde(self, posicion):
+        # Suma secuencial, igual que cumsum(), para obtener exactamente los mismos valores
+        c = self._columnas
+        area = c['area_acumulada'][-1] if posicion else 0.0
+        residuos = c['residuos_acumulados'][-1] if posicion else 0.0
+        for i in range(posicion, len(c['fecha'])):
+            area += c['area_periodo'][i]
+            residuos += c['residuos_periodo'][i]
+            c['area_acumulada'].append(area)
+            c['residuos_acumulados'].append(residuos)
+            c['fgr_acumulado'].append(_cociente(residuos, area))
+
+    def dataframe(self):
+        """DataFrame de registros y acumulados, memorizado por versión; no modificar"""
+        with self._lock:
+            if self._version_df != self.version:
+                with metricas.etapa('dataframe'):
+                    df = pd.DataFrame({
+                        columna: pd.Series(valores, dtype=object if columna == 'tipos_residuos' else None)
+                        for columna, valores in self._columnas.items()
+                    })
+                    df['fecha'] = pd.to_datetime(df['fecha'])
+                self._df = df
+                self._version_df = self.version
+            return self._df
+
+    def residuos_por_tipo(self):
+        """Volumen por tipo de residuo, una fila por registro indexada por fecha
+
+        Se construye en una sola pasada desde los diccionarios tipos_residuos y se
+        memoriza por versión; los tipos no registrados en un período valen 0.
+        """
+        with self._lock:
+            if self._version_tipos != self.version:
+                with metricas.etapa('agregacion'):
+                    self._tipos = pd.DataFrame.from_records(
+                        self._columnas['tipos_residuos'],
+                        index=pd.Index(self._columnas['fecha'])
+                    ).fillna(0.0).astype(float)
+                self._version_tipos = self.version
+            return self._tipos
+
+    def acumulados(self, frecuencia):
+        """Acumulados por período ('M' o 'Q'); no modificar"""
+        return self._periodos[frecuencia]
+
+    def resumen_rango(self, desde=None, hasta=None):
+        """Registros, área, residuos, FGR y residuos por tipo entre dos fechas ISO, inclusive
+
+        Área y residuos salen de los acumulados por registro con búsqueda
+        binaria; los residuos por tipo, de los acumulados mensuales más los
+        registros de los meses incompletos de los extremos.
+        """
+        with self._lock:
+            c = self._columnas
+            fechas = c['fecha']
+            i = 0 if desde is None else bisect.bisect_left(fechas, desde)
+            j = len(fechas) if hasta is None else bisect.bisect_right(fechas, hasta)
+            tipos = {}
+            area = residuos = 0.0
+            if i < j:
+                area = c['area_acumulada'][j - 1] - (c['area_acumulada'][i - 1] if i else 0.0)
+                residuos = c['residuos_acumulados'][j - 1] - (c['residuos_acumulados'][i - 1] if i else 0.0)
+
+                def mes(fecha):
+                    return fecha[:7]
+
+                primero, ultimo = mes(fechas[i]), mes(fechas[j - 1])
+                # Registros del primer y del último mes, que pueden estar incompletos
+                k = bisect.bisect_right(fechas, primero, i, j, key=mes)
+                bordes = range(i, j) if primero == ultimo else [
+                    *range(i, k), *range(bisect.bisect_left(fechas, ultimo, k, j, key=mes), j)
+                ]
+                meses = self._periodos['M']
+                volumenes = [c['tipos_residuos'][n] or {} for n in bordes] + [
+                    meses.periodo(m)[3] for m in meses.entre(primero, ultimo, incluir=False)
+                ]
+                for volumen in volumenes:
+                    for tipo, valor in volumen.items():
+                        tipos[tipo] = tipos.get(tipo, 0.0) + valor
+            return {
+                'registros': max(j - i, 0),
+                'area': area,
+                'residuos': residuos,
+                'fgr': float(fgr_vectorizado(residuos, area)),
+                'tipos': tipos,
+            }
+
+    def memorizar(self, clave, construir):
+        """Resultado de ``construir()`` memorizado por clave hasta que cambie el proyecto
+
+        Se conservan los últimos MAX_MEMORIZADOS resultados; no modificarlos.
+        """
+        with self._lock:
+            if self._version_memo != self.version:
+                self._memo = {}
+                self._version_memo = self.version
+            if clave not in self._memo:
+                if len(self._memo) >= MAX_MEMORIZADOS:
+                    del self._memo[next(iter(self._memo))]
+                self._memo[clave] = construir()
+            return self._memo[clave]
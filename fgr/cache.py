@@ -0,0 +1,318 @@
+"""Conjunto de proyectos compartido por todas las sesiones del proceso.
+
+Las sesiones leen una instantánea inmutable del diccionario de proyectos. Las
+escrituras pasan por la caché, que las guarda en la base y publica una nueva
+instantánea; si otro proceso escribió entretanto, se recarga desde la base.
+Los análisis y los acumulados por período que ya recibió una sesión tampoco
+cambian: cada escritura los copia y reemplaza.
+Las escrituras pueden indicar la versión del proyecto que vio el usuario para
+detectar sesiones desactualizadas (ver almacenamiento.ConflictoEscritura).
+
+Al iniciar solo se lee el índice de proyectos: área, tipos de residuos y el
+resumen guardado de cada uno (avance, área, residuos, FGR, cantidad de
+registros y última fecha). Los registros de cada proyecto se leen la primera
+vez que se piden y se conservan en columnas (modelo.ColumnasProyecto), no como
+un diccionario por registro. Los módulos de análisis, que cargan pandas,
+se importan al construir el primer análisis o el portafolio.
+"""
+import threading
+
+from fgr import almacenamiento, metricas
+from fgr.calculos import acumular_resumen, completar_registro, resumir_proyecto
+
+
+def _entrada_indice(proyecto):
+    """Entrada del índice (ver almacenamiento.leer_indice) de un proyecto con sus registros"""
+    return dict(resumir_proyecto(proyecto), tipos_residuos=proyecto["tipos_residuos"])
+
+
+class CacheProyectos:
+    """Datos de proyectos cargados una vez por proceso e invalidados por versión"""
+
+    def __init__(self, ruta=almacenamiento.RUTA_BD):
+        self.ruta = ruta
+        self._lock = threading.RLock()
+        self._conexion = almacenamiento.conectar(ruta)
+        self._indice = {}
+        # Proyectos cuyos registros ya se leyeron, en la versión self._version
+        self._proyectos = {}
+        self._versiones = {}
+        self._analisis = {}
+        self._portafolio = None
+        self._version_portafolio = None
+        self._versiones_portafolio = None
+        self._pronostico = None
+        self._lock_pronostico = threading.Lock()
+        # Frecuencia -> {nombre: Acumulados}, mantenidos con cada registro nuevo
+        self._periodos = {}
+        self._version = None
+
+    @property
+    def version(self):
+        """Versión de los datos de la instantánea actual"""
+        with self._lock:
+            self._refrescar()
+            return self._version
+
+    def indice(self):
+        """Índice de proyectos y versión de cada proyecto, leídos juntos; no modificar"""
+        with self._lock:
+            self._refrescar()
+            return self._indice, self._versiones
+
+    @property
+    def proyectos(self):
+        """Instantánea de las columnas de registros de cada proyecto; no debe modificarse"""
+        return self.instantanea()[0]
+
+    def instantanea(self):
+        """Columnas de registros y versión de cada proyecto, leídas juntas"""
+        with self._lock:
+            self._refrescar()
+            self._cargar_todos()
+            return self._proyectos, self._versiones
+
+    def proyecto(self, nombre):
+        """Columnas de registros del proyecto; se leen de la base la primera vez que se piden"""
+        with self._lock:
+            while True:
+                self._refrescar()
+                if nombre in self._proyectos:
+                    return self._proyectos[nombre]
+                if nombre not in self._indice:
+                    raise KeyError(nombre)
+                with metricas.etapa('carga'):
+                    columnas, version, _ = almacenamiento.leer_columnas(self._conexion, [nombre])
+                # Si otro proceso escribió entretanto, se recarga el índice y se reintenta
+                if version == self._version:
+                    self._proyectos = {**self._proyectos, **columnas}
+                    return columnas[nombre]
+
+    def version_proyecto(self, nombre):
+        """Versión del proyecto en la instantánea actual, o None si no existe"""
+        with self._lock:
+            self._refrescar()
+            return self._versiones.get(nombre)
+
+    def analisis(self, nombre):
+        """Análisis incremental del proyecto, compartido entre sesiones"""
+        from fgr.analisis import AnalisisProyecto
+        with self._lock:
+            proyecto = self.proyecto(nombre)
+            if nombre not in self._analisis:
+                with metricas.etapa('relleno'):
+                    self._analisis[nombre] = AnalisisProyecto(
+                        proyecto.area_total, proyecto.a_registros()
+                    )
+            return self._analisis[nombre]
+
+    def portafolio(self):
+        """Registros de todos los proyectos en formato columnar, por versión"""
+        return self._portafolio_actual()[0]
+
+    def _portafolio_actual(self):
+        # Se construye fuera del bloqueo para no detener a las demás sesiones;
+        # devuelve también las versiones de los proyectos y de los datos usados
+        from fgr.portafolio import Portafolio
+        with self._lock:
+            self._refrescar()
+            if self._version_portafolio == self._version:
+                return self._portafolio, self._versiones_portafolio, self._version
+            self._cargar_todos()
+            proyectos, versiones, version = self._proyectos, self._versiones, self._version
+        with metricas.etapa('portafolio'):
+            portafolio = Portafolio(proyectos)
+        with self._lock:
+            if version == self._version:
+                self._portafolio, self._versiones_portafolio = portafolio, versiones
+                self._version_portafolio = version
+        return portafolio, versiones, version
+
+    def pronostico(self):
+        """Pronóstico de todo el portafolio; solo se reajustan los proyectos que cambiaron"""
+        from fgr.pronostico import PronosticoPortafolio
+        portafolio, versiones, _ = self._portafolio_actual()
+        with self._lock_pronostico:
+            if self._pronostico is None:
+                self._pronostico = PronosticoPortafolio()
+            with metricas.etapa('pronostico'):
+                self._pronostico.actualizar(portafolio, versiones)
+            return self._pronostico.ajuste
+
+    def periodos(self, frecuencia):
+        """Acumulados por período ('M' o 'Q') de todos los proyectos; no modificar"""
+        from fgr import periodos
+        with self._lock:
+            self._refrescar()
+            if frecuencia in self._periodos:
+                return self._periodos[frecuencia]
+        portafolio, _, version = self._portafolio_actual()
+        with metricas.etapa('periodos'):
+            acumulados = periodos.desde_portafolio(portafolio, frecuencia)
+        with self._lock:
+            # Si hubo escrituras entretanto, estos acumulados ya no se guardan
+            if version == self._version and frecuencia not in self._periodos:
+                self._periodos[frecuencia] = acumulados
+            return self._periodos.get(frecuencia, acumulados)
+
+    def portafolio_listo(self):
+        """True si el portafolio, su pronóstico y sus acumulados están al día con los datos"""
+        from fgr import periodos
+        with self._lock:
+            self._refrescar()
+            return (
+                self._version_portafolio == self._version
+                and self._pronostico is not None
+                and self._pronostico.versiones == self._versiones
+                and all(f in self._periodos for f in periodos.FRECUENCIAS.values())
+            )
+
+    def claves_periodo(self, frecuencia):
+        """Períodos con registros en algún proyecto, en orden cronológico"""
+        acumulados = self.periodos(frecuencia)
+        with self._lock:
+            return sorted({c for periodos_proyecto in acumulados.values() for c in periodos_proyecto.claves})
+
+    def reporte_periodo(self, frecuencia, clave):
+        """FGR del período en cada proyecto y residuos por tipo (ver periodos.reporte)"""
+        from fgr import periodos
+        acumulados = self.periodos(frecuencia)
+        with self._lock:
+            return periodos.reporte(acumulados, clave)
+
+    def _refrescar(self):
+        if almacenamiento.version_datos(self._conexion) != self._version:
+            with metricas.etapa('indice'):
+                self._indice, self._version, self._versiones = almacenamiento.leer_indice(self._conexion)
+            self._proyectos = {}
+            self._analisis = {}
+            self._periodos = {}
+
+    def _cargar_todos(self):
+        # Lee de una vez los registros de todos los proyectos
+        while len(self._proyectos) != len(self._indice):
+            with metricas.etapa('carga'):
+                proyectos, version, _ = almacenamiento.leer_columnas(self._conexion)
+            if version == self._version:
+                self._proyectos = proyectos
+            else:
+                # Otro proceso escribió después de leer el índice: se relee y se reintenta
+                self._refrescar()
+
+    def _publicar(self, version, indice, proyectos=None):
+        # Solo se aplican los cambios en memoria si nadie más escribió entretanto.
+        # ``indice`` tiene la entrada nueva de cada proyecto modificado (None si se
+        # eliminó) y ``proyectos`` los proyectos con sus registros, si se conocen
+        if self._version is not None and version == self._version + 1:
+            nuevo_indice, cargados, versiones = dict(self._indice), dict(self._proyectos), dict(self._versiones)
+            for nombre, entrada in indice.items():
+                if entrada is None:
+                    nuevo_indice.pop(nombre, None)
+                    cargados.pop(nombre, None)
+                    versiones.pop(nombre, None)
+                else:
+                    nuevo_indice[nombre] = entrada
+                    # Un proyecto nuevo empieza en 0; los demás cambios la incrementan
+                    versiones[nombre] = versiones[nombre] + 1 if nombre in versiones else 0
+            cargados.update(proyectos or {})
+            self._indice, self._proyectos, self._versiones = nuevo_indice, cargados, versiones
+            self._version = version
+            return True
+        self._version = None
+        return False
+
+    def crear_proyecto(self, nombre, area_total, tipos_residuos):
+        """Crea un proyecto vacío"""
+        from fgr import periodos
+        from fgr.modelo import ColumnasProyecto
+        with self._lock:
+            version = almacenamiento.crear_proyecto(nombre, area_total, tipos_residuos, self.ruta)
+            proyecto = {
+                "area_total": area_total,
+                "tipos_residuos": list(tipos_residuos),
+                "registros": []
+            }
+            self._publicar(
+                version, {nombre: _entrada_indice(proyecto)},
+                {nombre: ColumnasProyecto.vacias(area_total, tipos_residuos)}
+            )
+            self._periodos = {
+                frecuencia: {**acumulados, nombre: periodos.Acumulados(frecuencia)}
+                for frecuencia, acumulados in self._periodos.items()
+            }
+
+    def eliminar_proyecto(self, nombre, version_proyecto=None):
+        """Elimina un proyecto y sus registros; ``version_proyecto`` es la versión que se vio"""
+        with self._lock:
+            version = almacenamiento.eliminar_proyecto(nombre, self.ruta, version_proyecto)
+            self._publicar(version, {nombre: None})
+            self._analisis.pop(nombre, None)
+            self._periodos = {
+                frecuencia: {n: a for n, a in acumulados.items() if n != nombre}
+                for frecuencia, acumulados in self._periodos.items()
+            }
+
+    def agregar_registro(self, nombre, registro, version_proyecto=None):
+        """Agrega un registro manteniendo el orden por fecha"""
+        self.agregar_registros(
+            {nombre: [registro]}, None if version_proyecto is None else {nombre: version_proyecto}
+        )
+
+    def agregar_registros(self, registros_por_proyecto, versiones=None):
+        """Agrega registros de uno o más proyectos en una sola escritura
+
+        Con ``versiones`` (nombre -> versión vista) falla con ConflictoEscritura
+        si algún proyecto cambió desde entonces.
+        """
+        with self._lock:
+            version = almacenamiento.agregar_registros(registros_por_proyecto, self.ruta, versiones)
+            indice, cambios = {}, {}
+            for nombre, registros in registros_por_proyecto.items():
+                entrada = self._indice.get(nombre)
+                if entrada is not None:
+                    # Las mismas sumas que almacenamiento guardó en la tabla de resúmenes
+                    indice[nombre] = acumular_resumen(entrada, registros, entrada["area_total"])
+                proyecto = self._proyectos.get(nombre)
+                if proyecto is not None:
+                    # Columnas nuevas (la instantánea anterior no cambia), en orden por fecha
+                    cambios[nombre] = proyecto.agregar(registros)
+            if self._publicar(version, indice, cambios):
+                # Se agregan sobre copias: las sesiones conservan el análisis y los
+                # acumulados que ya recibieron
+                for nombre, registros in registros_por_proyecto.items():
+                    if nombre in self._analisis:
+                        analisis = self._analisis[nombre].copia()
+                        for registro in registros:
+                            analisis.agregar(registro)
+                        self._analisis[nombre] = analisis
+                    completos = [completar_registro(r, self._indice[nombre]["area_total"]) for r in registros]
+                    nuevos = {}
+                    for frecuencia, acumulados in self._periodos.items():
+                        if nombre in acumulados:
+                            periodos_proyecto = acumulados[nombre].copia()
+                            for registro in completos:
+                                periodos_proyecto.agregar(registro)
+                            acumulados = {**acumulados, nombre: periodos_proyecto}
+                        nuevos[frecuencia] = acumulados
+                    self._periodos = nuevos
+
+    def limpiar_registros(self, nombre, version_proyecto=None):
+        """Elimina todos los registros de un proyecto; ``version_proyecto`` es la versión que se vio"""
+        from fgr import periodos
+        from fgr.modelo import ColumnasProyecto
+        with self._lock:
+            version = almacenamiento.limpiar_registros(nombre, self.ruta, version_proyecto)
+            entrada = self._indice.get(nombre)
+            proyecto = self._proyectos.get(nombre)
+            self._publicar(
+                version,
+                {nombre: _entrada_indice(dict(entrada, registros=[]))} if entrada is not None else {},
+                {nombre: ColumnasProyecto.vacias(proyecto.area_total, proyecto.tipos_residuos)}
+                if proyecto is not None else {}
+            )
+            self._analisis.pop(nombre, None)
+            self._periodos = {
+                frecuencia: {**acumulados, nombre: periodos.Acumulados(frecuencia)}
+                if nombre in acumulados else acumulados
+                for frecuencia, acumulados in self._periodos.items()
+            }
@@ -0,0 +1,138 @@
+"""Cálculo del FGR y construcción de registros de avance."""
+
+# Campos de un registro en el mismo orden que el formato JSON original
+CAMPOS_REGISTRO = [
+    'fecha', 'porcentaje_avance', 'incremento_porcentaje', 'area_periodo',
+    'residuos_periodo', 'tipos_residuos', 'fgr_periodo'
+]
+
+
+def obtener_ultimo_avance(registros):
+    """Obtiene el último porcentaje de avance registrado"""
+    if not registros:
+        return 0.0
+    return max(registro["porcentaje_avance"] for registro in registros)
+
+
+def calcular_area_periodo(area_total, porcentaje_actual, porcentaje_anterior):
+    """Calcula el área construida en el período actual"""
+    incremento = porcentaje_actual - porcentaje_anterior
+    return area_total * (incremento / 100)
+
+
+def calcular_fgr(volumen_residuos, area_construida):
+    """Calcula el FGR (m³/m²)"""
+    if area_construida > 0:
+        return volumen_residuos / area_construida
+    return 0
+
+
+def fgr_vectorizado(volumen, area):
+    """Igual que calcular_fgr, elemento a elemento: 0 cuando el área no es positiva"""
+    import numpy as np
+    volumen = np.asarray(volumen, dtype=float)
+    area = np.asarray(area, dtype=float)
+    positiva = area > 0
+    return np.where(positiva, volumen / np.where(positiva, area, 1.0), 0.0)
+
+
+def crear_registro(fecha, porcentaje_avance, ultimo_avance, area_total, tipos_residuos):
+    """Construye un registro de avance con sus valores derivados
+
+    ``fecha`` es una cadena ISO (AAAA-MM-DD) y ``tipos_residuos`` un
+    diccionario de volumen (m³) por tipo de residuo.
+    """
+    area_periodo = calcular_area_periodo(area_total, porcentaje_avance, ultimo_avance)
+    residuos_periodo = sum(tipos_residuos.values())
+    return {
+        "fecha": fecha,
+        "porcentaje_avance": porcentaje_avance,
+        "incremento_porcentaje": porcentaje_avance - ultimo_avance,
+        "area_periodo": area_periodo,
+        "residuos_periodo": residuos_periodo,
+        "tipos_residuos": dict(tipos_residuos),
+        "fgr_periodo": calcular_fgr(residuos_periodo, area_periodo)
+    }
+
+
+def area_faltante(area_total, porcentaje_avance, incremento_porcentaje):
+    """Área del período de un registro antiguo sin area_periodo, según su incremento de avance
+
+    Acepta números o arreglos de NumPy. Es el único cálculo de este relleno: lo
+    usan completar_registro, el portafolio, la exportación y los resúmenes
+    que calcula SQLite.
+    """
+    return calcular_area_periodo(
+        area_total, porcentaje_avance, porcentaje_avance - incremento_porcentaje
+    )
+
+
+def completar_registro(registro, area_total):
+    """Devuelve el registro con area_periodo calculada si no la tenía"""
+    if "area_periodo" in registro:
+        return registro
+    return dict(
+        registro,
+        area_periodo=area_faltante(
+            area_total, registro["porcentaje_avance"], registro.get("incremento_porcentaje", 0)
+        )
+    )
+
+
+def recalcular_registros(registros, area_total):
+    """Recalcula los valores derivados de registros ordenados por fecha
+
+    El avance anterior de cada registro es el mayor avance de los registros
+    previos, igual que al registrarlo desde el formulario.
+    """
+    recalculados = []
+    ultimo_avance = 0.0
+    for registro in registros:
+        recalculados.append(crear_registro(
+            registro["fecha"], registro["porcentaje_avance"], ultimo_avance,
+            area_total, registro.get("tipos_residuos", {})
+        ))
+        ultimo_avance = max(ultimo_avance, registro["porcentaje_avance"])
+    return recalculados
+
+
+# Sumas que se guardan por proyecto; fgr_total y fgr_promedio se derivan de ellas
+CAMPOS_RESUMEN = ['registros', 'avance', 'area_construida', 'residuos', 'suma_fgr', 'ultima_fecha']
+RESUMEN_VACIO = {
+    "registros": 0, "avance": 0.0, "area_construida": 0.0, "residuos": 0.0,
+    "suma_fgr": 0.0, "ultima_fecha": None
+}
+
+
+def acumular_resumen(resumen, registros, area_total):
+    """Suma registros nuevos a un resumen (ver resumir_proyecto) sin recorrer los anteriores
+
+    Devuelve otro diccionario; las demás claves de ``resumen`` se conservan.
+    """
+    area, residuos, suma_fgr = resumen["area_construida"], resumen["residuos"], resumen["suma_fgr"]
+    ultima_fecha = resumen["ultima_fecha"]
+    for registro in registros:
+        registro = completar_registro(registro, area_total)
+        area += registro["area_periodo"]
+        residuos += registro.get("residuos_periodo", 0.0)
+        suma_fgr += registro.get("fgr_periodo", 0.0)
+        if ultima_fecha is None or registro["fecha"] > ultima_fecha:
+            ultima_fecha = registro["fecha"]
+    cantidad = resumen["registros"] + len(registros)
+    return dict(
+        resumen,
+        area_total=area_total,
+        registros=cantidad,
+        avance=max(resumen["avance"], obtener_ultimo_avance(registros)),
+        area_construida=area,
+        residuos=residuos,
+        suma_fgr=suma_fgr,
+        fgr_total=calcular_fgr(residuos, area),
+        fgr_promedio=suma_fgr / cantidad if cantidad else 0.0,
+        ultima_fecha=ultima_fecha
+    )
+
+
+def resumir_proyecto(proyecto):
+    """Indicadores acumulados de un proyecto a partir de sus registros"""
+    return acumular_resumen(RESUMEN_VACIO, proyecto["registros"], proyecto["area_total"])
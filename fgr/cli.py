@@ -0,0 +1,152 @@
+"""Línea de comandos del seguimiento FGR.
+
+No importa Streamlit ni Plotly, y pandas solo se carga en los comandos que lo
+necesitan, para que las tareas programadas arranquen rápido.
+
+Uso:
+    python -m fgr reporte [--salida reporte.csv]
+    python -m fgr validar
+    python -m fgr recalcular [--aplicar]
+    python -m fgr importar registros.csv [--proyecto NOMBRE] [--errores errores.csv]
+    python -m fgr exportar portafolio.parquet [--proyecto NOMBRE]
+"""
+import argparse
+import csv
+import math
+import sys
+
+from fgr import almacenamiento
+from fgr.calculos import recalcular_registros
+
+COLUMNAS_REPORTE = [
+    'proyecto', 'area_total', 'registros', 'avance', 'area_construida',
+    'residuos', 'fgr_total', 'fgr_promedio', 'ultima_fecha'
+]
+CAMPOS_DERIVADOS = [
+    'incremento_porcentaje', 'area_periodo', 'residuos_periodo', 'fgr_periodo'
+]
+
+
+def comando_reporte(args):
+    """Imprime o guarda en CSV los indicadores de cada proyecto"""
+    # Los resúmenes guardados evitan leer los registros
+    filas = (
+        dict(resumen, proyecto=nombre)
+        for nombre, resumen in almacenamiento.cargar_indice(args.bd).items()
+        if args.proyecto is None or nombre in args.proyecto
+    )
+    salida = open(args.salida, 'w', newline='', encoding='utf-8') if args.salida else sys.stdout
+    try:
+        escritor = csv.DictWriter(salida, fieldnames=COLUMNAS_REPORTE, extrasaction='ignore')
+        escritor.writeheader()
+        escritor.writerows(filas)
+    finally:
+        if args.salida:
+            salida.close()
+    return 0
+
+
+def problemas_proyecto(nombre, proyecto):
+    """Lista de (fecha, problema) que incumplen las reglas del formulario"""
+    problemas = []
+    tipos = set(proyecto["tipos_residuos"])
+    recalculados = recalcular_registros(proyecto["registros"], proyecto["area_total"])
+    ultimo_avance = 0.0
+    for registro, esperado in zip(proyecto["registros"], recalculados):
+        fecha = registro["fecha"]
+        if registro["porcentaje_avance"] > 100:
+            problemas.append((fecha, "El porcentaje de avance es mayor a 100%"))
+        if registro["porcentaje_avance"] <= ultimo_avance:
+            problemas.append((fecha, "El porcentaje de avance no es mayor al registrado antes"))
+        ultimo_avance = max(ultimo_avance, registro["porcentaje_avance"])
+        no_configurados = set(registro.get("tipos_residuos", {})) - tipos
+        if no_configurados:
+            problemas.append((fecha, f"Tipos de residuo no configurados: {', '.join(sorted(no_configurados))}"))
+        if not registro.get("tipos_residuos"):
+            problemas.append((fecha, "No tiene residuos registrados"))
+        for campo in CAMPOS_DERIVADOS:
+            if campo not in registro:
+                problemas.append((fecha, f"Falta el campo {campo}"))
+            elif not math.isclose(registro[campo], esperado[campo], rel_tol=1e-9, abs_tol=1e-12):
+                problemas.append((fecha, f"{campo} no coincide con el valor recalculado"))
+    return problemas
+
+
+def comando_validar(args):
+    """Revisa la consistencia de los registros guardados"""
+    total = 0
+    for nombre, proyecto in almacenamiento.iterar_proyectos(args.bd, args.proyecto):
+        for fecha, problema in problemas_proyecto(nombre, proyecto):
+            print(f"{nombre}\t{fecha}\t{problema}")
+            total += 1
+    print(f"{total} problemas encontrados", file=sys.stderr)
+    return 1 if total else 0
+
+
+def comando_recalcular(args):
+    """Recalcula los valores derivados y, con --aplicar, los guarda"""
+    cambios, versiones = {}, {}
+    for nombre, proyecto in almacenamiento.iterar_proyectos(args.bd, args.proyecto, versiones):
+        recalculados = recalcular_registros(proyecto["registros"], proyecto["area_total"])
+        if recalculados != proyecto["registros"]:
+            cambios[nombre] = recalculados
+    modificados = sum(len(registros) for registros in cambios.values())
+    print(f"{len(cambios)} proyectos con valores derivados desactualizados ({modificados} registros)")
+    if args.aplicar and cambios:
+        try:
+            # Falla si otro proceso modificó algún proyecto después de leerlo
+            almacenamiento.reemplazar_registros(
+                cambios, args.bd, {nombre: versiones[nombre] for nombre in cambios}
+            )
+        except almacenamiento.ConflictoEscritura as error:
+            print(f"No se guardaron los cambios: {error}", file=sys.stderr)
+            return 1
+        print("Cambios guardados")
+    return 0
+
+
+def comando_importar(args):
+    from fgr import importacion
+    return importacion.main(['--bd', args.bd] + args.argumentos, prog='fgr importar')
+
+
+def comando_exportar(args):
+    from fgr import exportacion
+    return exportacion.main(['--bd', args.bd] + args.argumentos, prog='fgr exportar')
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog='fgr', description="Seguimiento del FGR de proyectos de construcción")
+    parser.add_argument('--bd', default=almacenamiento.RUTA_BD, help="base de datos de proyectos")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    reporte = comandos.add_parser('reporte', help="indicadores acumulados por proyecto")
+    reporte.add_argument('--salida', help="archivo CSV de salida (por defecto, la consola)")
+    reporte.add_argument('--proyecto', action='append', help="solo este proyecto (repetible)")
+    reporte.set_defaults(funcion=comando_reporte)
+
+    validar = comandos.add_parser('validar', help="revisa la consistencia de los registros")
+    validar.add_argument('--proyecto', action='append', help="solo este proyecto (repetible)")
+    validar.set_defaults(funcion=comando_validar)
+
+    recalcular = comandos.add_parser('recalcular', help="recalcula área, residuos y FGR de cada registro")
+    recalcular.add_argument('--proyecto', action='append', help="solo este proyecto (repetible)")
+    recalcular.add_argument('--aplicar', action='store_true', help="guarda los valores recalculados")
+    recalcular.set_defaults(funcion=comando_recalcular)
+
+    # Sus argumentos se pasan tal cual a los módulos de importación y exportación
+    importar = comandos.add_parser('importar', help="importa registros desde CSV o Excel", add_help=False)
+    importar.set_defaults(funcion=comando_importar)
+
+    exportar = comandos.add_parser('exportar', help="exporta registros a CSV, Parquet o Excel", add_help=False)
+    exportar.set_defaults(funcion=comando_exportar)
+    return parser
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args, argumentos = parser.parse_known_args(argv)
+    if argumentos and args.comando not in ('importar', 'exportar'):
+        parser.error(f"argumentos no reconocidos: {' '.join(argumentos)}")
+    args.argumentos = argumentos
+    return args.funcion(args)
@@ -0,0 +1,259 @@
+"""Exportación de registros a CSV, Parquet o Excel.
+
+Los proyectos se reciben como pares (nombre, modelo.ColumnasProyecto) y se
+agrupan en lotes de unas FILAS_POR_BLOQUE filas; las columnas de cada lote se
+unen y se escriben como un bloque, de modo que exportar todo el portafolio no
+requiere construir una única tabla con todos los registros. El destino puede
+ser un archivo o un búfer en memoria.
+
+Uso:
+    python -m fgr.exportacion portafolio.parquet
+    python -m fgr.exportacion edificio.xlsx --proyecto "Edificio A"
+"""
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from fgr import almacenamiento
+from fgr.calculos import area_faltante
+from fgr.formatos import FORMATOS, formatos_disponibles
+
+FILAS_POR_BLOQUE = 100_000
+# Límite de filas de una hoja de Excel, sin contar los encabezados
+FILAS_POR_HOJA = 1_048_575
+
+
+def tabla_registros(df):
+    """Tabla de registros con los nombres de columna que se muestran al usuario"""
+    return pd.DataFrame({
+        'Fecha': df['fecha'].dt.strftime('%Y-%m-%d'),
+        'Avance (%)': df['porcentaje_avance'],
+        'Incremento (%)': df['incremento_porcentaje'],
+        'Área del Período (m²)': df['area_periodo'].round(2),
+        'Área Acumulada (m²)': df['area_acumulada'].round(2),
+        'Residuos del Período (m³)': df['residuos_periodo'].round(2),
+        'Residuos Acumulados (m³)': df['residuos_acumulados'].round(2),
+        'FGR del Período (m³/m²)': df['fgr_periodo'].round(3),
+        'FGR Acumulado (m³/m²)': df['fgr_acumulado'].round(3)
+    })
+
+
+def tabla_proyectos(proyectos, tipos, con_proyecto=True):
+    """Tabla de registros de varios proyectos (pares nombre, modelo.ColumnasProyecto)
+
+    Tiene una columna por tipo de residuo de ``tipos``, que fija el esquema
+    de toda la exportación. Las columnas de todos los proyectos se unen y los
+    acumulados se calculan por proyecto con agrupaciones, como en el
+    portafolio, sin construir un AnalisisProyecto por proyecto.
+    """
+    nombres = [nombre for nombre, _ in proyectos]
+    columnas = [c for _, c in proyectos]
+    proyecto = np.repeat(np.arange(len(nombres)), [len(c) for c in columnas])
+    # Por proyecto y fecha; lexsort es estable, como el orden de AnalisisProyecto
+    fecha = np.concatenate([c.fechas for c in columnas])
+    orden = np.lexsort((fecha, proyecto))
+    proyecto, fecha = proyecto[orden], fecha[orden]
+
+    def unir(campo, ausente=np.nan):
+        # Los campos ausentes de registros antiguos son NaN en las columnas
+        valores = np.concatenate([c.columnas[campo] for c in columnas])[orden]
+        return np.where(np.isnan(valores), ausente, valores)
+
+    avance = unir('porcentaje_avance')
+    incremento = unir('incremento_porcentaje', 0.0)
+    # Los registros antiguos sin área la obtienen del incremento (calculos.area_faltante)
+    area_periodo = unir('area_periodo')
+    faltante = np.isnan(area_periodo)
+    if faltante.any():
+        area_total = np.array([float(c.area_total) for c in columnas])[proyecto]
+        area_periodo[faltante] = area_faltante(area_total[faltante], avance[faltante], incremento[faltante])
+    residuos = unir('residuos_periodo', 0.0)
+    # Sumas secuenciales por proyecto, iguales a las de AnalisisProyecto
+    area_acumulada = pd.Series(area_periodo).groupby(proyecto).cumsum().to_numpy()
+    residuos_acumulados = pd.Series(residuos).groupby(proyecto).cumsum().to_numpy()
+
+    df = pd.DataFrame({
+        'fecha': fecha,
+        'porcentaje_avance': avance,
+        'incremento_porcentaje': incremento,
+        'area_periodo': area_periodo,
+        'area_acumulada': area_acumulada,
+        'residuos_periodo': residuos,
+        'residuos_acumulados': residuos_acumulados,
+        'fgr_periodo': unir('fgr_periodo', 0.0),
+        'fgr_acumulado': residuos_acumulados / np.where(area_acumulada != 0, area_acumulada, np.inf),
+    })
+
+    # Volumen por tipo: una fila por registro y una columna por tipo exportado;
+    # los tipos no registrados en un período valen 0
+    volumenes = []
+    for c in columnas:
+        filas = {tipo: i for i, tipo in enumerate(c.tipos)}
+        bloque = np.zeros((len(c), len(tipos)))
+        for j, tipo in enumerate(tipos):
+            if tipo in filas:
+                bloque[:, j] = c.volumenes[filas[tipo]]
+        volumenes.append(bloque)
+    volumenes = np.concatenate(volumenes)[orden]
+
+    tabla = pd.concat([
+        tabla_registros(df),
+        pd.DataFrame(volumenes, columns=tipos).fillna(0.0).round(2).add_suffix(' (m³)')
+    ], axis=1)
+    if con_proyecto:
+        tabla.insert(0, 'Proyecto', np.array(nombres, dtype=object)[proyecto])
+    return tabla
+
+
+def tipos_de(proyectos):
+    """Unión ordenada de los tipos de residuos de los proyectos
+
+    Incluye los tipos configurados y también los registrados que ya no están
+    configurados, para no perder sus volúmenes.
+    """
+    tipos = {}
+    for _, proyecto in proyectos:
+        tipos.update(dict.fromkeys(proyecto.tipos_residuos))
+        tipos.update(dict.fromkeys(proyecto.tipos))
+    return list(tipos)
+
+
+def bloques(proyectos, tipos, con_proyecto=True, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Genera tablas de unas ``filas_por_bloque`` filas a partir de (nombre, proyecto)"""
+    for lote in lotes(proyectos, filas_por_bloque):
+        yield tabla_proyectos(lote, tipos, con_proyecto)
+
+
+def escribir_csv(tablas, destino):
+    """Escribe las tablas una tras otra en un único CSV"""
+    encabezado = True
+    for tabla in tablas:
+        tabla.to_csv(destino, index=False, header=encabezado, encoding='utf-8')
+        encabezado = False
+
+
+def escribir_parquet(tablas, destino):
+    """Escribe cada tabla como un grupo de filas de Parquet"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    try:
+        for tabla in tablas:
+            tabla_arrow = pa.Table.from_pandas(tabla, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(destino, tabla_arrow.schema)
+            escritor.write_table(tabla_arrow.cast(escritor.schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def escribir_excel(tablas, destino):
+    """Escribe las tablas en hojas de Excel, pasando a una hoja nueva al llegar al límite"""
+    with pd.ExcelWriter(destino, engine='openpyxl') as escritor:
+        hoja, fila = 1, 0
+        for tabla in tablas:
+            while len(tabla):
+                parte = tabla.iloc[:FILAS_POR_HOJA - fila]
+                parte.to_excel(
+                    escritor, sheet_name=f"Registros {hoja}" if hoja > 1 else "Registros",
+                    index=False, header=fila == 0, startrow=fila + 1 if fila else 0
+                )
+                fila += len(parte)
+                tabla = tabla.iloc[len(parte):]
+                if fila >= FILAS_POR_HOJA:
+                    hoja, fila = hoja + 1, 0
+
+
+ESCRITORES = {'csv': escribir_csv, 'parquet': escribir_parquet, 'excel': escribir_excel}
+
+
+def exportar(proyectos, destino, formato, con_proyecto=True, tipos=None):
+    """Exporta los registros de los proyectos (pares nombre, proyecto) al destino
+
+    Si no se indican los tipos de residuos, ``proyectos`` debe poder recorrerse
+    dos veces para obtenerlos.
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato}")
+    if tipos is None:
+        tipos = tipos_de(proyectos)
+    ESCRITORES[formato](bloques(proyectos, tipos, con_proyecto), destino)
+
+
+def exportar_a_bytes(proyectos, formato, con_proyecto=True):
+    """Exporta a un búfer en memoria, por ejemplo para st.download_button"""
+    destino = io.BytesIO()
+    exportar(proyectos, destino, formato, con_proyecto)
+    return destino.getvalue()
+
+
+def lotes(proyectos, filas_por_lote=FILAS_POR_BLOQUE):
+    """Agrupa pares (nombre, proyecto) con registros en listas de unas ``filas_por_lote`` filas"""
+    lote, filas = [], 0
+    for nombre, proyecto in proyectos:
+        if not len(proyecto):
+            continue
+        lote.append((nombre, proyecto))
+        filas += len(proyecto)
+        if filas >= filas_por_lote:
+            yield lote
+            lote, filas = [], 0
+    if lote:
+        yield lote
+
+
+def tablas_de_lote(argumentos):
+    """Tablas de un lote de proyectos; se ejecuta en otro proceso (ver tareas.ControlTarea.mapa)"""
+    lote, tipos, con_proyecto = argumentos
+    return list(bloques(lote, tipos, con_proyecto))
+
+
+def exportar_en_tarea(control, proyectos, formato, con_proyecto=True):
+    """Como exportar_a_bytes, dentro de una tarea en segundo plano
+
+    Con más de un lote, las tablas se construyen en paralelo en el grupo de
+    procesos del gestor de tareas y se escriben en orden a medida que llegan.
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato}")
+    proyectos = list(proyectos)
+    tipos = tipos_de(proyectos)
+    argumentos = [(lote, tipos, con_proyecto) for lote in lotes(proyectos)]
+    if len(argumentos) > 1:
+        resultados = control.mapa(tablas_de_lote, argumentos)
+    else:
+        resultados = map(tablas_de_lote, argumentos)
+    destino = io.BytesIO()
+    ESCRITORES[formato]((tabla for tablas in resultados for tabla in tablas), destino)
+    return destino.getvalue()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Exporta los registros de los proyectos")
+    parser.add_argument('destino', help="archivo de salida (.csv, .parquet o .xlsx)")
+    parser.add_argument('--formato', choices=list(FORMATOS))
+    parser.add_argument('--proyecto', action='append', help="exporta solo este proyecto (repetible)")
+    parser.add_argument('--bd', default=almacenamiento.RUTA_BD)
+    args = parser.parse_args(argv)
+
+    formato = args.formato
+    if formato is None:
+        extension = os.path.splitext(args.destino)[1].lower().lstrip('.')
+        formato = next((f for f, (ext, _, _) in FORMATOS.items() if ext == extension), 'csv')
+    if formato not in formatos_disponibles():
+        parser.error(f"El formato {formato} requiere instalar {FORMATOS[formato][2]}")
+
+    # Los tipos se obtienen en SQLite; luego los registros se leen de a un proyecto
+    tipos = almacenamiento.listar_tipos(args.bd, args.proyecto)
+    exportar(almacenamiento.iterar_columnas(args.bd, args.proyecto), args.destino, formato, tipos=tipos)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
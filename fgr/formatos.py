@@ -0,0 +1,21 @@
+"""Formatos de exportación y sus dependencias opcionales.
+
+Están separados de fgr.exportacion para que la aplicación pueda ofrecer los
+formatos sin importar pandas.
+"""
+import importlib.util
+
+# Formato: (extensión, tipo MIME, módulo opcional requerido)
+FORMATOS = {
+    'csv': ('csv', 'text/csv', None),
+    'parquet': ('parquet', 'application/vnd.apache.parquet', 'pyarrow'),
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'openpyxl'),
+}
+
+
+def formatos_disponibles():
+    """Formatos cuyas dependencias opcionales están instaladas"""
+    return [
+        formato for formato, (_, _, modulo) in FORMATOS.items()
+        if modulo is None or importlib.util.find_spec(modulo) is not None
+    ]
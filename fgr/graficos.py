@@ -0,0 +1,157 @@
+"""Gráficos de análisis de un proyecto.
+
+Las series largas se reducen antes de construir la figura: en resolución
+automática las líneas se muestrean con LTTB (Largest-Triangle-Three-Buckets),
+que conserva la forma de la serie, y las barras se agregan por semana o mes.
+Al ampliar un período corto se vuelven a mostrar todos los puntos.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from fgr.calculos import fgr_vectorizado
+
+# Puntos por serie a partir de los cuales se reduce la resolución
+MAX_PUNTOS = 1000
+GRAFICOS = ['FGR', 'Avance y Área', 'Residuos por Tipo']
+# Resolución: frecuencia de agregación (None conserva los registros)
+RESOLUCIONES = {'Automática': None, 'Semanal': 'W', 'Mensual': 'M', 'Completa': None}
+
+
+def lttb(x, y, puntos=MAX_PUNTOS):
+    """Índices de los ``puntos`` elegidos por LTTB; todos si la serie es más corta"""
+    n = len(y)
+    if n <= puntos or puntos < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # El primer y el último punto se conservan; el resto se divide en puntos - 2 grupos
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(int)
+    indices = np.empty(puntos, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente = slice(fin, bordes[i + 2]) if i + 2 < len(bordes) else slice(n - 1, n)
+        x_medio, y_medio = x[siguiente].mean(), y[siguiente].mean()
+        # Área del triángulo entre el punto elegido anterior, cada candidato y el promedio siguiente
+        area = np.abs(
+            (x[a] - x_medio) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (y_medio - y[a])
+        )
+        a = inicio + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def frecuencia_automatica(fechas, maximo=MAX_PUNTOS):
+    """Frecuencia de agregación para no superar ``maximo`` barras, o None si no hace falta"""
+    if len(fechas) <= maximo:
+        return None
+    semanas = (fechas.iloc[-1] - fechas.iloc[0]).days / 7
+    return 'W' if semanas <= maximo else 'M'
+
+
+def _periodo(fechas, frecuencia):
+    return fechas.dt.to_period(frecuencia).dt.start_time.rename('fecha')
+
+
+def agrupar_registros(df, frecuencia):
+    """Registros agregados por período: sumas del período y último acumulado"""
+    agrupado = df.groupby(_periodo(df['fecha'], frecuencia)).agg(
+        porcentaje_avance=('porcentaje_avance', 'max'),
+        area_periodo=('area_periodo', 'sum'),
+        residuos_periodo=('residuos_periodo', 'sum'),
+        fgr_acumulado=('fgr_acumulado', 'last'),
+    )
+    agrupado['fgr_periodo'] = fgr_vectorizado(agrupado['residuos_periodo'], agrupado['area_periodo'])
+    return agrupado.reset_index()
+
+
+def _linea(df, columna, nombre, resolucion, **kwargs):
+    if resolucion == 'Automática':
+        df = df.iloc[lttb(df['fecha'].to_numpy().astype('int64'), df[columna].to_numpy())]
+    modo = 'lines+markers' if len(df) <= MAX_PUNTOS else 'lines'
+    return go.Scatter(x=df['fecha'], y=df[columna], mode=modo, name=nombre, **kwargs)
+
+
+def figura_fgr(df, resolucion):
+    """FGR por período y acumulado"""
+    if RESOLUCIONES[resolucion]:
+        df = agrupar_registros(df, RESOLUCIONES[resolucion])
+    fig = go.Figure()
+    fig.add_trace(_linea(df, 'fgr_periodo', 'FGR por Período', resolucion))
+    fig.add_trace(_linea(df, 'fgr_acumulado', 'FGR Acumulado', resolucion))
+    fig.update_layout(
+        title='FGR por Período y Acumulado',
+        xaxis_title='Fecha',
+        yaxis_title='FGR (m³/m²)'
+    )
+    return fig
+
+
+def figura_avance(df, resolucion):
+    """Área construida por período (barras) y porcentaje de avance (línea)"""
+    barras = df
+    if RESOLUCIONES[resolucion]:
+        df = barras = agrupar_registros(df, RESOLUCIONES[resolucion])
+    elif resolucion == 'Automática':
+        frecuencia = frecuencia_automatica(df['fecha'])
+        if frecuencia:
+            barras = agrupar_registros(df, frecuencia)
+
+    fig = go.Figure()
+    # Barra para área construida (eje izquierdo)
+    fig.add_trace(go.Bar(
+        x=barras['fecha'],
+        y=barras['area_periodo'],
+        name='Área Construida por Período (m²)',
+        yaxis='y'
+    ))
+    # Línea para porcentaje de avance (eje derecho)
+    fig.add_trace(_linea(df, 'porcentaje_avance', 'Avance (%)', resolucion, yaxis='y2'))
+    fig.update_layout(
+        title='Avance y Área Construida',
+        xaxis_title='Fecha',
+        yaxis=dict(
+            title='Área Construida por Período (m²)',
+            side='left'
+        ),
+        yaxis2=dict(
+            title='Avance (%)',
+            side='right',
+            overlaying='y',
+            range=[0, 100]  # Fija el rango del eje derecho de 0 a 100%
+        )
+    )
+    return fig
+
+
+def figura_residuos(tipos, resolucion):
+    """Volumen por tipo de residuo en barras apiladas; None si no hay datos"""
+    if tipos.empty:
+        return None
+    frecuencia = RESOLUCIONES[resolucion]
+    if resolucion == 'Automática':
+        frecuencia = frecuencia_automatica(pd.Series(pd.to_datetime(tipos.index)))
+    if frecuencia:
+        fechas = pd.Series(pd.to_datetime(tipos.index), index=tipos.index)
+        tipos = tipos.groupby(_periodo(fechas, frecuencia)).sum().rename_axis(None)
+    return px.bar(
+        tipos,
+        title='Residuos por Tipo',
+        labels={'value': 'Volumen (m³)', 'index': 'Fecha'}
+    )
+
+
+def construir(grafico, analisis, resolucion, rango=None):
+    """Figura ``grafico`` del proyecto, limitada al rango de fechas (inicio, fin) si se indica"""
+    if grafico == 'Residuos por Tipo':
+        tipos = analisis.residuos_por_tipo()
+        if rango is not None:
+            tipos = tipos.loc[(tipos.index >= str(rango[0])) & (tipos.index <= str(rango[1]))]
+        return figura_residuos(tipos, resolucion)
+    df = analisis.dataframe()
+    if rango is not None:
+        df = df.loc[df['fecha'].between(pd.Timestamp(rango[0]), pd.Timestamp(rango[1]))]
+    return figura_fgr(df, resolucion) if grafico == 'FGR' else figura_avance(df, resolucion)
@@ -0,0 +1,220 @@
+"""Importación masiva de registros de avance y residuos desde CSV o Excel.
+
+El archivo tiene una fila por período con las columnas ``proyecto`` (opcional
+si se indica el proyecto al importar), ``fecha``, ``porcentaje_avance`` y una
+columna por tipo de residuo con el volumen en m³. Se lee por bloques y a cada
+bloque se le aplican de forma vectorizada las mismas reglas que al formulario
+"Registrar Avance". Las filas válidas se guardan juntas en una sola escritura.
+
+Uso:
+    python -m fgr.importacion registros.csv --proyecto "Edificio A" --errores errores.csv
+"""
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from fgr import almacenamiento
+from fgr.calculos import fgr_vectorizado, obtener_ultimo_avance
+
+COLUMNAS_BASE = ['proyecto', 'fecha', 'porcentaje_avance']
+TAMANO_BLOQUE = 10_000
+
+
+@dataclass
+class ResultadoImportacion:
+    """Registros válidos por proyecto y reporte de errores por fila"""
+    registros: dict = field(default_factory=dict)
+    errores: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=['fila', 'proyecto', 'error'])
+    )
+    filas: int = 0
+    segundos: float = 0.0
+
+    @property
+    def importadas(self):
+        return sum(len(registros) for registros in self.registros.values())
+
+    @property
+    def filas_por_segundo(self):
+        return self.filas / self.segundos if self.segundos > 0 else float('inf')
+
+
+def leer_bloques(fuente, tamano_bloque=TAMANO_BLOQUE, formato=None):
+    """Itera el archivo en bloques de filas; el índice es el número de fila de datos"""
+    if formato is None:
+        nombre = str(getattr(fuente, 'name', fuente)).lower()
+        formato = 'excel' if nombre.endswith(('.xlsx', '.xls')) else 'csv'
+    if formato == 'csv':
+        yield from pd.read_csv(fuente, chunksize=tamano_bloque)
+    else:
+        # pandas no lee Excel por bloques: se lee la hoja y se valida por partes
+        hoja = pd.read_excel(fuente)
+        for inicio in range(0, len(hoja), tamano_bloque):
+            yield hoja.iloc[inicio:inicio + tamano_bloque]
+
+
+def _avance_inicial(proyecto):
+    # Un proyecto con sus registros o una entrada del índice (almacenamiento.leer_indice)
+    if "avance" in proyecto:
+        return proyecto["avance"]
+    return obtener_ultimo_avance(proyecto["registros"])
+
+
+def validar_bloque(bloque, proyectos, ultimo_avance, proyecto=None):
+    """Valida un bloque y construye sus registros
+
+    ``ultimo_avance`` guarda el último avance aceptado por proyecto y se
+    actualiza para que el siguiente bloque continúe la secuencia.
+    Devuelve (registros por proyecto, DataFrame de errores).
+    """
+    bloque = bloque.rename(columns=lambda c: str(c).strip())
+    if proyecto is not None and 'proyecto' not in bloque.columns:
+        bloque = bloque.assign(proyecto=proyecto)
+    for columna in COLUMNAS_BASE:
+        if columna not in bloque.columns:
+            raise ValueError(f"Falta la columna obligatoria '{columna}'")
+    tipos = [c for c in bloque.columns if c not in COLUMNAS_BASE]
+
+    nombres = bloque['proyecto'].astype(str).str.strip()
+    fechas = pd.to_datetime(bloque['fecha'], errors='coerce')
+    porcentajes = pd.to_numeric(bloque['porcentaje_avance'], errors='coerce')
+    crudos = bloque[tipos]
+    volumenes = crudos.apply(pd.to_numeric, errors='coerce')
+    volumen_invalido = (volumenes.isna() & crudos.notna()) | (volumenes < 0)
+    volumenes = volumenes.fillna(0.0).to_numpy(dtype=float)
+
+    # Matriz proyecto × tipo de los tipos configurados en cada proyecto
+    codigos, unicos = pd.factorize(nombres)
+    existe = np.array([nombre in proyectos for nombre in unicos], dtype=bool)
+    permitido = np.array(
+        [[tipo in proyectos[nombre]["tipos_residuos"] if nombre in proyectos else False
+          for tipo in tipos] for nombre in unicos],
+        dtype=bool
+    ).reshape(len(unicos), len(tipos))
+    no_configurado = (volumenes > 0) & ~permitido[codigos]
+
+    reglas = [
+        (~existe[codigos], "Proyecto inexistente"),
+        (fechas.isna().to_numpy(), "Fecha inválida"),
+        (porcentajes.isna().to_numpy(), "Porcentaje de avance inválido"),
+        ((porcentajes > 100).to_numpy(), "El porcentaje de avance no puede ser mayor a 100%"),
+        (volumen_invalido.to_numpy().any(axis=1), "Volumen de residuo inválido"),
+        (no_configurado.any(axis=1), "Tipo de residuo no configurado en el proyecto"),
+        (~(volumenes > 0).any(axis=1), "Debe registrar al menos un tipo de residuo"),
+    ]
+    error = np.select([m for m, _ in reglas], [e for _, e in reglas], default='').astype(object)
+
+    # El avance debe crecer respecto del último aceptado, en el orden del archivo,
+    # como si cada fila se registrara en el formulario: así el resultado no
+    # depende del tamaño de bloque
+    valido = porcentajes.reset_index(drop=True).where(error == '')
+    anterior = valido.groupby(codigos).cummax().groupby(codigos).shift().groupby(codigos).ffill()
+    inicial = np.array([
+        ultimo_avance.setdefault(nombre, _avance_inicial(proyectos[nombre]))
+        if nombre in proyectos else np.nan
+        for nombre in unicos
+    ], dtype=float)
+    anterior = np.fmax(anterior.to_numpy(), inicial[codigos])
+    no_creciente = (valido.to_numpy() <= anterior)
+    error[no_creciente] = "El porcentaje de avance debe ser mayor al último registrado"
+
+    aceptado = error == ''
+    filas = np.flatnonzero(aceptado)
+    porcentaje = porcentajes.to_numpy()[filas]
+    anterior = anterior[aceptado]
+    area_total = np.array(
+        [proyectos[nombre]["area_total"] if nombre in proyectos else np.nan for nombre in unicos]
+    )[codigos[filas]]
+    incremento = porcentaje - anterior
+    area_periodo = area_total * (incremento / 100)
+
+    registros = {}
+    tipos_fila = [
+        {tipo: v for tipo, v in zip(tipos, fila) if v > 0}
+        for fila in volumenes[filas].tolist()
+    ]
+    residuos = np.array([sum(t.values()) for t in tipos_fila], dtype=float)
+    fgr = fgr_vectorizado(residuos, area_periodo)
+    fechas_iso = fechas.dt.strftime('%Y-%m-%d').to_numpy()[filas]
+    for i, fila in enumerate(filas):
+        nombre = unicos[codigos[fila]]
+        registros.setdefault(nombre, []).append({
+            "fecha": fechas_iso[i],
+            "porcentaje_avance": float(porcentaje[i]),
+            "incremento_porcentaje": float(incremento[i]),
+            "area_periodo": float(area_periodo[i]),
+            "residuos_periodo": float(residuos[i]),
+            "tipos_residuos": tipos_fila[i],
+            "fgr_periodo": float(fgr[i])
+        })
+    for nombre, nuevos in registros.items():
+        ultimo_avance[nombre] = nuevos[-1]["porcentaje_avance"]
+
+    rechazadas = ~aceptado
+    errores = pd.DataFrame({
+        # Número de fila en el archivo, contando la fila de encabezados
+        'fila': bloque.index.to_numpy()[rechazadas] + 2,
+        'proyecto': nombres.to_numpy()[rechazadas],
+        'error': error[rechazadas],
+    })
+    return registros, errores
+
+
+def importar(fuente, proyectos, proyecto=None, tamano_bloque=TAMANO_BLOQUE, formato=None, progreso=None):
+    """Valida el archivo completo por bloques sin guardar nada
+
+    ``proyectos`` puede tener los registros de cada proyecto o ser el índice
+    de almacenamiento.leer_indice, que basta para validar. ``progreso``, si
+    se indica, se llama con las filas leídas tras cada bloque.
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacion()
+    ultimo_avance = {}
+    errores = []
+    for bloque in leer_bloques(fuente, tamano_bloque, formato):
+        registros, errores_bloque = validar_bloque(bloque, proyectos, ultimo_avance, proyecto)
+        for nombre, nuevos in registros.items():
+            resultado.registros.setdefault(nombre, []).extend(nuevos)
+        errores.append(errores_bloque)
+        resultado.filas += len(bloque)
+        if progreso is not None:
+            progreso(resultado.filas)
+    if errores:
+        resultado.errores = pd.concat(errores, ignore_index=True)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Importa registros de avance desde CSV o Excel")
+    parser.add_argument('archivo')
+    parser.add_argument('--proyecto', help="proyecto de todas las filas si el archivo no tiene la columna")
+    parser.add_argument('--bd', default=almacenamiento.RUTA_BD)
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help="filas por bloque")
+    parser.add_argument('--errores', help="archivo CSV donde guardar el reporte de errores")
+    args = parser.parse_args(argv)
+
+    proyectos = almacenamiento.cargar_indice(args.bd)
+    resultado = importar(args.archivo, proyectos, args.proyecto, args.bloque)
+    inicio = time.perf_counter()
+    if resultado.registros:
+        almacenamiento.agregar_registros(resultado.registros, args.bd)
+    resultado.segundos += time.perf_counter() - inicio
+
+    print(f"Filas leídas: {resultado.filas:,}")
+    print(f"Registros importados: {resultado.importadas:,}")
+    print(f"Filas con errores: {len(resultado.errores):,}")
+    print(f"Velocidad: {resultado.filas_por_segundo:,.0f} filas/s")
+    if args.errores:
+        resultado.errores.to_csv(args.errores, index=False)
+    elif not resultado.errores.empty:
+        print(resultado.errores.to_string(index=False), file=sys.stderr)
+    return 1 if not resultado.errores.empty else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""Métricas de rendimiento de la aplicación.
+
+Se activan con la variable de entorno FGR_METRICAS=1. Desactivadas, ``etapa``
+y ``escritura`` devuelven un contexto vacío compartido y el costo es una
+comprobación de un booleano.
+
+Activadas, se registran:
+- la duración de cada etapa de una ejecución (rerun) de la aplicación;
+- contadores de tamaño de los datos;
+- la latencia y los bytes de cada escritura en la base.
+
+Los resultados se ven en el panel de depuración de la aplicación, en una línea
+de log por ejecución (logger ``fgr.metricas``) y en formato de texto de
+Prometheus. Ese texto también se puede escribir en un archivo para el textfile
+collector de node_exporter (FGR_METRICAS_ARCHIVO) o servir por HTTP en
+/metrics (FGR_METRICAS_PUERTO).
+"""
+import collections
+import contextlib
+import http.server
+import logging
+import os
+import threading
+import time
+
+# Ejecuciones recientes que se conservan para el panel de depuración
+MAX_EJECUCIONES = 50
+
+logger = logging.getLogger(__name__)
+
+_activas = os.environ.get('FGR_METRICAS', '') not in ('', '0')
+_NULO = contextlib.nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+# Nombre -> [cantidad, suma de segundos, máximo]
+_etapas = {}
+_valores = {}
+_contadores = collections.Counter()
+_ejecuciones = collections.deque(maxlen=MAX_EJECUCIONES)
+_servidor = None
+
+
+def activas():
+    """True si se están registrando métricas"""
+    return _activas
+
+
+def activar(valor=True):
+    """Activa o desactiva el registro de métricas en el proceso"""
+    global _activas
+    _activas = valor
+
+
+def _registrar(nombre, segundos):
+    with _lock:
+        etapa = _etapas.setdefault(nombre, [0, 0.0, 0.0])
+        etapa[0] += 1
+        etapa[1] += segundos
+        etapa[2] = max(etapa[2], segundos)
+    tiempos = getattr(_local, 'tiempos', None)
+    if tiempos is not None:
+        tiempos[nombre] = tiempos.get(nombre, 0.0) + segundos
+
+
+@contextlib.contextmanager
+def _medir(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar(nombre, time.perf_counter() - inicio)
+
+
+def etapa(nombre):
+    """Contexto que mide la duración de una etapa de la ejecución actual"""
+    if not _activas:
+        return _NULO
+    return _medir(nombre)
+
+
+def valor(nombre, numero):
+    """Fija el valor actual de un indicador (por ejemplo, cantidad de registros)"""
+    if _activas:
+        with _lock:
+            _valores[nombre] = numero
+
+
+def contar(nombre, cantidad=1):
+    """Incrementa un contador acumulado"""
+    if _activas:
+        with _lock:
+            _contadores[nombre] += cantidad
+
+
+@contextlib.contextmanager
+def ejecucion():
+    """Agrupa las etapas de una ejecución de la aplicación y registra su total"""
+    if not _activas:
+        yield
+        return
+    _local.tiempos = {}
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - inicio
+        tiempos, _local.tiempos = _local.tiempos, None
+        _registrar('ejecucion', total)
+        with _lock:
+            _ejecuciones.append({'inicio': time.time() - total, 'total': total, 'etapas': tiempos})
+        logger.info("ejecucion %.1f ms %s", total * 1000,
+                    " ".join(f"{nombre}={segundos * 1000:.1f}ms" for nombre, segundos in tiempos.items()))
+        archivo = os.environ.get('FGR_METRICAS_ARCHIVO')
+        if archivo:
+            escribir_archivo(archivo)
+
+
+@contextlib.contextmanager
+def _medir_escritura(ruta):
+    tamano = _tamano_base(ruta)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        _registrar('escritura', segundos)
+        # Crecimiento de la base y del WAL; un checkpoint puede achicarlos
+        contar('escrituras')
+        contar('escritura_bytes', max(0, _tamano_base(ruta) - tamano))
+
+
+def escritura(ruta):
+    """Contexto que mide la latencia y los bytes de una escritura en la base"""
+    if not _activas:
+        return _NULO
+    return _medir_escritura(ruta)
+
+
+def _tamano_base(ruta):
+    return sum(os.path.getsize(r) for r in (ruta, ruta + '-wal') if os.path.exists(r))
+
+
+def ejecuciones():
+    """Ejecuciones recientes, de la más antigua a la más nueva"""
+    with _lock:
+        return list(_ejecuciones)
+
+
+def resumen_etapas():
+    """Cantidad, total, promedio y máximo (en segundos) de cada etapa"""
+    with _lock:
+        return {
+            nombre: {'cantidad': n, 'total': suma, 'promedio': suma / n, 'maximo': maximo}
+            for nombre, (n, suma, maximo) in _etapas.items()
+        }
+
+
+def texto_prometheus():
+    """Métricas en el formato de texto de exposición de Prometheus"""
+    with _lock:
+        etapas = {nombre: list(datos) for nombre, datos in _etapas.items()}
+        valores = dict(_valores)
+        contadores = dict(_contadores)
+    lineas = [
+        "# HELP fgr_etapa_segundos Duración de las etapas de la aplicación",
+        "# TYPE fgr_etapa_segundos summary",
+    ]
+    for nombre, (n, suma, _) in sorted(etapas.items()):
+        lineas.append(f'fgr_etapa_segundos_sum{{etapa="{nombre}"}} {suma:.6f}')
+        lineas.append(f'fgr_etapa_segundos_count{{etapa="{nombre}"}} {n}')
+    lineas.append("# TYPE fgr_etapa_segundos_max gauge")
+    for nombre, (_, _, maximo) in sorted(etapas.items()):
+        lineas.append(f'fgr_etapa_segundos_max{{etapa="{nombre}"}} {maximo:.6f}')
+    for nombre, numero in sorted(valores.items()):
+        lineas.append(f"# TYPE fgr_{nombre} gauge")
+        lineas.append(f"fgr_{nombre} {numero}")
+    for nombre, numero in sorted(contadores.items()):
+        lineas.append(f"# TYPE fgr_{nombre}_total counter")
+        lineas.append(f"fgr_{nombre}_total {numero}")
+    return "\n".join(lineas) + "\n"
+
+
+def escribir_archivo(ruta):
+    """Escribe las métricas de forma atómica, para el textfile collector de node_exporter"""
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w') as f:
+        f.write(texto_prometheus())
+    os.replace(temporal, ruta)
+
+
+class _Manejador(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        cuerpo = texto_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        logger.debug(formato, *args)
+
+
+def iniciar():
+    """Configura el log y el servidor de /metrics según las variables de entorno"""
+    if not _activas:
+        return
+    if not logger.handlers:
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(manejador)
+        logger.setLevel(logging.INFO)
+    puerto = os.environ.get('FGR_METRICAS_PUERTO')
+    if puerto:
+        servir(int(puerto))
+
+
+def servir(puerto, direccion='127.0.0.1'):
+    """Sirve /metrics en un hilo en segundo plano; solo se inicia una vez por proceso"""
+    global _servidor
+    with _lock:
+        if _servidor is None:
+            _servidor = http.server.ThreadingHTTPServer((direccion, puerto), _Manejador)
+            threading.Thread(target=_servidor.serve_forever, daemon=True).start()
+    return _servidor
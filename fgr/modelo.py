@@ -0,0 +1,158 @@
+"""Representación compacta de los registros de avance de un proyecto.
+
+``ColumnasProyecto`` guarda todos los registros de un proyecto en arreglos de
+NumPy, con los volúmenes por tipo de residuo en una matriz densa tipo ×
+período. Es la forma en que la caché conserva los registros leídos, y la que
+reciben el portafolio y la exportación. Se convierte desde y hacia el formato
+de diccionarios de proyectos.json sin pérdida: los campos ausentes en registros
+antiguos se guardan como NaN y se omiten al volver a diccionario.
+"""
+import numpy as np
+
+from fgr.calculos import CAMPOS_REGISTRO
+
+CAMPOS_NUMERICOS = [
+    'porcentaje_avance', 'incremento_porcentaje', 'area_periodo',
+    'residuos_periodo', 'fgr_periodo'
+]
+
+
+class ColumnasProyecto:
+    """Registros de un proyecto en arreglos de NumPy, uno por campo"""
+
+    __slots__ = ('area_total', 'tipos_residuos', 'fechas', 'columnas', 'tipos', 'volumenes')
+
+    def __init__(self, area_total, tipos_residuos, fechas, columnas, tipos, volumenes):
+        self.area_total = area_total
+        self.tipos_residuos = list(tipos_residuos)
+        # datetime64[D], un elemento por registro
+        self.fechas = fechas
+        # Campo numérico -> arreglo float64; NaN indica un campo ausente
+        self.columnas = columnas
+        # Filas de la matriz de volúmenes; NaN indica un tipo no registrado
+        self.tipos = list(tipos)
+        self.volumenes = volumenes
+
+    def __len__(self):
+        return len(self.fechas)
+
+    @classmethod
+    def desde_filas(cls, area_total, tipos_residuos, filas):
+        """Construye las columnas a partir de tuplas en el orden de calculos.CAMPOS_REGISTRO
+
+        Los campos ausentes de los registros antiguos se indican con None.
+        """
+        filas = list(filas)
+        tipos = dict.fromkeys(tipos_residuos)
+        for fila in filas:
+            tipos.update(dict.fromkeys(fila[5]))
+        posicion = {tipo: i for i, tipo in enumerate(tipos)}
+
+        volumenes = np.full((len(tipos), len(filas)), np.nan)
+        for j, fila in enumerate(filas):
+            for tipo, volumen in fila[5].items():
+                volumenes[posicion[tipo], j] = volumen
+        valores = list(zip(*filas)) or [()] * len(CAMPOS_REGISTRO)
+        return cls(
+            area_total,
+            tipos_residuos,
+            np.array(valores[0], dtype='datetime64[D]'),
+            {
+                campo: np.array(valores[CAMPOS_REGISTRO.index(campo)], dtype=float)
+                for campo in CAMPOS_NUMERICOS
+            },
+            tipos,
+            volumenes,
+        )
+
+    @classmethod
+    def vacias(cls, area_total, tipos_residuos):
+        """Columnas de un proyecto sin registros"""
+        return cls.desde_filas(area_total, tipos_residuos, [])
+
+    @classmethod
+    def desde_proyecto(cls, proyecto):
+        """Convierte un proyecto con el formato de proyectos.json"""
+        return cls.desde_filas(
+            proyecto["area_total"],
+            proyecto["tipos_residuos"],
+            (
+                tuple(
+                    registro.get(campo, {} if campo == 'tipos_residuos' else None)
+                    for campo in CAMPOS_REGISTRO
+                )
+                for registro in proyecto["registros"]
+            ),
+        )
+
+    def agregar(self, registros):
+        """Nuevas columnas con los registros (diccionarios) agregados por fecha
+
+        Cada registro queda después de los de su misma fecha, como con
+        bisect.insort; las columnas actuales no cambian. Las posiciones se
+        buscan con searchsorted y los valores se insertan sin reordenar todo.
+        """
+        nuevas = ColumnasProyecto.desde_proyecto(
+            {"area_total": self.area_total, "tipos_residuos": [], "registros": registros}
+        )
+        # Solo se ordenan los registros nuevos, en forma estable entre sí
+        orden = np.argsort(nuevas.fechas, kind='stable')
+        fechas = nuevas.fechas[orden]
+        posiciones = np.searchsorted(self.fechas, fechas, side='right')
+
+        tipos = list(dict.fromkeys(self.tipos + nuevas.tipos))
+        actuales = self.volumenes
+        if len(tipos) > len(self.tipos):
+            actuales = np.vstack([actuales, np.full((len(tipos) - len(self.tipos), len(self)), np.nan)])
+        agregados = np.full((len(tipos), len(nuevas)), np.nan)
+        agregados[[tipos.index(tipo) for tipo in nuevas.tipos]] = nuevas.volumenes[:, orden]
+        return ColumnasProyecto(
+            self.area_total,
+            self.tipos_residuos,
+            np.insert(self.fechas, posiciones, fechas),
+            {
+                campo: np.insert(self.columnas[campo], posiciones, nuevas.columnas[campo][orden])
+                for campo in CAMPOS_NUMERICOS
+            },
+            tipos,
+            np.insert(actuales, posiciones, agregados, axis=1),
+        )
+
+    def a_registros(self):
+        """Lista de registros en formato de diccionario de proyectos.json"""
+        fechas = np.datetime_as_string(self.fechas, unit='D').tolist()
+        columnas = {campo: self.columnas[campo].tolist() for campo in CAMPOS_NUMERICOS}
+        volumenes = self.volumenes.T.tolist()
+        registros = []
+        for j, fecha in enumerate(fechas):
+            registro = {"fecha": fecha}
+            for campo in CAMPOS_NUMERICOS:
+                valor = columnas[campo][j]
+                if valor == valor:  # se omiten los NaN
+                    registro[campo] = valor
+                if campo == 'residuos_periodo':
+                    # Mismo orden de claves que los registros originales
+                    registro["tipos_residuos"] = {
+                        tipo: v for tipo, v in zip(self.tipos, volumenes[j]) if v == v
+                    }
+            registros.append(registro)
+        return registros
+
+    def a_proyecto(self):
+        """Proyecto con el formato de proyectos.json"""
+        return {
+            "area_total": self.area_total,
+            "tipos_residuos": list(self.tipos_residuos),
+            "registros": self.a_registros(),
+        }
+
+    @property
+    def nbytes(self):
+        """Bytes ocupados por los arreglos de datos"""
+        return (self.fechas.nbytes + self.volumenes.nbytes
+                + sum(columna.nbytes for columna in self.columnas.values()))
+
+
+def columnas_de(proyectos):
+    """Convierte proyectos con el formato de proyectos.json (nombre -> proyecto)"""
+    return {nombre: ColumnasProyecto.desde_proyecto(proyecto) for nombre, proyecto in proyectos.items()}
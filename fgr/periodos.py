@@ -0,0 +1,156 @@
+"""Acumulados de registros por mes y por trimestre.
+
+Cada proyecto mantiene, por período, la cantidad de registros, el área
+construida, los residuos y los residuos por tipo. Se actualizan en O(log p) al
+agregar un registro (p es la cantidad de períodos), de modo que los filtros por
+fechas y los reportes de un período ("FGR del tercer trimestre en todos los
+proyectos") no recorren los registros.
+
+Las claves de período son cadenas que se ordenan cronológicamente: AAAA-MM
+para meses y AAAA-Tn para trimestres.
+"""
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from fgr.calculos import fgr_vectorizado
+
+FRECUENCIAS = {'Mensual': 'M', 'Trimestral': 'Q'}
+
+
+def clave(fecha, frecuencia):
+    """Clave del período de una fecha ISO (AAAA-MM-DD o AAAA-MM)"""
+    if frecuencia == 'M':
+        return fecha[:7]
+    return f"{fecha[:4]}-T{(int(fecha[5:7]) - 1) // 3 + 1}"
+
+
+class Acumulados:
+    """Totales por período de un proyecto, con las claves ordenadas"""
+
+    def __init__(self, frecuencia):
+        self.frecuencia = frecuencia
+        self.claves = []
+        # Clave -> [registros, área, residuos, {tipo: volumen}]
+        self._datos = {}
+
+    def __len__(self):
+        return len(self.claves)
+
+    def copia(self):
+        """Copia independiente, para agregar registros sin cambiar esta instancia"""
+        nueva = Acumulados(self.frecuencia)
+        nueva.claves = list(self.claves)
+        nueva._datos = {c: [n, a, r, dict(tipos)] for c, (n, a, r, tipos) in self._datos.items()}
+        return nueva
+
+    def _periodo(self, clave_periodo):
+        datos = self._datos.get(clave_periodo)
+        if datos is None:
+            bisect.insort(self.claves, clave_periodo)
+            datos = self._datos[clave_periodo] = [0, 0.0, 0.0, {}]
+        return datos
+
+    def agregar(self, registro):
+        """Suma un registro con area_periodo (ver calculos.completar_registro) al período de su fecha"""
+        datos = self._periodo(clave(registro['fecha'], self.frecuencia))
+        datos[0] += 1
+        datos[1] += registro['area_periodo']
+        datos[2] += registro.get('residuos_periodo', 0.0)
+        for tipo, volumen in (registro.get('tipos_residuos') or {}).items():
+            datos[3][tipo] = datos[3].get(tipo, 0.0) + volumen
+
+    def periodo(self, clave_periodo):
+        """(registros, área, residuos, tipos) del período, o None si no tiene registros"""
+        return self._datos.get(clave_periodo)
+
+    def entre(self, desde=None, hasta=None, incluir=True):
+        """Claves de los períodos entre ``desde`` y ``hasta``; sin los extremos si ``incluir`` es False"""
+        if incluir:
+            i = 0 if desde is None else bisect.bisect_left(self.claves, desde)
+            j = len(self.claves) if hasta is None else bisect.bisect_right(self.claves, hasta)
+        else:
+            i = 0 if desde is None else bisect.bisect_right(self.claves, desde)
+            j = len(self.claves) if hasta is None else bisect.bisect_left(self.claves, hasta)
+        return self.claves[i:j]
+
+    def dataframe(self, desde=None, hasta=None):
+        """Una fila por período con registros, área, residuos y FGR"""
+        claves = self.entre(desde, hasta)
+        datos = [self._datos[c] for c in claves]
+        df = pd.DataFrame({
+            'periodo': claves,
+            'registros': [d[0] for d in datos],
+            'area': np.array([d[1] for d in datos], dtype=float),
+            'residuos': np.array([d[2] for d in datos], dtype=float),
+        })
+        df['fgr'] = fgr_vectorizado(df['residuos'], df['area'])
+        return df
+
+
+def desde_portafolio(portafolio, frecuencia):
+    """Acumulados de todos los proyectos del portafolio, con sumas agrupadas de NumPy"""
+    registros, tipos = portafolio.registros, portafolio.tipos
+    meses, inverso = np.unique(registros['fecha'].to_numpy().astype('datetime64[M]'), return_inverse=True)
+    # Las claves de los meses ya ordenados salen ordenadas
+    claves, periodo_mes = np.unique(
+        np.array([clave(m, frecuencia) for m in meses.astype(str)], dtype=object), return_inverse=True
+    )
+
+    def grupo(proyecto, fechas_mes):
+        return proyecto.astype(np.int64) * len(claves) + periodo_mes[fechas_mes]
+
+    combinados, codigos = np.unique(
+        grupo(registros['proyecto'].cat.codes.to_numpy(), inverso), return_inverse=True
+    )
+    conteos = np.bincount(codigos, minlength=len(combinados))
+    area = np.bincount(codigos, weights=registros['area_periodo'].to_numpy(), minlength=len(combinados))
+    residuos = np.bincount(codigos, weights=registros['residuos_periodo'].to_numpy(), minlength=len(combinados))
+
+    nombres = portafolio.proyectos['proyecto'].tolist()
+    acumulados = {nombre: Acumulados(frecuencia) for nombre in nombres}
+    por_grupo = []
+    for combinado, n, a, r in zip(combinados.tolist(), conteos.tolist(), area.tolist(), residuos.tolist()):
+        # Ordenados por proyecto y período, así que las claves se agregan al final
+        periodos = acumulados[nombres[combinado // len(claves)]]
+        clave_periodo = claves[combinado % len(claves)]
+        periodos.claves.append(clave_periodo)
+        datos = periodos._datos[clave_periodo] = [n, a, r, {}]
+        por_grupo.append(datos[3])
+
+    if len(tipos):
+        mes_tipo = np.searchsorted(meses, tipos['fecha'].to_numpy().astype('datetime64[M]'))
+        grupo_tipo = np.searchsorted(combinados, grupo(tipos['proyecto'].cat.codes.to_numpy(), mes_tipo))
+        nombres_tipo = tipos['tipo'].cat.categories.tolist()
+        pares, codigos = np.unique(
+            grupo_tipo * len(nombres_tipo) + tipos['tipo'].cat.codes.to_numpy(), return_inverse=True
+        )
+        volumenes = np.bincount(codigos, weights=tipos['volumen'].to_numpy(), minlength=len(pares))
+        for par, volumen in zip(pares.tolist(), volumenes.tolist()):
+            por_grupo[par // len(nombres_tipo)][nombres_tipo[par % len(nombres_tipo)]] = volumen
+    return acumulados
+
+
+def reporte(acumulados, clave_periodo):
+    """FGR de un período en cada proyecto y residuos por tipo del conjunto
+
+    ``acumulados`` es un diccionario nombre -> Acumulados; solo se incluyen los
+    proyectos con registros en el período.
+    """
+    nombres, filas, tipos = [], [], {}
+    for nombre, periodos in acumulados.items():
+        datos = periodos.periodo(clave_periodo)
+        if datos is not None:
+            nombres.append(nombre)
+            filas.append(datos[:3])
+            for tipo, volumen in datos[3].items():
+                tipos[tipo] = tipos.get(tipo, 0.0) + volumen
+    proyectos = pd.DataFrame(filas, columns=['registros', 'area', 'residuos'], dtype=float)
+    proyectos.insert(0, 'proyecto', nombres)
+    proyectos['registros'] = proyectos['registros'].astype(int)
+    proyectos['fgr'] = fgr_vectorizado(proyectos['residuos'], proyectos['area'])
+    area = proyectos['area'].sum()
+    por_tipo = pd.DataFrame({'tipo': list(tipos), 'volumen': np.array(list(tipos.values()), dtype=float)})
+    por_tipo['fgr'] = fgr_vectorizado(por_tipo['volumen'], np.full(len(por_tipo), area))
+    return proyectos, por_tipo
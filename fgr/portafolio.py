@@ -0,0 +1,127 @@
+"""Indicadores FGR de todo el portafolio de proyectos.
+
+Las columnas de registros de todos los proyectos (modelo.ColumnasProyecto)
+se unen una sola vez en tablas y los indicadores se calculan con agrupaciones
+de pandas, sin recorrer los proyectos uno por uno.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from fgr.calculos import area_faltante, fgr_vectorizado
+
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def _memorizado(metodo):
+    # Los datos del portafolio no cambian: cada indicador se calcula una sola vez
+    @functools.wraps(metodo)
+    def envoltura(self):
+        if metodo.__name__ not in self._memo:
+            self._memo[metodo.__name__] = metodo(self)
+        return self._memo[metodo.__name__]
+    return envoltura
+
+
+def _distribucion(agrupado):
+    # Equivale a describe() por grupo, que es mucho más lento con muchos grupos
+    resultado = agrupado.agg(['count', 'mean', 'std', 'min', 'max'])
+    cuantiles = agrupado.quantile(PERCENTILES).unstack()
+    cuantiles.columns = [f"{p:.0%}" for p in PERCENTILES]
+    return pd.concat([resultado.drop(columns='max'), cuantiles, resultado['max']], axis=1)
+
+
+def _concatenar(arreglos, dtype):
+    # np.concatenate no acepta una lista vacía (portafolio sin proyectos)
+    return np.concatenate(arreglos).astype(dtype, copy=False) if arreglos else np.array([], dtype=dtype)
+
+
+class Portafolio:
+    """Registros de todos los proyectos en formato columnar; no modificar los resultados"""
+
+    def __init__(self, proyectos):
+        """``proyectos`` tiene un modelo.ColumnasProyecto por nombre de proyecto"""
+        self._memo = {}
+        nombres = list(proyectos)
+        columnas = [proyectos[nombre] for nombre in nombres]
+        conteos = [len(c) for c in columnas]
+        proyecto = np.repeat(np.arange(len(nombres)), conteos)
+
+        def unir(campo, ausente=np.nan):
+            # Los campos ausentes de registros antiguos son NaN en las columnas
+            valores = _concatenar([c.columnas[campo] for c in columnas], float)
+            return np.where(np.isnan(valores), ausente, valores)
+
+        self.proyectos = pd.DataFrame({
+            'proyecto': nombres,
+            'area_total': [float(c.area_total) for c in columnas],
+            'registros': conteos,
+        })
+        # Los registros antiguos sin área la obtienen del incremento (calculos.area_faltante)
+        area_periodo = unir('area_periodo')
+        faltante = np.isnan(area_periodo)
+        if faltante.any():
+            incremento = unir('incremento_porcentaje', 0.0)
+            area_total = self.proyectos['area_total'].to_numpy()[proyecto]
+            avance = unir('porcentaje_avance')
+            area_periodo[faltante] = area_faltante(area_total[faltante], avance[faltante], incremento[faltante])
+
+        self.registros = pd.DataFrame({
+            'proyecto': pd.Categorical.from_codes(proyecto, categories=nombres),
+            'fecha': _concatenar([c.fechas for c in columnas], 'datetime64[D]'),
+            'porcentaje_avance': unir('porcentaje_avance'),
+            'area_periodo': area_periodo,
+            'residuos_periodo': unir('residuos_periodo', 0.0),
+            'fgr_periodo': unir('fgr_periodo', 0.0),
+        })
+
+        # Formato largo: una fila por registro y tipo de residuo registrado
+        indices, nombres_tipo, volumenes = [], [], []
+        inicio = 0
+        for c in columnas:
+            registro, tipo = np.nonzero(~np.isnan(c.volumenes.T))
+            indices.append(inicio + registro)
+            nombres_tipo.append(np.array(c.tipos, dtype=object)[tipo])
+            volumenes.append(c.volumenes[tipo, registro])
+            inicio += len(c)
+        indice = _concatenar(indices, np.int64)
+        codigos, tipos = pd.factorize(_concatenar(nombres_tipo, object))
+        self.tipos = pd.DataFrame({
+            'proyecto': pd.Categorical.from_codes(proyecto[indice], categories=nombres),
+            'fecha': self.registros['fecha'].to_numpy()[indice],
+            'tipo': pd.Categorical.from_codes(codigos, categories=tipos),
+            'volumen': _concatenar(volumenes, float),
+            'area_periodo': self.registros['area_periodo'].to_numpy()[indice],
+            'porcentaje_avance': self.registros['porcentaje_avance'].to_numpy()[indice],
+        })
+
+    @_memorizado
+    def fgr_por_tipo(self):
+        """FGR de cada tipo de residuo por proyecto (volumen del tipo / área construida)"""
+        volumen = self.tipos.groupby(['proyecto', 'tipo'], observed=True)['volumen'].sum()
+        area = self.registros.groupby('proyecto', observed=False)['area_periodo'].sum()
+        area = area.reindex(volumen.index.get_level_values('proyecto')).to_numpy()
+        return pd.DataFrame({
+            'volumen': volumen,
+            'fgr': fgr_vectorizado(volumen.to_numpy(), area),
+        }).reset_index()
+
+    @_memorizado
+    def estadisticas_por_tipo(self):
+        """Distribución entre proyectos del FGR de cada tipo de residuo"""
+        return _distribucion(self.fgr_por_tipo().groupby('tipo', observed=True)['fgr'])
+
+    @_memorizado
+    def fgr_por_mes(self):
+        """FGR mensual por proyecto y su distribución entre proyectos"""
+        mes = self.registros['fecha'].to_numpy().astype('datetime64[M]')
+        por_proyecto = self.registros.groupby(['proyecto', pd.Series(mes, name='mes')], observed=True).agg(
+            area=('area_periodo', 'sum'),
+            residuos=('residuos_periodo', 'sum'),
+        )
+        por_proyecto['fgr'] = fgr_vectorizado(por_proyecto['residuos'], por_proyecto['area'])
+        distribucion = _distribucion(por_proyecto.groupby(level='mes')['fgr'])
+        totales = por_proyecto.groupby(level='mes')[['area', 'residuos']].sum()
+        distribucion['fgr_global'] = fgr_vectorizado(totales['residuos'], totales['area'])
+        return distribucion
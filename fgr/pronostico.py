@@ -0,0 +1,211 @@
+"""Pronóstico del volumen de residuos y del FGR al 100 % de avance.
+
+Para cada proyecto, y para cada tipo de residuo, se ajusta por mínimos
+cuadrados la recta del volumen acumulado de residuos en función del avance. Los
+pesos decaen exponencialmente con la antigüedad del registro, de modo que la
+pendiente sigue la tendencia reciente. El volumen final se proyecta desde el
+acumulado actual con esa pendiente hasta el 100 %.
+
+Los períodos cuyo FGR se aleja de la tendencia del proyecto se marcan como
+anomalías, con un puntaje z robusto (mediana de las desviaciones absolutas).
+Los ajustes son sumas agrupadas de NumPy, sin recorrer los proyectos uno por
+uno.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from fgr.calculos import fgr_vectorizado
+
+# Registros de antigüedad en los que el peso de un registro se reduce a la mitad
+VIDA_MEDIA = 12
+UMBRAL_Z = 3.5
+# Registros mínimos de un proyecto para marcar anomalías
+MIN_REGISTROS = 4
+# Escala de la mediana de desviaciones absolutas equivalente a una desviación estándar
+ESCALA_MAD = 1.4826
+
+
+def pendientes(codigos, n_grupos, x, y, vida_media=VIDA_MEDIA):
+    """Pendiente de ``y`` respecto de ``x`` en cada grupo, nunca negativa
+
+    Los registros de cada grupo deben estar en orden cronológico: el último
+    pesa 1 y los anteriores decaen con ``vida_media``. Si ``x`` no varía en el
+    grupo (por ejemplo, con un solo registro), la recta pasa por el origen.
+    """
+    codigos = np.asarray(codigos)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    conteos = np.bincount(codigos, minlength=n_grupos)
+    orden = pd.Series(codigos).groupby(codigos).cumcount().to_numpy()
+    pesos = 0.5 ** ((conteos[codigos] - 1 - orden) / vida_media)
+
+    def suma(valores):
+        return np.bincount(codigos, weights=valores * pesos, minlength=n_grupos)
+
+    sw, sx, sy = suma(np.ones_like(x)), suma(x), suma(y)
+    sxx, sxy = suma(x * x), suma(x * y)
+    varianza = sw * sxx - sx * sx
+    con_ordenada = varianza > 1e-9 * np.maximum(sw * sxx, 1e-300)
+    pendiente = np.where(
+        con_ordenada,
+        (sw * sxy - sx * sy) / np.where(con_ordenada, varianza, 1.0),
+        sxy / np.where(sxx > 0, sxx, 1.0)
+    )
+    return np.clip(pendiente, 0.0, None)
+
+
+@dataclass
+class Ajuste:
+    """Pronóstico por proyecto, por proyecto y tipo, y puntaje de cada período"""
+    proyectos: pd.DataFrame
+    tipos: pd.DataFrame
+    periodos: pd.DataFrame
+
+    def anomalias(self):
+        """Períodos cuyo FGR se aleja de la tendencia del proyecto"""
+        return self.periodos[self.periodos['anomalia']]
+
+
+def ajustar(registros, tipos, areas, vida_media=VIDA_MEDIA, umbral=UMBRAL_Z):
+    """Ajusta todos los proyectos a la vez
+
+    ``registros`` tiene una fila por registro en orden cronológico dentro de
+    cada proyecto (proyecto, fecha, porcentaje_avance, area_periodo,
+    residuos_periodo, fgr_periodo); ``tipos`` una fila por registro y tipo de
+    residuo (proyecto, tipo, porcentaje_avance, volumen) en el mismo orden; y
+    ``areas`` el área total indexada por proyecto.
+    """
+    codigos, nombres = _factorizar(registros['proyecto'])
+    n = len(nombres)
+    con_registros = np.bincount(codigos, minlength=n) > 0
+    avance = registros['porcentaje_avance'].to_numpy(dtype=float)
+    residuos = registros['residuos_periodo'].to_numpy(dtype=float)
+    acumulado = pd.Series(residuos).groupby(codigos).cumsum().to_numpy()
+    pendiente = pendientes(codigos, n, avance, acumulado, vida_media)
+
+    area_total = areas.reindex(nombres).to_numpy(dtype=float)
+    avance_actual = pd.Series(avance).groupby(codigos).max().reindex(range(n)).to_numpy()
+    area_construida = np.bincount(codigos, weights=registros['area_periodo'].to_numpy(dtype=float), minlength=n)
+    volumen = np.bincount(codigos, weights=residuos, minlength=n)
+    faltante = np.clip(100.0 - avance_actual, 0.0, None)
+    volumen_final = volumen + pendiente * faltante
+    area_final = area_construida + area_total * faltante / 100
+    # FGR de un período que sigue la tendencia: pendiente × incremento / (área total × incremento / 100)
+    fgr_tendencia = fgr_vectorizado(pendiente * 100, area_total)
+    proyectos = pd.DataFrame({
+        'proyecto': nombres,
+        'avance': avance_actual,
+        'area_construida': area_construida,
+        'residuos': volumen,
+        'pendiente': pendiente,
+        'volumen_final': volumen_final,
+        'area_final': area_final,
+        'fgr_final': fgr_vectorizado(volumen_final, area_final),
+        'fgr_tendencia': fgr_tendencia,
+    })[con_registros].reset_index(drop=True)
+
+    # Puntaje z robusto del FGR de cada período respecto de la tendencia del proyecto
+    fgr = registros['fgr_periodo'].to_numpy(dtype=float)
+    desvio = np.where(registros['area_periodo'].to_numpy(dtype=float) > 0, fgr - fgr_tendencia[codigos], np.nan)
+    por_proyecto = pd.Series(np.abs(desvio)).groupby(codigos)
+    escala = (por_proyecto.median() * ESCALA_MAD).reindex(range(n)).to_numpy()
+    respaldo = por_proyecto.mean().reindex(range(n)).to_numpy() * np.sqrt(np.pi / 2)
+    escala = np.where(escala > 0, escala, respaldo)
+    z = np.divide(desvio, escala[codigos], out=np.zeros_like(desvio), where=escala[codigos] > 0)
+    suficientes = np.bincount(codigos, minlength=n) >= MIN_REGISTROS
+    periodos = pd.DataFrame({
+        'proyecto': nombres[codigos],
+        'fecha': registros['fecha'].to_numpy(),
+        'fgr_periodo': fgr,
+        'fgr_tendencia': fgr_tendencia[codigos],
+        'z': z,
+        'anomalia': (np.abs(np.nan_to_num(z)) > umbral) & suficientes[codigos],
+    })
+    return Ajuste(proyectos, _ajustar_tipos(tipos, proyectos, vida_media), periodos)
+
+
+def _factorizar(columna):
+    # Las columnas categóricas del portafolio ya tienen sus códigos
+    if isinstance(columna.dtype, pd.CategoricalDtype):
+        return columna.cat.codes.to_numpy(), columna.cat.categories.to_numpy(dtype=object)
+    return pd.factorize(np.asarray(columna, dtype=object))
+
+
+def _ajustar_tipos(tipos, proyectos, vida_media):
+    codigo_proyecto, nombres = _factorizar(tipos['proyecto'])
+    codigo_tipo, nombres_tipo = _factorizar(tipos['tipo'])
+    codigos, pares = pd.factorize(codigo_proyecto.astype(np.int64) * len(nombres_tipo) + codigo_tipo)
+    volumen = tipos['volumen'].to_numpy(dtype=float)
+    acumulado = pd.Series(volumen).groupby(codigos).cumsum().to_numpy()
+    pendiente = pendientes(codigos, len(pares), tipos['porcentaje_avance'].to_numpy(dtype=float),
+                           acumulado, vida_media)
+    total = np.bincount(codigos, weights=volumen, minlength=len(pares))
+
+    proyecto = nombres[pares // len(nombres_tipo)]
+    datos = proyectos.set_index('proyecto').reindex(proyecto)
+    faltante = np.clip(100.0 - datos['avance'].to_numpy(), 0.0, None)
+    volumen_final = total + pendiente * faltante
+    return pd.DataFrame({
+        'proyecto': proyecto,
+        'tipo': nombres_tipo[pares % len(nombres_tipo)],
+        'volumen': total,
+        'pendiente': pendiente,
+        'volumen_final': volumen_final,
+        'fgr_final': fgr_vectorizado(volumen_final, datos['area_final'].to_numpy()),
+    })
+
+
+def ajustar_proyecto(nombre, analisis, vida_media=VIDA_MEDIA, umbral=UMBRAL_Z):
+    """Ajuste de un solo proyecto a partir de su AnalisisProyecto"""
+    df = analisis.dataframe()
+    volumenes = analisis.residuos_por_tipo()
+    fila, columna = np.nonzero(volumenes.to_numpy() > 0)
+    tipos = pd.DataFrame({
+        'proyecto': nombre,
+        'tipo': volumenes.columns.to_numpy()[columna],
+        'porcentaje_avance': df['porcentaje_avance'].to_numpy()[fila],
+        'volumen': volumenes.to_numpy()[fila, columna],
+    })
+    return ajustar(
+        df.assign(proyecto=nombre), tipos, pd.Series({nombre: analisis.area_total}), vida_media, umbral
+    )
+
+
+class PronosticoPortafolio:
+    """Ajuste de todo el portafolio que solo reajusta los proyectos que cambiaron"""
+
+    def __init__(self, vida_media=VIDA_MEDIA, umbral=UMBRAL_Z):
+        self.vida_media = vida_media
+        self.umbral = umbral
+        self.ajuste = None
+        self.versiones = {}
+
+    def actualizar(self, portafolio, versiones):
+        """Reajusta los proyectos nuevos o con otra versión; devuelve cuántos se reajustaron"""
+        cambiados = {nombre for nombre, version in versiones.items() if self.versiones.get(nombre) != version}
+        if not cambiados and self.versiones.keys() == versiones.keys():
+            return 0
+        registros, tipos = portafolio.registros, portafolio.tipos
+        if self.ajuste is not None:
+            registros = registros[registros['proyecto'].isin(cambiados)]
+            tipos = tipos[tipos['proyecto'].isin(cambiados)]
+        nuevo = ajustar(
+            registros, tipos, portafolio.proyectos.set_index('proyecto')['area_total'],
+            self.vida_media, self.umbral
+        )
+        if self.ajuste is not None:
+            conservados = set(versiones) - cambiados
+
+            def unir(anterior, actual):
+                return pd.concat([anterior[anterior['proyecto'].isin(conservados)], actual], ignore_index=True)
+
+            nuevo = Ajuste(
+                unir(self.ajuste.proyectos, nuevo.proyectos),
+                unir(self.ajuste.tipos, nuevo.tipos),
+                unir(self.ajuste.periodos, nuevo.periodos),
+            )
+        self.ajuste = nuevo
+        self.versiones = dict(versiones)
+        return len(cambiados)
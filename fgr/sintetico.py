@@ -0,0 +1,177 @@
+"""Datos sintéticos con el formato de proyectos.json para pruebas y benchmarks.
+
+También contiene los cálculos originales de app.py con los que las pruebas
+comparan los resultados actuales y los benchmarks miden la mejora, de modo que
+ambos usan exactamente la misma referencia.
+"""
+import datetime
+import random
+
+import numpy as np
+
+from fgr import almacenamiento
+from fgr.cache import CacheProyectos
+from fgr.calculos import completar_registro, crear_registro
+
+TIPOS_RESIDUOS = ("Escombro", "Madera", "Metal", "Plástico", "Cartón", "Yeso")
+# Avance y fecha de los registros de registrar_avances
+INCREMENTO = 0.01
+FECHA_INICIAL = datetime.date(2024, 1, 1)
+
+
+def generar_proyectos(n_proyectos, registros_por_proyecto, tipos=TIPOS_RESIDUOS,
+                      tipos_por_registro=3, semilla=0):
+    """Genera proyectos con registros mensuales de avance y residuos"""
+    rng = np.random.default_rng(semilla)
+    n = registros_por_proyecto
+    tipos = list(tipos)
+    tipos_por_registro = min(tipos_por_registro, len(tipos))
+
+    areas = rng.uniform(1_000, 50_000, n_proyectos).round(0)
+    # Incrementos de avance positivos que suman 100 % por proyecto
+    pesos = rng.gamma(2.0, 1.0, (n_proyectos, n))
+    avances = np.cumsum(pesos / pesos.sum(axis=1, keepdims=True) * 100, axis=1)
+    avances[:, -1] = 100.0
+    incrementos = np.diff(avances, axis=1, prepend=0.0)
+    fgr_base = rng.lognormal(np.log(0.08), 0.4, n_proyectos)
+    volumenes = rng.dirichlet(np.ones(tipos_por_registro), (n_proyectos, n))
+    elegidos = np.argsort(rng.random((n_proyectos, n, len(tipos))), axis=2)[:, :, :tipos_por_registro]
+    ruido = rng.lognormal(0.0, 0.3, (n_proyectos, n))
+    anios_inicio = rng.integers(2000, 2020, n_proyectos)
+    meses_inicio = rng.integers(0, 12, n_proyectos)
+
+    # Listas de Python: indexar arrays de NumPy elemento a elemento es lento
+    avances, incrementos = avances.tolist(), incrementos.tolist()
+    factores = (fgr_base[:, None] * ruido).tolist()
+    volumenes, elegidos = volumenes.tolist(), elegidos.tolist()
+
+    proyectos = {}
+    for p in range(n_proyectos):
+        area_total = float(areas[p])
+        anio, mes_inicio = int(anios_inicio[p]), int(meses_inicio[p])
+        registros = []
+        for i in range(n):
+            mes = mes_inicio + i
+            incremento = incrementos[p][i]
+            area_periodo = area_total * (incremento / 100)
+            residuos_periodo = round(area_periodo * factores[p][i], 2)
+            tipos_residuos = {
+                tipos[j]: round(residuos_periodo * v, 2)
+                for j, v in zip(elegidos[p][i], volumenes[p][i])
+            }
+            residuos_periodo = sum(tipos_residuos.values())
+            registros.append({
+                "fecha": f"{anio + mes // 12:04d}-{mes % 12 + 1:02d}-01",
+                "porcentaje_avance": avances[p][i],
+                "incremento_porcentaje": incremento,
+                "area_periodo": area_periodo,
+                "residuos_periodo": residuos_periodo,
+                "tipos_residuos": tipos_residuos,
+                "fgr_periodo": residuos_periodo / area_periodo if area_periodo > 0 else 0
+            })
+        proyectos[f"Proyecto {p + 1:05d}"] = {
+            "area_total": area_total,
+            "tipos_residuos": tipos,
+            "registros": registros
+        }
+    return proyectos
+
+
+def proyecto_diario(n_registros):
+    """Proyecto sintético con un registro por día"""
+    proyecto = next(iter(generar_proyectos(1, n_registros).values()))
+    fechas = np.arange(np.datetime64('2015-01-01'), np.datetime64('2015-01-01') + n_registros)
+    for registro, fecha in zip(proyecto["registros"], fechas.astype(str).tolist()):
+        registro["fecha"] = fecha
+    return proyecto
+
+
+def generar_registros(n, area_total, semilla=0):
+    """Registros con fechas desordenadas, fechas repetidas y registros antiguos sin área"""
+    rng = random.Random(semilla)
+    registros = []
+    avance = 0.0
+    for i in range(n):
+        incremento = rng.uniform(0, 100 / n)
+        avance += incremento
+        residuos = {"Escombro": rng.uniform(0, 30), "Madera": rng.uniform(0, 10)}
+        registro = {
+            "fecha": f"{2000 + rng.randrange(30):04d}-{rng.randrange(1, 13):02d}-01",
+            "porcentaje_avance": avance,
+            "incremento_porcentaje": incremento,
+            "area_periodo": area_total * (incremento / 100),
+            "residuos_periodo": sum(residuos.values()),
+            "tipos_residuos": residuos,
+            "fgr_periodo": sum(residuos.values()) / (area_total * (incremento / 100))
+        }
+        if rng.random() < 0.05:
+            del registro["area_periodo"]
+        registros.append(registro)
+    return registros
+
+
+def registrar_avances(ruta, escrituras, semilla=0):
+    """Registra avances como el formulario, desde una CacheProyectos propia
+
+    Cada avance se calcula desde el índice leído y se guarda con la versión
+    vista del proyecto; ante ConflictoEscritura se reintenta con datos frescos.
+    Devuelve (registros guardados por proyecto, conflictos reintentados).
+    """
+    rng = random.Random(semilla)
+    cache = CacheProyectos(ruta)
+    guardados, conflictos = {}, 0
+    for _ in range(escrituras):
+        while True:
+            indice, versiones = cache.indice()
+            nombre = rng.choice(sorted(indice))
+            proyecto = indice[nombre]
+            ultimo_avance = proyecto["avance"]
+            registro = crear_registro(
+                (FECHA_INICIAL + datetime.timedelta(days=proyecto["registros"])).isoformat(),
+                ultimo_avance + INCREMENTO, ultimo_avance, proyecto["area_total"],
+                {"Escombro": rng.uniform(0.5, 5.0)}
+            )
+            try:
+                cache.agregar_registro(nombre, registro, versiones[nombre])
+            except almacenamiento.ConflictoEscritura:
+                conflictos += 1
+                continue
+            guardados[nombre] = guardados.get(nombre, 0) + 1
+            break
+    return guardados, conflictos
+
+
+COLUMNAS_COMPARADAS = [
+    'fecha', 'porcentaje_avance', 'incremento_porcentaje', 'area_periodo',
+    'residuos_periodo', 'fgr_periodo', 'area_acumulada', 'residuos_acumulados', 'fgr_acumulado'
+]
+
+
+def dataframe_original(registros, area_total):
+    """Construcción del DataFrame tal como se hacía en cada rerun de app.py"""
+    import pandas as pd
+
+    registros = [completar_registro(registro, area_total) for registro in registros]
+    df = pd.DataFrame(registros)
+    for col in COLUMNAS_COMPARADAS[:6]:
+        if col not in df.columns:
+            df[col] = 0.0
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df['area_acumulada'] = df['area_periodo'].cumsum()
+    df['residuos_acumulados'] = df['residuos_periodo'].cumsum()
+    df['fgr_acumulado'] = df['residuos_acumulados'] / df['area_acumulada'].replace(0, np.inf)
+    return df
+
+
+def residuos_por_tipo_original(registros):
+    """Bucle original que asignaba celda por celda con .loc"""
+    import pandas as pd
+
+    residuos_por_tipo = pd.DataFrame()
+    for registro in registros:
+        for tipo, volumen in registro['tipos_residuos'].items():
+            if tipo not in residuos_por_tipo.columns:
+                # El original usaba 0 entero, que pandas 3 ya no convierte a float
+                residuos_por_tipo[tipo] = 0.0
+            residuos_por_tipo.loc[registro['fecha'], tipo] = volumen
+    return residuos_por_tipo
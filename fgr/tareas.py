@@ -0,0 +1,244 @@
+"""Tareas en segundo plano compartidas por todas las sesiones del servidor.
+
+Las operaciones largas (recalcular el portafolio, exportar todos los proyectos,
+importar archivos grandes) se envían a un GestorTareas, que las ejecuta en un
+grupo de hilos con un límite de tareas simultáneas. Cada tarea tiene un
+identificador, un progreso y un resultado que la página consulta en cada
+ejecución, y se puede cancelar. Las tareas enviadas con la misma clave se
+comparten: otra sesión recoge la tarea en curso o su resultado ya calculado.
+
+El trabajo por proyecto se reparte entre los núcleos con ``ControlTarea.mapa``,
+que usa un grupo de procesos creado al primer uso. Solo la exportación lo usa:
+el portafolio, el pronóstico, los acumulados por período y la validación de
+una importación se calculan en el hilo de su tarea, que solo los saca del hilo
+de la página (el portafolio ya agrupa todos los proyectos de una vez).
+
+Los resultados de las tareas terminadas, por ejemplo los archivos exportados,
+se conservan hasta MAX_TERMINADAS tareas y MAX_BYTES_TERMINADAS bytes; se
+descartan primero las más antiguas, salvo la última en terminar.
+"""
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from fgr import metricas
+
+MAX_SIMULTANEAS = 2
+# Tareas terminadas que se conservan para que las sesiones lean su resultado
+MAX_TERMINADAS = 20
+# Tamaño máximo de los resultados en bytes (archivos exportados) de esas tareas
+MAX_BYTES_TERMINADAS = 256 * 1024 * 1024
+
+PENDIENTE = 'pendiente'
+EJECUTANDO = 'ejecutando'
+TERMINADA = 'terminada'
+FALLIDA = 'fallida'
+CANCELADA = 'cancelada'
+
+
+class TareaCancelada(Exception):
+    """Se pidió cancelar la tarea mientras se ejecutaba"""
+
+
+class Tarea:
+    """Estado de una tarea; solo lo modifica el gestor y el hilo que la ejecuta"""
+
+    def __init__(self, nombre, clave=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.nombre = nombre
+        self.clave = clave
+        self.estado = PENDIENTE
+        self.progreso = 0.0
+        self.mensaje = ''
+        self.resultado = None
+        self.error = None
+        self.creada = time.time()
+        self.fin = None
+        self._cancelar = threading.Event()
+
+    @property
+    def terminada(self):
+        return self.estado in (TERMINADA, FALLIDA, CANCELADA)
+
+    @property
+    def nbytes(self):
+        """Tamaño del resultado si es un archivo en bytes; 0 en otro caso"""
+        return len(self.resultado) if isinstance(self.resultado, (bytes, bytearray)) else 0
+
+
+class ControlTarea:
+    """Lo recibe la función de una tarea para informar el progreso y atender la cancelación"""
+
+    def __init__(self, tarea, gestor):
+        self._tarea = tarea
+        self._gestor = gestor
+
+    @property
+    def cancelada(self):
+        return self._tarea._cancelar.is_set()
+
+    def comprobar(self):
+        """Lanza TareaCancelada si se pidió cancelar la tarea"""
+        if self.cancelada:
+            raise TareaCancelada(self._tarea.nombre)
+
+    def avanzar(self, progreso=None, mensaje=None):
+        """Actualiza el progreso (0 a 1) y el mensaje; también comprueba la cancelación"""
+        self.comprobar()
+        if progreso is not None:
+            self._tarea.progreso = min(max(progreso, 0.0), 1.0)
+        if mensaje is not None:
+            self._tarea.mensaje = mensaje
+
+    def mapa(self, funcion, elementos):
+        """Aplica ``funcion`` a cada elemento en el grupo de procesos y genera los resultados en orden
+
+        ``funcion`` y los elementos deben poder serializarse con pickle. Se
+        mantienen pocos elementos en vuelo, así que los resultados se pueden
+        consumir a medida que llegan; el progreso es la fracción completada.
+        """
+        elementos = list(elementos)
+        ejecutor, ventana = self._gestor.procesos()
+        if ejecutor is None:
+            # Con un solo núcleo no conviene pagar la serialización entre procesos
+            for completados, elemento in enumerate(elementos):
+                self.comprobar()
+                resultado = funcion(elemento)
+                self.avanzar((completados + 1) / len(elementos))
+                yield resultado
+            return
+        pendientes = collections.deque()
+        siguiente = 0
+        try:
+            for completados in range(len(elementos)):
+                while siguiente < len(elementos) and len(pendientes) < ventana:
+                    pendientes.append(ejecutor.submit(funcion, elementos[siguiente]))
+                    siguiente += 1
+                futuro = pendientes.popleft()
+                while True:
+                    try:
+                        resultado = futuro.result(timeout=0.2)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        self.comprobar()
+                self.avanzar((completados + 1) / len(elementos))
+                yield resultado
+        finally:
+            for futuro in pendientes:
+                futuro.cancel()
+
+
+class GestorTareas:
+    """Grupo de hilos para tareas largas, con un límite de tareas simultáneas"""
+
+    def __init__(self, max_simultaneas=MAX_SIMULTANEAS, procesos=None):
+        self._lock = threading.Lock()
+        self._hilos = concurrent.futures.ThreadPoolExecutor(max_simultaneas, thread_name_prefix='fgr-tarea')
+        self._n_procesos = procesos or os.cpu_count() or 1
+        self._procesos = None
+        self._tareas = {}
+        self._por_clave = {}
+
+    def enviar(self, nombre, funcion, *args, clave=None, **kwargs):
+        """Encola ``funcion(control, *args, **kwargs)`` y devuelve el id de la tarea
+
+        Con ``clave``, si ya hay una tarea con esa clave en curso o terminada
+        sin errores, se devuelve su id en lugar de encolar otra.
+        """
+        with self._lock:
+            if clave is not None and clave in self._por_clave:
+                anterior = self._tareas[self._por_clave[clave]]
+                if anterior.estado not in (FALLIDA, CANCELADA):
+                    return anterior.id
+            tarea = Tarea(nombre, clave)
+            self._tareas[tarea.id] = tarea
+            if clave is not None:
+                self._por_clave[clave] = tarea.id
+            self._descartar_terminadas()
+        self._hilos.submit(self._ejecutar, tarea, funcion, args, kwargs)
+        return tarea.id
+
+    def _ejecutar(self, tarea, funcion, args, kwargs):
+        if tarea._cancelar.is_set():
+            tarea.estado, tarea.fin = CANCELADA, time.time()
+            return
+        tarea.estado = EJECUTANDO
+        try:
+            with metricas.etapa(f'tarea:{tarea.nombre}'):
+                resultado = funcion(ControlTarea(tarea, self), *args, **kwargs)
+        except TareaCancelada:
+            estado = CANCELADA
+        except Exception as error:
+            tarea.error = error
+            estado = FALLIDA
+        else:
+            tarea.resultado = resultado
+            tarea.progreso = 1.0
+            estado = TERMINADA
+        # El estado se publica al final: una tarea terminada siempre tiene fin y,
+        # cuando otra sesión la ve terminada, ya se descartaron las sobrantes
+        with self._lock:
+            tarea.fin = time.time()
+            tarea.estado = estado
+            self._descartar_terminadas()
+
+    def _descartar_terminadas(self):
+        terminadas = sorted((t for t in self._tareas.values() if t.terminada), key=lambda t: t.fin)
+        total = sum(t.nbytes for t in terminadas)
+        # La última en terminar se conserva aunque su archivo supere el límite
+        for i, tarea in enumerate(terminadas[:-1]):
+            if len(terminadas) - i <= MAX_TERMINADAS and total <= MAX_BYTES_TERMINADAS:
+                break
+            total -= tarea.nbytes
+            del self._tareas[tarea.id]
+            if self._por_clave.get(tarea.clave) == tarea.id:
+                del self._por_clave[tarea.clave]
+
+    def tarea(self, id_tarea):
+        """La tarea con ese id, o None si no existe o ya se descartó"""
+        with self._lock:
+            return self._tareas.get(id_tarea)
+
+    def tareas(self):
+        """Todas las tareas conservadas, de la más antigua a la más nueva"""
+        with self._lock:
+            return sorted(self._tareas.values(), key=lambda t: t.creada)
+
+    def cancelar(self, id_tarea):
+        """Pide cancelar la tarea; una tarea en curso se detiene en su próxima comprobación"""
+        with self._lock:
+            tarea = self._tareas.get(id_tarea)
+            if tarea is not None and not tarea.terminada:
+                tarea._cancelar.set()
+
+    def procesos(self):
+        """Grupo de procesos compartido por las tareas y cuántos elementos mantener en vuelo
+
+        Con un solo proceso devuelve (None, 1) y el trabajo se hace en el hilo de la tarea.
+        """
+        if self._n_procesos == 1:
+            return None, 1
+        with self._lock:
+            if self._procesos is None:
+                # fork no es seguro en un servidor con varios hilos
+                metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._procesos = concurrent.futures.ProcessPoolExecutor(
+                    self._n_procesos, mp_context=multiprocessing.get_context(metodo)
+                )
+            return self._procesos, 2 * self._n_procesos
+
+    def cerrar(self):
+        """Cancela las tareas pendientes y libera los hilos y procesos"""
+        with self._lock:
+            for tarea in self._tareas.values():
+                tarea._cancelar.set()
+        self._hilos.shutdown(wait=True, cancel_futures=True)
+        if self._procesos is not None:
+            self._procesos.shutdown(wait=True, cancel_futures=True)
+        for tarea in self.tareas():
+            if tarea.estado == PENDIENTE:
+                tarea.estado, tarea.fin = CANCELADA, time.time()
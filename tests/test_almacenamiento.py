@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from fgr import almacenamiento
+from fgr.calculos import CAMPOS_RESUMEN, crear_registro, resumir_proyecto
+from fgr.sintetico import generar_proyectos
+
+
+def test_migracion_fallida_se_reintenta(tmp_path):
+    ruta, ruta_json = str(tmp_path / 'proyectos.db'), tmp_path / 'proyectos.json'
+    datos = generar_proyectos(3, 5)
+    # Un JSON a medio escribir hace fallar la primera migración
+    ruta_json.write_text(json.dumps(datos)[:50])
+    with pytest.raises(json.JSONDecodeError):
+        almacenamiento.conectar(ruta).close()
+
+    ruta_json.write_text(json.dumps(datos))
+    assert almacenamiento.cargar_datos(ruta) == datos
+
+
+def test_migracion_una_sola_vez(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    (tmp_path / 'proyectos.json').write_text(json.dumps(generar_proyectos(2, 5)))
+    for nombre in almacenamiento.cargar_datos(ruta):
+        almacenamiento.eliminar_proyecto(nombre, ruta)
+    # Los proyectos eliminados no vuelven a migrarse desde el JSON
+    assert almacenamiento.cargar_datos(ruta) == {}
+
+
+def test_resumenes_de_bases_anteriores_iguales_a_resumir_proyecto(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    datos = generar_proyectos(5, 12)
+    for proyecto in datos.values():
+        # Registros antiguos sin área: la completa calculos.area_faltante
+        for registro in proyecto["registros"][::3]:
+            del registro["area_periodo"]
+    almacenamiento.guardar_datos(datos, ruta)
+    conexion = almacenamiento.conectar(ruta)
+    conexion.execute("DELETE FROM resumenes")
+    conexion.close()
+
+    indice = almacenamiento.cargar_indice(ruta)
+    for nombre, proyecto in datos.items():
+        esperado = resumir_proyecto(proyecto)
+        assert {campo: indice[nombre][campo] for campo in CAMPOS_RESUMEN} == pytest.approx(
+            {campo: esperado[campo] for campo in CAMPOS_RESUMEN}, rel=1e-12
+        )
+
+
+def test_avance_menor_al_guardado_se_rechaza(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    almacenamiento.crear_proyecto("A", 100.0, ["Escombro"], ruta)
+    almacenamiento.agregar_registro("A", crear_registro("2025-01-01", 30.0, 0.0, 100.0, {"Escombro": 1.0}), ruta)
+    with pytest.raises(almacenamiento.ConflictoEscritura):
+        almacenamiento.agregar_registro("A", crear_registro("2025-02-01", 30.0, 30.0, 100.0, {}), ruta)
+    # Sin registros, cualquier avance vuelve a ser válido
+    almacenamiento.limpiar_registros("A", ruta)
+    almacenamiento.agregar_registro("A", crear_registro("2025-02-01", 5.0, 0.0, 100.0, {}), ruta)
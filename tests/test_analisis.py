@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from fgr.analisis import AnalisisProyecto
+from fgr.sintetico import (
+    COLUMNAS_COMPARADAS, dataframe_original, generar_registros, residuos_por_tipo_original
+)
+
+AREA_TOTAL = 12345.6
+
+
+def agregar_como_app(registros, area_total=AREA_TOTAL):
+    """Análisis incremental y la lista que app.py ordenaba tras cada registro"""
+    analisis = AnalisisProyecto(area_total)
+    ordenados = []
+    for registro in registros:
+        # Igual que app.py: append seguido de sort estable por fecha
+        ordenados.append(registro)
+        ordenados.sort(key=lambda x: x["fecha"])
+        analisis.agregar(registro)
+    return analisis, ordenados
+
+
+def assert_igual_a_cumsum(analisis, ordenados, area_total=AREA_TOTAL):
+    esperado = dataframe_original(ordenados, area_total)[COLUMNAS_COMPARADAS]
+    obtenido = analisis.dataframe()[COLUMNAS_COMPARADAS]
+    pd.testing.assert_frame_equal(obtenido, esperado, check_exact=True)
+
+
+def registro(fecha, avance, incremento, residuos, area=True):
+    nuevo = {
+        "fecha": fecha,
+        "porcentaje_avance": avance,
+        "incremento_porcentaje": incremento,
+        "area_periodo": AREA_TOTAL * (incremento / 100),
+        "residuos_periodo": residuos,
+        "tipos_residuos": {"Escombro": residuos},
+        "fgr_periodo": residuos / (AREA_TOTAL * (incremento / 100)),
+    }
+    if not area:
+        del nuevo["area_periodo"]
+    return nuevo
+
+
+@pytest.mark.parametrize('n', [1, 2, 50, 500])
+def test_registros_aleatorios_iguales_a_cumsum(n):
+    # Fechas desordenadas y repetidas, y un 5% de registros antiguos sin área
+    assert_igual_a_cumsum(*agregar_como_app(generar_registros(n, AREA_TOTAL)))
+
+
+def test_fechas_desordenadas_repetidas_y_sin_area():
+    registros = [
+        registro("2025-03-01", 30.0, 10.0, 7.5),
+        registro("2025-01-01", 10.0, 10.0, 3.1),
+        registro("2025-02-01", 20.0, 10.0, 4.7, area=False),
+        registro("2025-02-01", 25.0, 5.0, 1.3),
+        registro("2025-01-01", 12.0, 2.0, 0.9, area=False),
+        registro("2025-04-01", 35.0, 5.0, 2.2),
+    ]
+    analisis, ordenados = agregar_como_app(registros)
+    assert_igual_a_cumsum(analisis, ordenados)
+    # Con fecha repetida, el registro nuevo va después de los existentes
+    assert analisis.dataframe()['porcentaje_avance'].tolist() == [10.0, 12.0, 20.0, 25.0, 30.0, 35.0]
+
+
+def test_construir_de_una_vez_igual_que_agregar():
+    registros = generar_registros(200, AREA_TOTAL, semilla=3)
+    analisis, ordenados = agregar_como_app(registros)
+    de_una_vez = AnalisisProyecto(AREA_TOTAL, registros)
+    pd.testing.assert_frame_equal(de_una_vez.dataframe(), analisis.dataframe(), check_exact=True)
+    assert_igual_a_cumsum(de_una_vez, ordenados)
+
+
+def test_dataframe_memorizado_por_version():
+    analisis = AnalisisProyecto(AREA_TOTAL, generar_registros(20, AREA_TOTAL))
+    df = analisis.dataframe()
+    assert analisis.dataframe() is df
+    analisis.agregar(registro("2100-01-01", 99.0, 1.0, 1.0))
+    assert analisis.dataframe() is not df
+    assert len(analisis.dataframe()) == 21
+
+
+def test_residuos_por_tipo_igual_al_bucle_original():
+    # Fechas únicas, tipos que faltan en algunos períodos y registros sin tipos
+    registros = [
+        dict(registro("2025-01-01", 10.0, 10.0, 3.0), tipos_residuos={"Escombro": 2.0, "Madera": 1.0}),
+        dict(registro("2025-02-01", 20.0, 10.0, 4.0), tipos_residuos={"Metal": 4.0}),
+        dict(registro("2025-03-01", 25.0, 5.0, 0.0), tipos_residuos={}),
+        registro("2025-04-01", 30.0, 5.0, 1.5),
+        registro("2025-05-01", 35.0, 5.0, 0.0),
+        dict(registro("2025-06-01", 40.0, 5.0, 2.5), tipos_residuos={"Madera": 2.5}),
+    ]
+    del registros[4]["tipos_residuos"]
+    analisis = AnalisisProyecto(AREA_TOTAL, registros)
+    obtenido = analisis.residuos_por_tipo()
+
+    # El bucle original no tenía fila para los registros sin residuos y dejaba
+    # NaN en los tipos que faltaban en los períodos posteriores a su aparición
+    con_tipos = [r for r in registros if r.get("tipos_residuos")]
+    esperado = residuos_por_tipo_original(con_tipos).fillna(0.0)
+    fechas = [r["fecha"] for r in con_tipos]
+    pd.testing.assert_frame_equal(obtenido.loc[fechas], esperado)
+    sin_tipos = obtenido.drop(index=fechas)
+    assert len(sin_tipos) == 2 and (sin_tipos == 0.0).all().all()
+    assert analisis.dataframe()['tipos_residuos'].iloc[4] == {}
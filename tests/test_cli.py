@@ -0,0 +1,35 @@
+from fgr import almacenamiento, cli
+from fgr.calculos import crear_registro
+
+
+def base_desactualizada(ruta):
+    """Proyecto con un registro cuyo FGR guardado no coincide con el recalculado"""
+    almacenamiento.crear_proyecto("A", 100.0, ["Escombro"], ruta)
+    registro = crear_registro("2025-01-01", 10.0, 0.0, 100.0, {"Escombro": 2.0})
+    almacenamiento.agregar_registro("A", dict(registro, fgr_periodo=99.0), ruta)
+    return registro
+
+
+def test_recalcular_aplica_los_cambios(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    registro = base_desactualizada(ruta)
+    assert cli.main(['--bd', ruta, 'recalcular', '--aplicar']) == 0
+    assert almacenamiento.cargar_datos(ruta)["A"]["registros"] == [registro]
+
+
+def test_recalcular_no_borra_escrituras_concurrentes(tmp_path, monkeypatch, capsys):
+    ruta = str(tmp_path / 'proyectos.db')
+    base_desactualizada(ruta)
+    iterar = almacenamiento.iterar_proyectos
+
+    def iterar_con_escritura(*args, **kwargs):
+        yield from iterar(*args, **kwargs)
+        # La aplicación registra un avance entre la lectura y la escritura
+        almacenamiento.agregar_registro(
+            "A", crear_registro("2025-02-01", 20.0, 10.0, 100.0, {"Escombro": 1.0}), ruta
+        )
+
+    monkeypatch.setattr(almacenamiento, 'iterar_proyectos', iterar_con_escritura)
+    assert cli.main(['--bd', ruta, 'recalcular', '--aplicar']) == 1
+    assert "No se guardaron los cambios" in capsys.readouterr().err
+    assert len(almacenamiento.cargar_datos(ruta)["A"]["registros"]) == 2
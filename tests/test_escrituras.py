@@ -0,0 +1,54 @@
+import multiprocessing
+
+import pytest
+
+from fgr import almacenamiento
+from fgr.cache import CacheProyectos
+from fgr.calculos import crear_registro
+from fgr.cli import problemas_proyecto
+from fgr.sintetico import registrar_avances
+
+
+def test_escrituras_concurrentes_sin_perdidas(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    for nombre in ("A", "B"):
+        almacenamiento.crear_proyecto(nombre, 10_000.0, ["Escombro"], ruta)
+    procesos, escrituras = 4, 25
+    with multiprocessing.Pool(procesos) as pool:
+        resultados = pool.starmap(registrar_avances, [(ruta, escrituras, s) for s in range(procesos)])
+
+    datos = almacenamiento.cargar_datos(ruta)
+    for nombre, proyecto in datos.items():
+        # Cada escritura confirmada está en la base, con valores derivados consistentes
+        assert len(proyecto["registros"]) == sum(guardados.get(nombre, 0) for guardados, _ in resultados)
+        assert problemas_proyecto(nombre, proyecto) == []
+    assert sum(len(p["registros"]) for p in datos.values()) == procesos * escrituras
+
+
+def test_version_vista_desactualizada(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    almacenamiento.crear_proyecto("A", 100.0, ["Escombro"], ruta)
+    una, otra = CacheProyectos(ruta), CacheProyectos(ruta)
+    vista = otra.version_proyecto("A")
+    una.agregar_registro("A", crear_registro("2025-01-01", 10.0, 0.0, 100.0, {"Escombro": 1.0}), vista)
+
+    registro = crear_registro("2025-01-02", 20.0, 10.0, 100.0, {"Escombro": 2.0})
+    with pytest.raises(almacenamiento.ConflictoEscritura):
+        otra.agregar_registro("A", registro, vista)
+    with pytest.raises(almacenamiento.ConflictoEscritura):
+        otra.limpiar_registros("A", vista)
+    with pytest.raises(almacenamiento.ConflictoEscritura):
+        otra.eliminar_proyecto("A", vista)
+    # Con la versión actual la escritura se acepta y las dos cachés la ven
+    otra.agregar_registro("A", registro, otra.version_proyecto("A"))
+    assert len(una.proyecto("A")) == len(otra.proyecto("A")) == 2
+
+
+def test_crear_nombre_repetido_desde_otra_cache(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    una, otra = CacheProyectos(ruta), CacheProyectos(ruta)
+    otra.indice()
+    una.crear_proyecto("A", 100.0, ["Escombro"])
+    with pytest.raises(almacenamiento.ConflictoEscritura):
+        otra.crear_proyecto("A", 50.0, ["Madera"])
+    assert otra.indice()[0]["A"]["area_total"] == 100.0
@@ -0,0 +1,95 @@
+import io
+
+import pandas as pd
+import pytest
+
+from fgr import almacenamiento, exportacion
+from fgr.analisis import AnalisisProyecto
+from fgr.modelo import columnas_de
+from fgr.sintetico import generar_proyectos
+
+
+def registro(fecha, avance, **cambios):
+    return dict({
+        "fecha": fecha, "porcentaje_avance": avance, "incremento_porcentaje": 5.0,
+        "area_periodo": 50.0, "residuos_periodo": 3.0,
+        "tipos_residuos": {"Escombro": 2.0, "Madera": 1.0}, "fgr_periodo": 0.06
+    }, **cambios)
+
+
+def proyectos_de_prueba():
+    legado = registro("2025-02-01", 20.0)
+    del legado["area_periodo"]
+    datos = generar_proyectos(20, 30)
+    datos["Borde"] = {"area_total": 1000.0, "tipos_residuos": ["Escombro"], "registros": [
+        registro("2025-03-01", 30.0), legado,
+        registro("2025-01-01", 10.0, tipos_residuos={"Otro": 4.0}),
+        registro("2025-02-01", 25.0, area_periodo=0.0),
+        registro("2025-02-01", 26.0, residuos_periodo=0.0, tipos_residuos={}),
+    ]}
+    datos["Sin área"] = {"area_total": 0.0, "tipos_residuos": [], "registros": [
+        registro("2025-01-01", 0.0, area_periodo=0.0)
+    ]}
+    datos["Vacío"] = {"area_total": 10.0, "tipos_residuos": ["Yeso"], "registros": []}
+    return datos
+
+
+def tabla_por_proyecto(nombre, proyecto, tipos):
+    # Tabla de un proyecto armada con AnalisisProyecto, como la ve la aplicación
+    analisis = AnalisisProyecto(proyecto["area_total"], proyecto["registros"])
+    volumenes = analisis.residuos_por_tipo().reindex(columns=tipos, fill_value=0.0)
+    tabla = pd.concat([
+        exportacion.tabla_registros(analisis.dataframe()),
+        volumenes.reset_index(drop=True).round(2).add_suffix(' (m³)')
+    ], axis=1)
+    tabla.insert(0, 'Proyecto', nombre)
+    return tabla
+
+
+def test_tabla_igual_a_la_de_cada_proyecto():
+    datos = proyectos_de_prueba()
+    proyectos = list(columnas_de(datos).items())
+    tipos = exportacion.tipos_de(proyectos)
+    esperado = pd.concat(
+        [tabla_por_proyecto(nombre, p, tipos) for nombre, p in datos.items() if p["registros"]],
+        ignore_index=True
+    )
+    tabla = exportacion.tabla_proyectos(proyectos, tipos)
+    pd.testing.assert_frame_equal(tabla, esperado)
+
+
+def test_no_se_pierden_volumenes_de_tipos_no_configurados():
+    datos = proyectos_de_prueba()
+    proyectos = list(columnas_de(datos).items())
+    tipos = exportacion.tipos_de(proyectos)
+    # "Otro" solo aparece en un registro de "Borde", que no lo tiene configurado
+    assert "Otro" in tipos
+    tabla = exportacion.tabla_proyectos(proyectos, tipos)
+    for tipo in tipos:
+        total = sum(
+            r["tipos_residuos"].get(tipo, 0.0) for p in datos.values() for r in p["registros"]
+        )
+        assert tabla[f"{tipo} (m³)"].sum() == pytest.approx(total, abs=0.01 * len(tabla))
+
+
+def test_linea_de_comandos_igual_a_exportar(tmp_path):
+    ruta, destino = str(tmp_path / 'proyectos.db'), tmp_path / 'todo.csv'
+    datos = proyectos_de_prueba()
+    almacenamiento.guardar_datos(datos, ruta)
+    assert exportacion.main([str(destino), '--bd', ruta]) == 0
+    proyectos = list(almacenamiento.cargar_columnas(ruta).items())
+    assert destino.read_bytes() == exportacion.exportar_a_bytes(proyectos, 'csv')
+    assert "Otro (m³)" in destino.read_text(encoding='utf-8').splitlines()[0]
+
+
+def test_csv_no_depende_del_tamano_de_bloque():
+    proyectos = list(columnas_de(proyectos_de_prueba()).items())
+    tipos = exportacion.tipos_de(proyectos)
+    completos = []
+    for filas_por_bloque in (1, 50, exportacion.FILAS_POR_BLOQUE):
+        destino = io.BytesIO()
+        tablas = exportacion.bloques(proyectos, tipos, filas_por_bloque=filas_por_bloque)
+        exportacion.escribir_csv(tablas, destino)
+        completos.append(destino.getvalue())
+    assert completos[0] == completos[1] == completos[2]
+    assert completos[0] == exportacion.exportar_a_bytes(proyectos, 'csv')
@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fgr.importacion import importar
+
+PROYECTOS = {
+    "Edificio A": {"area_total": 1000.0, "tipos_residuos": ["Escombro", "Madera"], "avance": 10.0},
+    "Edificio B": {"area_total": 500.0, "tipos_residuos": ["Escombro"], "avance": 0.0},
+}
+
+
+def importar_csv(texto, tamano_bloque):
+    return importar(io.StringIO(texto), PROYECTOS, tamano_bloque=tamano_bloque, formato='csv')
+
+
+def archivo_desordenado(filas=60, semilla=0):
+    rng = np.random.default_rng(semilla)
+    datos = pd.DataFrame({
+        'proyecto': rng.choice(["Edificio A", "Edificio B", "Edificio C"], filas),
+        'fecha': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, filas), unit='D'),
+        'porcentaje_avance': rng.integers(1, 110, filas),
+        'Escombro': rng.integers(0, 20, filas),
+        'Madera': rng.integers(0, 5, filas),
+    })
+    datos['fecha'] = datos['fecha'].dt.strftime('%Y-%m-%d')
+    return datos.to_csv(index=False)
+
+
+def test_filas_fuera_de_orden_no_dependen_del_bloque():
+    texto = (
+        "proyecto,fecha,porcentaje_avance,Escombro\n"
+        "Edificio A,2025-03-01,30,5\n"
+        "Edificio A,2025-02-01,20,4\n"
+    )
+    for tamano_bloque in (1, 2):
+        resultado = importar_csv(texto, tamano_bloque)
+        assert [r["porcentaje_avance"] for r in resultado.registros["Edificio A"]] == [30.0]
+        assert resultado.errores['fila'].tolist() == [3]
+        assert resultado.registros["Edificio A"][0]["incremento_porcentaje"] == 20.0
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_mismo_resultado_con_cualquier_tamano_de_bloque(semilla):
+    texto = archivo_desordenado(semilla=semilla)
+    esperado = importar_csv(texto, 10_000)
+    assert esperado.importadas > 0 and len(esperado.errores) > 0
+    for tamano_bloque in (1, 3, 7):
+        resultado = importar_csv(texto, tamano_bloque)
+        assert resultado.registros == esperado.registros
+        pd.testing.assert_frame_equal(
+            resultado.errores.reset_index(drop=True), esperado.errores.reset_index(drop=True),
+            check_dtype=False
+        )
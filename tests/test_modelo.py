@@ -0,0 +1,85 @@
+import bisect
+import json
+import random
+
+from fgr import almacenamiento
+from fgr.cache import CacheProyectos
+from fgr.modelo import ColumnasProyecto
+from fgr.sintetico import generar_proyectos
+
+
+def registro(fecha, avance, tipos_residuos):
+    return {
+        "fecha": fecha, "porcentaje_avance": avance, "incremento_porcentaje": 1.0,
+        "area_periodo": 10.0, "residuos_periodo": sum(tipos_residuos.values()),
+        "tipos_residuos": tipos_residuos, "fgr_periodo": 0.1
+    }
+
+
+def test_ida_y_vuelta_al_formato_json():
+    datos = json.loads(json.dumps(generar_proyectos(20, 30)))
+    legado = dict(next(iter(datos.values()))["registros"][0])
+    del legado["area_periodo"], legado["fgr_periodo"]
+    datos["Legado"] = {"area_total": 100.0, "tipos_residuos": ["Escombro"], "registros": [legado]}
+    datos["Vacío"] = {"area_total": 5.0, "tipos_residuos": ["Yeso"], "registros": []}
+    for proyecto in datos.values():
+        assert ColumnasProyecto.desde_proyecto(proyecto).a_proyecto() == proyecto
+
+
+def test_agregar_ordena_como_insort():
+    proyecto = {"area_total": 100.0, "tipos_residuos": ["Escombro", "Madera"], "registros": [
+        registro("2025-01-01", 10.0, {"Escombro": 1.0}),
+        registro("2025-02-01", 20.0, {"Madera": 2.0}),
+        registro("2025-03-01", 30.0, {"Escombro": 3.0, "Madera": 1.0}),
+    ]}
+    nuevos = [
+        registro("2025-02-01", 21.0, {"Yeso": 4.0}),
+        registro("2024-12-01", 5.0, {"Escombro": 0.5}),
+        registro("2025-04-01", 40.0, {}),
+        registro("2025-02-01", 22.0, {"Madera": 1.0, "Yeso": 2.0}),
+    ]
+    esperado = list(proyecto["registros"])
+    for nuevo in nuevos:
+        bisect.insort(esperado, nuevo, key=lambda r: r["fecha"])
+
+    columnas = ColumnasProyecto.desde_proyecto(proyecto)
+    agregadas = columnas.agregar(nuevos)
+    assert agregadas.a_registros() == esperado
+    assert agregadas.tipos == ["Escombro", "Madera", "Yeso"]
+    # Las columnas originales no cambian
+    assert columnas.a_proyecto() == proyecto
+
+
+def test_agregar_por_lotes_aleatorios_igual_a_insort():
+    rng = random.Random(1)
+    columnas = ColumnasProyecto.vacias(100.0, ["Escombro"])
+    esperado = []
+    for _ in range(30):
+        lote = [
+            registro(f"2025-{rng.randrange(1, 4):02d}-01", rng.random(), {rng.choice("ABC"): rng.random()})
+            for _ in range(rng.randrange(1, 4))
+        ]
+        for nuevo in lote:
+            bisect.insort(esperado, nuevo, key=lambda r: r["fecha"])
+        columnas = columnas.agregar(lote)
+        assert columnas.a_registros() == esperado
+
+
+def test_cache_mantiene_las_columnas_al_escribir(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    almacenamiento.guardar_datos(generar_proyectos(3, 10), ruta)
+    cache = CacheProyectos(ruta)
+    nombre = next(iter(cache.indice()[0]))
+    assert len(cache.proyectos) == 3
+    ultimo = cache.proyecto(nombre).a_registros()[-1]
+    cache.agregar_registros({nombre: [
+        registro(ultimo["fecha"], ultimo["porcentaje_avance"] + 1, {"Otro": 2.0}),
+        registro("2000-01-01", ultimo["porcentaje_avance"] + 2, {"Escombro": 1.0}),
+    ]})
+    cache.crear_proyecto("Nuevo", 50.0, ["Yeso"])
+    assert len(cache.proyecto("Nuevo")) == 0
+
+    for nombre_proyecto, proyecto in almacenamiento.cargar_datos(ruta).items():
+        assert cache.proyecto(nombre_proyecto).a_proyecto() == proyecto
+    cache.limpiar_registros(nombre)
+    assert len(cache.proyectos[nombre]) == 0
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from fgr import almacenamiento, periodos
+from fgr.analisis import AnalisisProyecto
+from fgr.cache import CacheProyectos
+from fgr.calculos import completar_registro, crear_registro
+from fgr.modelo import columnas_de
+from fgr.portafolio import Portafolio
+from fgr.sintetico import generar_proyectos, proyecto_diario
+
+
+def acumulados_recorriendo(proyecto, frecuencia):
+    """Acumulados de un proyecto agregando sus registros uno por uno"""
+    acumulados = periodos.Acumulados(frecuencia)
+    for registro in proyecto["registros"]:
+        acumulados.agregar(completar_registro(registro, proyecto["area_total"]))
+    return acumulados
+
+
+def assert_acumulados_iguales(obtenidos, esperados):
+    assert obtenidos.claves == esperados.claves
+    for clave in esperados.claves:
+        n, area, residuos, tipos = obtenidos.periodo(clave)
+        n_esperado, area_esperada, residuos_esperados, tipos_esperados = esperados.periodo(clave)
+        assert n == n_esperado
+        assert np.isclose(area, area_esperada) and np.isclose(residuos, residuos_esperados)
+        assert tipos.keys() == tipos_esperados.keys()
+        assert all(np.isclose(tipos[t], v) for t, v in tipos_esperados.items())
+
+
+@pytest.mark.parametrize('desde, hasta', [
+    (None, None),
+    ('2015-03-15', '2016-08-10'),
+    ('2015-03-02', '2015-03-20'),
+    ('2015-12-31', '2016-01-01'),
+    (None, '2015-02-10'),
+    ('2016-11-15', None),
+    ('2017-01-01', '2018-01-01'),
+])
+def test_resumen_rango_igual_a_recorrer_registros(desde, hasta):
+    proyecto = proyecto_diario(730)
+    analisis = AnalisisProyecto(proyecto["area_total"], proyecto["registros"])
+    filas = [
+        completar_registro(r, proyecto["area_total"]) for r in proyecto["registros"]
+        if (desde is None or r["fecha"] >= desde) and (hasta is None or r["fecha"] <= hasta)
+    ]
+    tipos = {}
+    for registro in filas:
+        for tipo, volumen in registro["tipos_residuos"].items():
+            tipos[tipo] = tipos.get(tipo, 0.0) + volumen
+
+    resumen = analisis.resumen_rango(desde, hasta)
+    assert resumen['registros'] == len(filas)
+    assert np.isclose(resumen['area'], sum(r["area_periodo"] for r in filas))
+    assert np.isclose(resumen['residuos'], sum(r["residuos_periodo"] for r in filas))
+    assert resumen['tipos'].keys() == tipos.keys()
+    assert all(np.isclose(resumen['tipos'][t], v) for t, v in tipos.items())
+
+
+@pytest.mark.parametrize('frecuencia', ['M', 'Q'])
+def test_desde_portafolio_igual_a_agregar(frecuencia):
+    datos = generar_proyectos(30, 40)
+    acumulados = periodos.desde_portafolio(Portafolio(columnas_de(datos)), frecuencia)
+    assert acumulados.keys() == datos.keys()
+    for nombre, proyecto in datos.items():
+        assert_acumulados_iguales(acumulados[nombre], acumulados_recorriendo(proyecto, frecuencia))
+
+
+def test_reporte_del_trimestre_igual_a_agrupar():
+    datos = generar_proyectos(30, 40)
+    acumulados = periodos.desde_portafolio(Portafolio(columnas_de(datos)), 'Q')
+    clave = max(c for a in acumulados.values() for c in a.claves)
+    por_proyecto, _ = periodos.reporte(acumulados, clave)
+
+    esperado = {}
+    for nombre, proyecto in datos.items():
+        for registro in proyecto["registros"]:
+            if periodos.clave(registro["fecha"], 'Q') == clave:
+                area = completar_registro(registro, proyecto["area_total"])["area_periodo"]
+                esperado[nombre] = esperado.get(nombre, 0.0) + area
+    assert por_proyecto['proyecto'].tolist() == list(esperado)
+    assert np.allclose(por_proyecto['area'], list(esperado.values()))
+
+
+def test_cache_mantiene_los_acumulados_al_escribir(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    datos = generar_proyectos(5, 20)
+    almacenamiento.guardar_datos(datos, ruta)
+    cache = CacheProyectos(ruta)
+    for frecuencia in periodos.FRECUENCIAS.values():
+        cache.periodos(frecuencia)
+
+    limpio = next(iter(datos))
+    cache.limpiar_registros(limpio)
+    cache.crear_proyecto("Nuevo", 100.0, ["Escombro"])
+    cache.agregar_registros({
+        limpio: [crear_registro("2030-02-01", 10.0, 0.0, datos[limpio]["area_total"], {"Escombro": 2.0})],
+        "Nuevo": [
+            crear_registro("2030-05-01", 10.0, 0.0, 100.0, {"Escombro": 1.0}),
+            crear_registro("2030-05-20", 30.0, 10.0, 100.0, {"Madera": 4.0}),
+        ],
+    })
+
+    proyectos = almacenamiento.cargar_datos(ruta)
+    for frecuencia in periodos.FRECUENCIAS.values():
+        mantenidos = cache.periodos(frecuencia)
+        assert mantenidos.keys() == proyectos.keys()
+        for nombre, proyecto in proyectos.items():
+            assert_acumulados_iguales(mantenidos[nombre], acumulados_recorriendo(proyecto, frecuencia))
+
+
+def test_escrituras_no_cambian_lo_ya_entregado(tmp_path):
+    ruta = str(tmp_path / 'proyectos.db')
+    datos = generar_proyectos(3, 10)
+    almacenamiento.guardar_datos(datos, ruta)
+    cache = CacheProyectos(ruta)
+    nombre = next(iter(datos))
+    analisis, mensuales = cache.analisis(nombre), cache.periodos('M')
+    df, claves = analisis.dataframe(), list(mensuales[nombre].claves)
+
+    cache.limpiar_registros(nombre)
+    cache.agregar_registro(nombre, crear_registro("2031-01-01", 10.0, 0.0, 100.0, {"Escombro": 1.0}))
+    cache.crear_proyecto("Nuevo", 100.0, ["Escombro"])
+    cache.eliminar_proyecto(list(datos)[1])
+
+    # Lo que una sesión ya recibió queda igual; la caché entrega objetos nuevos
+    assert analisis.dataframe() is df and len(analisis) == len(df)
+    assert mensuales.keys() == datos.keys() and mensuales[nombre].claves == claves
+    assert cache.periodos('M')[nombre].claves == ['2031-01']
+    assert len(cache.analisis(nombre)) == 1
+
+    nuevo = cache.analisis("Nuevo")
+    cache.agregar_registro("Nuevo", crear_registro("2031-02-01", 5.0, 0.0, 100.0, {"Escombro": 1.0}))
+    assert len(nuevo) == 0 and len(cache.analisis("Nuevo")) == 1
@@ -0,0 +1,41 @@
+import time
+
+from fgr import tareas
+
+
+def esperar(gestor, id_tarea):
+    while not gestor.tarea(id_tarea).terminada:
+        time.sleep(0.01)
+    return gestor.tarea(id_tarea)
+
+
+def archivo(control, tamano):
+    return bytes(tamano)
+
+
+def test_archivos_terminados_limitados_por_tamano(monkeypatch):
+    monkeypatch.setattr(tareas, 'MAX_BYTES_TERMINADAS', 100)
+    gestor = tareas.GestorTareas(max_simultaneas=1, procesos=1)
+    try:
+        ids = []
+        for clave in range(3):
+            ids.append(gestor.enviar("Exportación", archivo, 40, clave=clave))
+            esperar(gestor, ids[-1])
+        # Las dos últimas suman 80 bytes; la primera se descartó al terminar la tercera
+        assert [t.id for t in gestor.tareas()] == ids[1:]
+        # Una tarea nueva con la misma clave vuelve a generar el archivo descartado
+        assert gestor.enviar("Exportación", archivo, 40, clave=0) != ids[0]
+    finally:
+        gestor.cerrar()
+
+
+def test_conserva_la_ultima_aunque_supere_el_limite(monkeypatch):
+    monkeypatch.setattr(tareas, 'MAX_BYTES_TERMINADAS', 100)
+    gestor = tareas.GestorTareas(max_simultaneas=1, procesos=1)
+    try:
+        anterior = esperar(gestor, gestor.enviar("Exportación", archivo, 10))
+        grande = esperar(gestor, gestor.enviar("Exportación", archivo, 500))
+        assert gestor.tareas() == [grande]
+        assert gestor.tarea(anterior.id) is None
+    finally:
+        gestor.cerrar()